@@ -1,344 +1,402 @@
 import json
-import openai
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Future
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+import threading
 import time
 import random
+from background import submit_background
 from config import CONFIG
+from deadline import time_left
 from models import AssessmentDomain, Question
+from metrics import BUDGET_FALLBACKS, LLM_CALL_DURATION, LLM_TIME_TO_QUESTION, LLM_TOKENS, MOCK_FALLBACKS
+from model_router import create_model_router
+from prompt_templates import get_prompt_template
+from stream_parser import IncrementalJSONObject
+from summary_engine import build_local_summary, merge_narrative
+from token_accounting import current_ledger
+from tracing import span, traced
+
+# Fields a question needs before it can be shown; the explanation streams in afterwards.
+QUESTION_SERVABLE_FIELDS = ("question", "options", "correct_answer_index", "knowledge_tag", "difficulty_level", "estimated_time")
 
 class AIService:
     def __init__(self):
         self.api_key = CONFIG["openai"]["api_key"]
         
-        self.model = "gpt-4o"
+        self.model = CONFIG["openai"]["model"]
+        self.router = create_model_router()
         self.temperature = CONFIG["openai"]["temperature"]
         self.max_tokens = CONFIG["openai"]["max_tokens"]
         
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._inflight = 0
+        self._inflight_lock = threading.Lock()
+        
         if self.api_key and self.api_key.startswith("sk-"):
-            self.client = openai.OpenAI(api_key=self.api_key)
             self.use_mock = False
-            print("OpenAI client initialized successfully with GPT-4o")
         else:
-            self.client = None
             self.use_mock = True
             print("Warning: No valid OpenAI API key found. Using mock data for demonstration.")
 
-    def _call_openai(self, prompt: str, temperature: Optional[float] = None) -> str:
+    @property
+    def client(self):
+        """
+        Imports the OpenAI SDK and constructs the client on first use, so importing
+        the app and spawning workers does not pay for it.
+        """
+        if self._client is None and not self.use_mock:
+            with self._client_lock:
+                if self._client is None:
+                    import openai
+                    self._client = openai.OpenAI(api_key=self.api_key)
+                    print(f"OpenAI client initialized successfully with {self.model}")
+        return self._client
+
+    def warm_up(self, preopen_connections: bool = False):
+        """
+        Constructs the client ahead of the first request and, optionally, opens a
+        connection to the API so the first real call skips the TLS handshake.
+        """
+        client = self.client
+        if client is None or not preopen_connections:
+            return
+        try:
+            client.models.list()
+        except Exception as e:
+            print(f"Error pre-opening OpenAI connection: {e}")
+
+    def inflight_calls(self) -> int:
+        """Number of LLM calls (streams included) currently running."""
+        return self._inflight
+
+    def _track_call(self, delta: int):
+        with self._inflight_lock:
+            self._inflight += delta
+
+    def _call_openai(self, messages: List[Dict[str, str]], temperature: Optional[float] = None, call_type: str = "other",
+                     max_tokens: Optional[int] = None, difficulty: Optional[int] = None, allow_mock: bool = True) -> str:
         if self.use_mock or self.client is None:
-            return self._generate_mock_response(prompt)
+            MOCK_FALLBACKS.labels(call_type, "no_client").inc()
+            return self._generate_mock_response(call_type)
         
+        model = self.router.choose(call_type, difficulty)
+        start = time.perf_counter()
+        self._track_call(1)
         try:
-            print(f"DEBUG: Making OpenAI API call with model={self.model}")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert educational assessment designer. Generate high-quality, accurate educational content in proper JSON format."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temperature or self.temperature,
-                max_tokens=self.max_tokens,
-                timeout=30.0  # Add 30 second timeout to prevent hanging
-            )
+            print(f"DEBUG: Making OpenAI API call with model={model}")
+            prompt_chars = sum(len(message["content"]) for message in messages)
+            with span("ai.call_openai", call_type=call_type, model=model, prompt_chars=prompt_chars) as call_span:
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature or self.temperature,
+                    max_tokens=max_tokens or CONFIG["openai"]["max_tokens_by_call_type"].get(call_type, self.max_tokens),
+                    timeout=time_left(30.0, CONFIG["deadlines"]["min_llm_timeout"])  # at most 30 s, less if the request's budget is shorter
+                )
+                usage = getattr(response, "usage", None)
+                if usage is not None:
+                    call_span.set_attribute("prompt_tokens", getattr(usage, "prompt_tokens", 0))
+                    call_span.set_attribute("completion_tokens", getattr(usage, "completion_tokens", 0))
+            elapsed = time.perf_counter() - start
+            LLM_CALL_DURATION.labels(call_type, model, "success").observe(elapsed)
+            self.router.record(model, elapsed, ok=True)
+            self._record_usage(call_type, model, usage, elapsed)
             print(f"DEBUG: OpenAI API call successful, response length: {len(response.choices[0].message.content)}")
             return response.choices[0].message.content.strip()
         except Exception as e:
+            elapsed = time.perf_counter() - start
+            LLM_CALL_DURATION.labels(call_type, model, "error").observe(elapsed)
+            self.router.record(model, elapsed, ok=False)
+            if not allow_mock:
+                raise
+            MOCK_FALLBACKS.labels(call_type, "api_error").inc()
             print(f"Error calling OpenAI API: {e}")
             print(f"DEBUG: Falling back to mock data due to API error")
-            return self._generate_mock_response(prompt)  # Return mock data instead of re-raising
-
+            return self._generate_mock_response(call_type)  # Return mock data instead of re-raising
+        finally:
+            self._track_call(-1)
+
+    def _stream_openai(self, messages: List[Dict[str, str]], temperature: Optional[float] = None, call_type: str = "other",
+                       max_tokens: Optional[int] = None, difficulty: Optional[int] = None) -> Iterator[str]:
+        """
+        Yields the completion text chunk by chunk. Latency, model health and token usage
+        are recorded when the stream ends, so its tail may be consumed on another thread.
+        The call stops counting as in flight however the stream ends, including when the
+        generator is closed early.
+        """
+        model = self.router.choose(call_type, difficulty)
+        start = time.perf_counter()
+        usage = None
+        stream = None
+        self._track_call(1)
+        try:
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature or self.temperature,
+                max_tokens=max_tokens or CONFIG["openai"]["max_tokens_by_call_type"].get(call_type, self.max_tokens),
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=time_left(30.0, CONFIG["deadlines"]["min_llm_timeout"])
+            )
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception:
+            elapsed = time.perf_counter() - start
+            LLM_CALL_DURATION.labels(call_type, model, "error").observe(elapsed)
+            self.router.record(model, elapsed, ok=False)
+            raise
+        else:
+            elapsed = time.perf_counter() - start
+            LLM_CALL_DURATION.labels(call_type, model, "success").observe(elapsed)
+            self.router.record(model, elapsed, ok=True)
+            self._record_usage(call_type, model, usage, elapsed)
+        finally:
+            self._track_call(-1)
+            if stream is not None and hasattr(stream, "close"):
+                stream.close()
+
+    def expected_latency(self, call_type: str, difficulty: Optional[int] = None) -> float:
+        return self.router.expected_latency(call_type, difficulty)
+
+    def _record_usage(self, call_type: str, model: str, usage: Any, latency: float):
+        prompt_tokens = (getattr(usage, "prompt_tokens", 0) or 0) if usage is not None else 0
+        completion_tokens = (getattr(usage, "completion_tokens", 0) or 0) if usage is not None else 0
+        details = getattr(usage, "prompt_tokens_details", None) if usage is not None else None
+        cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+        LLM_TOKENS.labels(call_type, model, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(call_type, model, "cached_prompt").inc(cached_tokens)
+        LLM_TOKENS.labels(call_type, model, "completion").inc(completion_tokens)
+        ledger = current_ledger()
+        if ledger is not None:
+            ledger.record(call_type, model, prompt_tokens, completion_tokens, latency, cached_tokens)
+
+    @traced("ai.generate_domains")
     def generate_assessment_domains(self, main_topic: str, num_domains: int) -> List[AssessmentDomain]:
-        prompt = f"""# Role and Objective
-
-You are an expert knowledge assessor and educational designer. Your task is to break down a subject into {num_domains} distinct knowledge domains for comprehensive assessment. Focus on creating a logical learning progression that reveals someone's true understanding and competency level. Your response must be a pure JSON array.
-
-
-1. `mainTopic` (string): {main_topic}
-
-2. `numDomains` (number): {num_domains}
-
-
-1. Analyze the `mainTopic` from both assessment and learning progression perspectives.
-
-2. Identify the core knowledge domains that define expertise in this area, arranged from foundational to advanced.
-
-3. Create domains that build upon each other logically (prerequisites → applications → mastery).
-
-4. For each domain, provide a clear English name and detailed description focused on what knowledge/skills will be assessed.
-
-5. Estimate the relative difficulty of each domain (1-100 scale), ensuring a good distribution.
-
-
-- Start with foundational concepts (difficulty 20-40)
-- Progress to application and analysis (difficulty 40-70) 
-- End with synthesis and evaluation (difficulty 70-90)
-- Each domain should have 8-12 questions for thorough assessment
-- Focus on practical, real-world applications where possible
-
-
-[
-
-  {{
-
-    "domain_name": "Fundamental Concepts and Principles",
-
-    "description": "Assesses understanding of core concepts, basic terminology, and foundational principles that form the basis for advanced learning.",
-
-    "estimated_difficulty": 25
-
-  }},
-
-  {{
-
-    "domain_name": "Practical Application and Problem Solving",
-
-    "description": "Evaluates the ability to apply theoretical knowledge to real-world scenarios and solve specific problems.",
-
-    "estimated_difficulty": 65
-
-  }}
-
-]"""
+        messages = get_prompt_template("domains").render(main_topic=main_topic, num_domains=num_domains)
 
         try:
-            response = self._call_openai(prompt, CONFIG["ai_prompt"]["domain_generation_temperature"] if "ai_prompt" in CONFIG else 0.8)
-            domains_data = json.loads(response)
-            
-            domains = []
-            for domain_data in domains_data:
-                domain = AssessmentDomain(
-                    domain_name=domain_data["domain_name"],
-                    description=domain_data["description"],
-                    estimated_difficulty=domain_data["estimated_difficulty"]
-                )
-                domains.append(domain)
+            response = self._call_openai(messages, CONFIG["ai_prompt"]["domain_generation_temperature"] if "ai_prompt" in CONFIG else 0.8, call_type="domains")
+            with span("ai.parse_response", call_type="domains"):
+                domains_data = json.loads(response)
+                
+                domains = []
+                for domain_data in domains_data:
+                    domain = AssessmentDomain(
+                        domain_name=domain_data["domain_name"],
+                        description=domain_data["description"],
+                        estimated_difficulty=domain_data["estimated_difficulty"]
+                    )
+                    domains.append(domain)
             
             return domains
         except Exception as e:
+            MOCK_FALLBACKS.labels("domains", "parse_error").inc()
             print(f"Error generating domains: {e}")
             return self._generate_mock_domains(main_topic, num_domains)
 
-    def generate_assessment_question(self, domain: str, difficulty: int, knowledge_gaps: List[str]) -> Question:
+    @traced("ai.generate_question")
+    def generate_assessment_question(self, domain: str, difficulty: int, knowledge_gaps: List[str],
+                                     allow_mock: bool = True) -> Question:
+        """
+        Generates one question. Unless allow_mock is False, failures fall back to a mock
+        question instead of raising.
+        """
         print(f"DEBUG: generate_assessment_question called with domain='{domain}', difficulty={difficulty}")
         print(f"DEBUG: self.use_mock={self.use_mock}, self.client is None={self.client is None}")
         
         gaps_str = json.dumps(knowledge_gaps) if knowledge_gaps else "[]"
         
-        prompt = f"""# Role and Objective
-
-You are an expert assessment designer and educational psychologist. Your task is to create a high-quality, engaging multiple-choice question that accurately measures knowledge in a specific domain at a precise difficulty level. Focus on creating questions that are both challenging and fair. Your response must be a pure JSON object.
-
-
-1. `domain` (string): {domain}
-
-2. `difficulty` (number): {difficulty} (1-100 scale, where 1=very basic, 100=expert level)
-
-3. `knowledgeGaps` (array): {gaps_str}
-
-
-1. Create a question that precisely matches the difficulty level and is engaging to answer.
-
-2. If `knowledgeGaps` is provided, prioritize assessing those specific areas to help the learner improve.
-
-3. Design 4 options with exactly one correct answer and three carefully crafted distractors.
-
-4. Include plausible distractors that reveal common misconceptions or partial understanding.
-
-5. Provide a specific knowledge tag and comprehensive explanation with learning tips.
-
-6. Estimate realistic time needed based on question complexity.
-
-
-- Use clear, unambiguous English language
-- Avoid trick questions or overly complex wording
-- Include real-world context when possible
-- Make distractors educational (reveal common mistakes)
-- Provide explanations that teach, not just correct
-
-
-- 1-20: Basic definitions, simple recall, fundamental concepts
-- 21-40: Understanding relationships, simple application, basic analysis
-- 41-60: Moderate application, comparison, pattern recognition
-- 61-80: Complex synthesis, multi-step problem solving, evaluation
-- 81-100: Expert-level analysis, advanced synthesis, cutting-edge concepts
-
-
-{{
-
-  "question": "Clear, precise question text that tests the intended knowledge",
-
-  "options": [
-
-    "Option A - plausible but incorrect answer",
-
-    "Option B - correct answer", 
-
-    "Option C - common misconception answer",
-
-    "Option D - partially correct but incomplete answer"
-
-  ],
-
-  "correct_answer_index": 1,
-
-  "knowledge_tag": "Specific knowledge area label",
-
-  "explanation": "Detailed explanation of why the correct answer is right, why other options are wrong, and relevant learning points and recommendations.",
-
-  "difficulty_level": {difficulty},
-
-  "estimated_time": 45
-
-}}"""
+        template = "question_brief" if CONFIG["explanations"]["mode"] == "deferred" else "question"
+        messages = get_prompt_template(template).render(domain=domain, difficulty=difficulty, knowledge_gaps=gaps_str)
 
         if self.use_mock or self.client is None:
+            if not allow_mock:
+                raise RuntimeError("No LLM client available")
             print("DEBUG: Taking mock path - calling _generate_mock_question")
+            MOCK_FALLBACKS.labels("question", "no_client").inc()
             return self._generate_mock_question(domain, difficulty)
 
+        temperature = CONFIG["ai_prompt"]["question_generation_temperature"] if "ai_prompt" in CONFIG else 0.7
         try:
+            if CONFIG["openai"]["stream_questions"]:
+                return self._stream_question(messages, temperature, difficulty, template)
             print("DEBUG: Taking OpenAI API path")
-            response = self._call_openai(prompt, CONFIG["ai_prompt"]["question_generation_temperature"] if "ai_prompt" in CONFIG else 0.7)
-            question_data = json.loads(response)
-            
-            question = Question(
-                question=question_data["question"],
-                options=question_data["options"],
-                correct_answer_index=question_data["correct_answer_index"],
-                knowledge_tag=question_data["knowledge_tag"],
-                explanation=question_data["explanation"],
-                difficulty_level=question_data["difficulty_level"],
-                estimated_time=question_data["estimated_time"]
-            )
-            
+            start = time.perf_counter()
+            response = self._call_openai(messages, temperature, call_type="question", difficulty=difficulty,
+                                         allow_mock=allow_mock)
+            with span("ai.parse_response", call_type="question"):
+                question = self._question_from_data(json.loads(response))
+            LLM_TIME_TO_QUESTION.labels("complete").observe(time.perf_counter() - start)
             return question
         except Exception as e:
+            if not allow_mock:
+                raise
+            MOCK_FALLBACKS.labels("question", "parse_error").inc()
             print(f"Error generating question: {e}")
             print("DEBUG: Falling back to _generate_mock_question due to error")
             return self._generate_mock_question(domain, difficulty)
 
-    def generate_assessment_summary(self, main_topic: str, domain_assessments: List[Any], total_time: float) -> Dict[str, Any]:
-        overall_accuracy = 0.0
-        if domain_assessments:
-            total_correct = sum(da.questions_correct for da in domain_assessments)
-            total_attempted = sum(da.questions_attempted for da in domain_assessments)
-            overall_accuracy = total_correct / total_attempted if total_attempted > 0 else 0.0
-
-        assessment_str = json.dumps([{
-            "domain_name": da.domain_name,
-            "questions_attempted": da.questions_attempted,
-            "questions_correct": da.questions_correct,
-            "accuracy": da.questions_correct / da.questions_attempted if da.questions_attempted > 0 else 0.0,
-            "status": da.status.value,
-            "knowledge_gaps": da.knowledge_gaps,
-            "mastery_areas": da.mastery_areas,
-            "average_response_time": da.average_response_time,
-            "confidence_score": da.confidence_score
-        } for da in domain_assessments])
-
-        weakness_summary = []
-        for da in domain_assessments:
-            accuracy = da.questions_correct / da.questions_attempted if da.questions_attempted > 0 else 0.0
-            if accuracy < 0.7 and da.knowledge_gaps:
-                weakness_summary.extend(da.knowledge_gaps)
-
-        prompt = f"""# Role and Objective
-
-You are an expert knowledge assessor and analyst. Your task is to analyze a user's performance across multiple knowledge domains and generate a comprehensive assessment report with AI-generated weakness summaries. Your response must be a pure JSON object.
-
-
-1. `mainTopic` (string): {main_topic}
-
-2. `assessmentData` (array): {assessment_str}
-
-3. `totalTimeMinutes` (number): {round(total_time / 60, 1)}
-
-4. `overallAccuracy` (number): {round(overall_accuracy, 2)}
-
-5. `weaknessAreas` (array): {weakness_summary}
-
-
-1. Determine the user's overall knowledge level (Beginner/Intermediate/Advanced/Expert).
-
-2. Identify their strongest domains and specific mastery areas.
-
-3. Generate AI-powered weakness summaries based on knowledge gaps and poor performance areas.
-
-4. Provide actionable recommendations for addressing weaknesses and further development.
-
-5. Create a detailed breakdown of performance by domain with specific improvement strategies.
-
-
-- Beginner (0-40% accuracy): Basic understanding, needs foundational work
-- Intermediate (41-70% accuracy): Solid grasp of fundamentals, ready for application
-- Advanced (71-85% accuracy): Strong competency, can handle complex scenarios
-- Expert (86-100% accuracy): Mastery level, can teach and innovate
-
-
-{{
-
-  "title": "Knowledge Assessment Report: {main_topic}",
-
-  "overall_score": {round(overall_accuracy * 100, 1)},
-
-  "total_time_minutes": {round(total_time / 60, 1)},
-
-  "domains_assessed": {len(domain_assessments)},
-
-  "knowledge_level": "Determine based on overall performance",
-
-  "strengths": [
-
-    "List specific domains and knowledge areas where user excelled"
-
-  ],
-
-  "weakness_summary": "AI-generated comprehensive analysis of the user's main weaknesses, learning gaps, and areas requiring focused attention based on their performance patterns",
-
-  "areas_for_improvement": [
-
-    "List specific domains and knowledge gaps that need attention"
-
-  ],
-
-  "recommendations": [
-
-    "Provide 3-5 specific, actionable recommendations for improvement with learning resources"
-
-  ],
-
-  "detailed_breakdown": {{
-
-    "domain_name_1": {{
-
-      "score": 85.5,
-
-      "status": "mastered",
-
-      "key_strengths": ["specific strength 1", "specific strength 2"],
+    def _stream_question(self, messages: List[Dict[str, str]], temperature: float, difficulty: int,
+                         template: str = "question") -> Question:
+        """
+        Streams the question and returns it as soon as every field except the explanation
+        has arrived. The rest of the stream is consumed in the background; the question's
+        pending future resolves with the complete data, explanation included. Questions
+        generated without an explanation (deferred mode) have no pending future.
+        """
+        start = time.perf_counter()
+        chunks = self._stream_openai(messages, temperature, call_type="question", difficulty=difficulty)
+        parser = IncrementalJSONObject()
+        try:
+            for chunk in chunks:
+                parser.feed(chunk)
+                if parser.has(QUESTION_SERVABLE_FIELDS):
+                    break
+            if not parser.has(QUESTION_SERVABLE_FIELDS):
+                raise ValueError(f"Streamed question is missing fields: {parser.buffer[:200]}")
+        except BaseException:
+            chunks.close()
+            raise
+        LLM_TIME_TO_QUESTION.labels("streamed").observe(time.perf_counter() - start)
+
+        question_data = dict(parser.fields)
+        with_explanation = template == "question" and "explanation" not in question_data
+        pending = submit_background(self._finish_streamed_question, chunks, parser, with_explanation)
+        return self._question_from_data(question_data, pending if with_explanation else None)
+
+    def _finish_streamed_question(self, chunks: Iterator[str], parser: IncrementalJSONObject,
+                                  with_explanation: bool = True) -> Dict[str, Any]:
+        """
+        Consumes the rest of a streamed question on the background pool. Gives up after
+        stream_tail_timeout seconds; each read is also bounded by the call's timeout.
+        """
+        give_up_at = time.monotonic() + CONFIG["openai"]["stream_tail_timeout"]
+        try:
+            for chunk in chunks:
+                parser.feed(chunk)
+                if time.monotonic() > give_up_at:
+                    raise TimeoutError("Streamed question did not finish in time")
+        finally:
+            chunks.close()
+        if with_explanation and "explanation" not in parser.fields:
+            raise ValueError("Streamed question ended without an explanation")
+        return parser.fields
+
+    def _question_from_data(self, question_data: Dict[str, Any], pending: Optional[Future] = None) -> Question:
+        return Question(
+            question=question_data["question"],
+            options=question_data["options"],
+            correct_answer_index=question_data["correct_answer_index"],
+            knowledge_tag=question_data["knowledge_tag"],
+            explanation=question_data.get("explanation", ""),
+            difficulty_level=question_data["difficulty_level"],
+            estimated_time=question_data["estimated_time"],
+            pending=pending
+        )
+
+    @traced("ai.generate_explanations")
+    def generate_explanations(self, answered: List[Tuple[Question, Optional[int]]]) -> List[str]:
+        """
+        Writes explanations for questions generated without one, in a single call for the
+        whole batch. Each entry is a question and the learner's answer index, if any.
+        Returns one explanation per question, or an empty list if none could be written.
+        """
+        if self.use_mock or self.client is None:
+            MOCK_FALLBACKS.labels("explanation", "no_client").inc()
+            return [self._generate_mock_explanation(question) for question, _ in answered]
 
-      "improvement_areas": ["specific gap 1"],
+        ledger = current_ledger()
+        if ledger is not None and ledger.exhausted():
+            BUDGET_FALLBACKS.labels("explanation", "skipped").inc()
+            ledger.record_fallback()
+            return []
 
-      "learning_strategy": "Specific strategy for this domain"
+        questions_str = json.dumps([
+            {
+                "question": question.question,
+                "options": question.options,
+                "correct_answer_index": question.correct_answer_index,
+                "learner_answer_index": answer_index,
+            } for question, answer_index in answered
+        ])
+        messages = get_prompt_template("explanation").render(questions=questions_str)
+        try:
+            response = self._call_openai(
+                messages,
+                CONFIG["ai_prompt"]["question_generation_temperature"] if "ai_prompt" in CONFIG else 0.7,
+                call_type="explanation",
+                max_tokens=CONFIG["explanations"]["max_tokens_per_question"] * len(answered)
+            )
+            with span("ai.parse_response", call_type="explanation"):
+                explanations = json.loads(response)["explanations"]
+            return [str(explanation) for explanation in explanations]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            MOCK_FALLBACKS.labels("explanation", "parse_error").inc()
+            print(f"Error parsing explanations response: {e}")
+            return [self._generate_mock_explanation(question) for question, _ in answered]
+
+    @traced("ai.generate_summary")
+    def generate_assessment_summary(self, main_topic: str, domain_assessments: List[Any], total_time: float) -> Dict[str, Any]:
+        """
+        Builds the report locally and fills its narrative fields with a blocking LLM call.
+        The app uses build_local_summary plus generate_summary_narrative in the background instead.
+        """
+        local_summary = build_local_summary(main_topic, domain_assessments, total_time)
+        return merge_narrative(local_summary, self.generate_summary_narrative(main_topic, local_summary))
+
+    @traced("ai.generate_summary_narrative")
+    def generate_summary_narrative(self, main_topic: str, local_summary: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Asks the LLM only for the narrative fields of an already computed report: the
+        weakness summary, recommendations and a learning strategy per domain.
+        """
+        report_str = json.dumps({
+            "overall_score": local_summary["overall_score"],
+            "knowledge_level": local_summary["knowledge_level"],
+            "strengths": local_summary["strengths"],
+            "areas_for_improvement": local_summary["areas_for_improvement"],
+            "domains": {
+                name: {key: entry[key] for key in ("score", "status", "key_strengths", "improvement_areas")}
+                for name, entry in local_summary["detailed_breakdown"].items()
+            },
+        })
 
-    }}
+        messages = get_prompt_template("summary").render(main_topic=main_topic, report=report_str)
 
-  }}
+        if self.use_mock or self.client is None:
+            MOCK_FALLBACKS.labels("summary", "no_client").inc()
+            return {}
 
-}}"""
+        ledger = current_ledger()
+        if ledger is not None and ledger.exhausted():
+            BUDGET_FALLBACKS.labels("summary", "local").inc()
+            ledger.record_fallback()
+            return {}
 
         try:
-            response = self._call_openai(prompt, CONFIG["ai_prompt"]["summary_generation_temperature"] if "ai_prompt" in CONFIG else 0.6)
-            summary_data = json.loads(response)
-            return summary_data
+            response = self._call_openai(
+                messages,
+                CONFIG["ai_prompt"]["summary_generation_temperature"] if "ai_prompt" in CONFIG else 0.6,
+                call_type="summary"
+            )
+            with span("ai.parse_response", call_type="summary"):
+                return json.loads(response)
         except (json.JSONDecodeError, KeyError) as e:
-            print(f"Error parsing summary response: {e}")
-            return self._generate_mock_summary(main_topic, domain_assessments, total_time, overall_accuracy)
+            MOCK_FALLBACKS.labels("summary", "parse_error").inc()
+            print(f"Error parsing summary narrative response: {e}")
+            return {}
 
-    def _generate_mock_response(self, prompt: str) -> str:
-        if "domain" in prompt.lower() and "assessment" in prompt.lower():
+    def _generate_mock_response(self, call_type: str) -> str:
+        if call_type == "domains":
             return self._get_mock_domains_response()
-        elif "question" in prompt.lower():
+        elif call_type == "question":
             return self._get_mock_question_response()
-        elif "summary" in prompt.lower():
+        elif call_type == "summary":
             return self._get_mock_summary_response()
         return "{}"
 
@@ -381,6 +439,10 @@ You are an expert knowledge assessor and analyst. Your task is to analyze a user
         print(f"DEBUG: Question object correct_answer_index type: {type(question.correct_answer_index)}")
         return question
 
+    def _generate_mock_explanation(self, question: Question) -> str:
+        correct = question.options[question.correct_answer_index]
+        return f"The correct answer is \"{correct}\". Review {question.knowledge_tag} to see why the other options do not apply."
+
     def _get_mock_domains_response(self) -> str:
         return '''[
   {
@@ -445,31 +507,3 @@ You are an expert knowledge assessor and analyst. Your task is to analyze a user
     }
   }
 }'''
-
-    def _generate_mock_summary(self, main_topic: str, domain_assessments: List[Any], 
-                             total_time: float, overall_accuracy: float) -> Dict[str, Any]:
-        knowledge_levels = ["Beginner", "Intermediate", "Advanced", "Expert"]
-        level_index = min(3, int(overall_accuracy * 4))
-        
-        return {
-            "title": f"Knowledge Assessment Report: {main_topic}",
-            "overall_score": round(overall_accuracy * 100, 1),
-            "total_time_minutes": round(total_time / 60, 1),
-            "domains_assessed": len(domain_assessments),
-            "knowledge_level": knowledge_levels[level_index],
-            "strengths": ["Strong analytical thinking", "Good foundational knowledge"],
-            "areas_for_improvement": ["Advanced concepts", "Application skills"],
-            "recommendations": [
-                "Practice more complex problems",
-                "Review theoretical foundations",
-                "Focus on real-world applications"
-            ],
-            "detailed_breakdown": {
-                domain.domain_name: {
-                    "score": round((domain.questions_correct / max(1, domain.questions_attempted)) * 100, 1),
-                    "status": domain.status.value,
-                    "key_strengths": domain.mastery_areas[:2],
-                    "improvement_areas": domain.knowledge_gaps[:2]
-                } for domain in domain_assessments
-            }
-        }
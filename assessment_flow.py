@@ -1,12 +1,13 @@
 from typing import List, Tuple, Optional
 from datetime import datetime
-from models import AssessmentSession, AssessmentDomain, DomainAssessment, DomainStatus
+from models import AssessmentSession, AssessmentDomain, DomainAssessment, DomainStatus, SessionAggregates
 from ai_service import AIService
 from config import CONFIG
+from token_accounting import new_session_ledger, use_ledger
 
 class AssessmentFlowManager:
-    def __init__(self):
-        self.ai_service = AIService()
+    def __init__(self, ai_service: Optional[AIService] = None):
+        self.ai_service = ai_service or AIService()
         self.current_session: Optional[AssessmentSession] = None
 
     def start_assessment_session(self, topic: str, num_domains: int) -> AssessmentSession:
@@ -19,7 +20,9 @@ class AssessmentFlowManager:
         if num_domains < min_domains or num_domains > max_domains:
             raise ValueError(f"Number of domains must be between {min_domains} and {max_domains}")
         
-        domain_list = self.ai_service.generate_assessment_domains(topic, num_domains)
+        token_usage = new_session_ledger()
+        with use_ledger(token_usage):
+            domain_list = self.ai_service.generate_assessment_domains(topic, num_domains)
         
         domain_assessments = []
         for domain in domain_list:
@@ -38,7 +41,9 @@ class AssessmentFlowManager:
             overall_score=0.0,
             start_time=datetime.now(),
             total_questions=0,
-            total_correct=0
+            total_correct=0,
+            aggregates=SessionAggregates([domain.estimated_difficulty / 100.0 for domain in domain_list]),
+            token_usage=token_usage
         )
         
         return self.current_session
@@ -56,7 +61,7 @@ class AssessmentFlowManager:
         if not self.can_access_domain(domain_index):
             return False
         
-        self.current_session.domain_assessments[domain_index].status = DomainStatus.IN_PROGRESS
+        self.set_domain_status(domain_index, DomainStatus.IN_PROGRESS)
         self.current_session.current_domain_index = domain_index
         
         return True
@@ -87,48 +92,47 @@ class AssessmentFlowManager:
         if not self.current_session:
             return (0, 0)
         
-        completed_count = 0
-        completed_statuses = [DomainStatus.COMPLETED, DomainStatus.MASTERED, DomainStatus.STRUGGLING]
-        
-        for domain_assessment in self.current_session.domain_assessments:
-            if domain_assessment.status in completed_statuses:
-                completed_count += 1
-        
-        total_domains = len(self.current_session.domain_assessments)
-        
-        return (completed_count, total_domains)
+        aggregates = self.current_session.aggregates
+        return (aggregates.finished_domains, len(self.current_session.domain_assessments))
 
     def calculate_overall_score(self) -> float:
         """
-        Calculates the overall score for the entire assessment.
+        Returns the overall score for the entire assessment: the mean domain accuracy of
+        attempted domains, weighted by each domain's estimated difficulty. The session
+        aggregates keep it current, so this is a constant-time read.
         """
         if not self.current_session:
             return 0.0
         
-        if not self.current_session.domain_assessments:
-            return 0.0
+        overall_score = self.current_session.aggregates.overall_score
+        self.current_session.overall_score = overall_score
         
-        total_weighted_score = 0.0
-        total_weight = 0.0
+        return overall_score
+
+    def record_answer(self, domain_index: int, is_correct: bool, domain_status: Optional[DomainStatus] = None):
+        """
+        Updates session totals and aggregates after an answer in the given domain, and the
+        domain's status when the answer completed it.
+        """
+        if not self.current_session:
+            return
         
-        for i, domain_assessment in enumerate(self.current_session.domain_assessments):
-            if domain_assessment.questions_attempted > 0:
-                domain_score = (domain_assessment.questions_correct / domain_assessment.questions_attempted) * 100
-                
-                domain_difficulty = self.current_session.domain_list[i].estimated_difficulty
-                weight = domain_difficulty / 100.0  # Normalize to 0-1 range
-                
-                total_weighted_score += domain_score * weight
-                total_weight += weight
-        
-        if total_weight > 0:
-            overall_score = total_weighted_score / total_weight
-        else:
-            overall_score = 0.0
+        self.update_session_totals(1, 1 if is_correct else 0)
+        self.current_session.aggregates.record_answer(domain_index, is_correct)
+        self.current_session.overall_score = self.current_session.aggregates.overall_score
         
-        self.current_session.overall_score = overall_score
+        if domain_status is not None:
+            self.set_domain_status(domain_index, domain_status)
+
+    def set_domain_status(self, domain_index: int, status: DomainStatus):
+        """
+        Sets a domain's status and keeps the session's status counts in step.
+        """
+        if not self.current_session:
+            return
         
-        return overall_score
+        self.current_session.domain_assessments[domain_index].status = status
+        self.current_session.aggregates.set_status(domain_index, status)
 
     def get_current_session(self) -> Optional[AssessmentSession]:
         """
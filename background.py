@@ -0,0 +1,38 @@
+from typing import Any, Callable, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+import atexit
+import contextvars
+import threading
+
+from config import CONFIG
+from deadline import clear_deadline
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_background_executor() -> ThreadPoolExecutor:
+    """
+    Returns the shared thread pool for work that must not block a request, such as
+    LLM enrichment calls. It is created on first use.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=CONFIG["background"]["workers"], thread_name_prefix="background"
+                )
+                atexit.register(_executor.shutdown, wait=False)
+    return _executor
+
+
+def submit_background(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """
+    Runs fn on the background pool inside a copy of the caller's context, so spans it
+    opens stay children of the request that scheduled it. The request's deadline is not
+    carried over: background work outlives the request by design.
+    """
+    context = contextvars.copy_context()
+    context.run(clear_deadline)
+    return get_background_executor().submit(context.run, fn, *args, **kwargs)
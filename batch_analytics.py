@@ -0,0 +1,208 @@
+from typing import Dict, Optional
+from dataclasses import dataclass
+import numpy as np
+
+from config import CONFIG
+
+# Tolerance around .5 ties below which the vectorized rounding defers to Python's round(),
+# whose correctly rounded decimal result the scalar engines use as bin keys.
+_TIE_TOLERANCE = 1e-9
+
+
+@dataclass
+class CalibrationBins:
+    session_index: np.ndarray  # index into BatchReplayResult.sessions
+    bin_confidence: np.ndarray
+    count: np.ndarray
+    accuracy: np.ndarray
+
+
+@dataclass
+class BatchReplayResult:
+    sessions: np.ndarray
+    responses: np.ndarray
+    accuracy: np.ndarray
+    mean_response_time: np.ndarray
+    mean_confidence: np.ndarray
+    mean_difficulty: np.ndarray
+    calibration_error: np.ndarray
+    overconfidence: np.ndarray
+    consistency: np.ndarray
+    quality_score: np.ndarray
+    correlation: np.ndarray
+    calibration_bins: CalibrationBins
+
+    def to_rows(self) -> Dict[str, list]:
+        return {
+            "session": self.sessions.tolist(),
+            "responses": self.responses.tolist(),
+            "accuracy": self.accuracy.tolist(),
+            "mean_response_time": self.mean_response_time.tolist(),
+            "mean_confidence": self.mean_confidence.tolist(),
+            "mean_difficulty": self.mean_difficulty.tolist(),
+            "calibration_error": self.calibration_error.tolist(),
+            "overconfidence": self.overconfidence.tolist(),
+            "consistency": self.consistency.tolist(),
+            "quality_score": self.quality_score.tolist(),
+            "correlation": self.correlation.tolist(),
+        }
+
+
+def confidence_bin_index(confidence: np.ndarray) -> np.ndarray:
+    """
+    Vectorized equivalent of round(confidence, 1) * 10 as an integer bin index.
+    Values within floating-point noise of a .5 tie are rounded with Python's round()
+    so the bins agree exactly with the scalar engines.
+    """
+    scaled = confidence * 10.0
+    index = np.rint(scaled)
+    near_tie = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < _TIE_TOLERANCE
+    if near_tie.any():
+        index[near_tie] = [round(float(c), 1) * 10 for c in confidence[near_tie]]
+        index[near_tie] = np.rint(index[near_tie])
+    return index.astype(np.int64)
+
+
+def _group_sum(groups: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    return np.bincount(groups, weights=values, minlength=size)
+
+
+def _group_variance(groups: np.ndarray, values: np.ndarray, mask: np.ndarray, size: int):
+    """
+    Per-group sample variance (ddof=1) of values where mask holds, two-pass for accuracy.
+    Returns (count, variance) with variance NaN where count < 2.
+    """
+    g = groups[mask]
+    x = values[mask]
+    count = np.bincount(g, minlength=size)
+    total = _group_sum(g, x, size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        deviations = x - mean[g]
+        variance = _group_sum(g, deviations * deviations, size) / (count - 1)
+    variance[count < 2] = np.nan
+    return count, variance
+
+
+def replay_responses(session: np.ndarray, correct: np.ndarray, response_time: np.ndarray,
+                     confidence: np.ndarray, difficulty: Optional[np.ndarray] = None,
+                     quality_history_size: Optional[int] = None,
+                     correlation_history_size: Optional[int] = None) -> BatchReplayResult:
+    """
+    Replays stored responses for many sessions at once and returns the state the scalar
+    engines in models.py would end up in: the ConfidenceCalibrationEngine curve,
+    ConfidenceQualityMetrics components and score, and the EnhancedConfidenceEngine
+    correlation, each over its trailing window. Records must be in answer order within
+    each session; sessions may be interleaved.
+    """
+    quality_window = quality_history_size or CONFIG["confidence"]["history_size"]
+    correlation_window = correlation_history_size or CONFIG["confidence"]["correlation_history_size"]
+
+    session = np.asarray(session)
+    correct = np.asarray(correct, dtype=bool)
+    response_time = np.asarray(response_time, dtype=np.float64)
+    confidence = np.asarray(confidence, dtype=np.float64)
+    difficulty = (np.asarray(difficulty, dtype=np.float64) if difficulty is not None
+                  else np.zeros_like(confidence))
+
+    sessions, groups = np.unique(session, return_inverse=True)
+    order = np.argsort(groups, kind="stable")
+    groups = groups[order]
+    correct = correct[order]
+    response_time = response_time[order]
+    confidence = confidence[order]
+    difficulty = difficulty[order]
+    size = len(sessions)
+
+    responses = np.bincount(groups, minlength=size)
+    starts = np.concatenate(([0], np.cumsum(responses)[:-1]))
+    position = np.arange(len(groups)) - starts[groups]
+    from_end = responses[groups] - 1 - position
+
+    correct_f = correct.astype(np.float64)
+    accuracy = _group_sum(groups, correct_f, size) / np.maximum(responses, 1)
+    mean_response_time = _group_sum(groups, response_time, size) / np.maximum(responses, 1)
+    mean_confidence = _group_sum(groups, confidence, size) / np.maximum(responses, 1)
+    mean_difficulty = _group_sum(groups, difficulty, size) / np.maximum(responses, 1)
+
+    # Calibration bins over the quality window (both engines use the same 100-point window).
+    in_window = from_end < quality_window
+    wg = groups[in_window]
+    wconf = confidence[in_window]
+    wcorrect = correct[in_window]
+    window_count = np.bincount(wg, minlength=size)
+
+    bin_index = confidence_bin_index(wconf)
+    low = bin_index.min() if len(bin_index) else 0
+    span = (bin_index.max() - low + 1) if len(bin_index) else 1
+    keys = wg * span + (bin_index - low)
+    unique_keys, key_groups = np.unique(keys, return_inverse=True)
+    bin_count = np.bincount(key_groups)
+    bin_correct = np.bincount(key_groups, weights=wcorrect.astype(np.float64))
+    bin_session = unique_keys // span
+    bin_value = (unique_keys % span + low) / 10.0
+    bin_accuracy = bin_correct / bin_count
+
+    populated = bin_count >= 3
+    weighted_error = np.abs(bin_value - bin_accuracy) * bin_count
+    error_total = np.bincount(bin_session[populated], weights=weighted_error[populated], minlength=size)
+    error_weight = np.bincount(bin_session[populated], weights=bin_count[populated], minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        calibration_error = np.where(error_weight > 0, error_total / error_weight, 0.0)
+
+    curve = populated & (window_count[bin_session] >= 10)
+    calibration_bins = CalibrationBins(
+        session_index=bin_session[curve],
+        bin_confidence=bin_value[curve],
+        count=bin_count[curve],
+        accuracy=bin_accuracy[curve],
+    )
+
+    high = wconf > 0.7
+    high_total = np.bincount(wg[high], minlength=size)
+    high_incorrect = np.bincount(wg[high & ~wcorrect], minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        overconfidence = np.where(high_total > 0, high_incorrect / high_total, 0.0)
+
+    correct_count, correct_variance = _group_variance(wg, wconf, wcorrect, size)
+    incorrect_count, incorrect_variance = _group_variance(wg, wconf, ~wcorrect, size)
+    has_both = (correct_count >= 3) & (incorrect_count >= 3)
+    with np.errstate(invalid="ignore"):
+        consistency = np.where(has_both, 1 / (1 + (correct_variance + incorrect_variance) / 2), 0.5)
+
+    quality_score = np.clip(
+        0.4 * (1 - calibration_error) + 0.4 * (1 - overconfidence) + 0.2 * consistency, 0.0, 1.0
+    )
+    quality_score = np.where(window_count >= 10, quality_score, 0.5)
+
+    # Pearson correlation over the correlation window, from grouped running sums.
+    in_corr = from_end < correlation_window
+    cg = groups[in_corr]
+    x = confidence[in_corr]
+    y = correct_f[in_corr]
+    n = np.bincount(cg, minlength=size).astype(np.float64)
+    sum_x = _group_sum(cg, x, size)
+    sum_y = _group_sum(cg, y, size)
+    sum_xy = _group_sum(cg, x * y, size)
+    sum_x2 = _group_sum(cg, x * x, size)
+    sum_y2 = _group_sum(cg, y * y, size)
+    var_x = n * sum_x2 - sum_x * sum_x
+    var_y = n * sum_y2 - sum_y * sum_y
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = (n * sum_xy - sum_x * sum_y) / np.sqrt(var_x * var_y)
+    correlation = np.where((var_x > 0) & (var_y > 0) & (n >= 10), np.clip(correlation, -1.0, 1.0), 0.0)
+
+    return BatchReplayResult(
+        sessions=sessions,
+        responses=responses,
+        accuracy=accuracy,
+        mean_response_time=mean_response_time,
+        mean_confidence=mean_confidence,
+        mean_difficulty=mean_difficulty,
+        calibration_error=calibration_error,
+        overconfidence=overconfidence,
+        consistency=consistency,
+        quality_score=quality_score,
+        correlation=correlation,
+        calibration_bins=calibration_bins,
+    )
@@ -0,0 +1,203 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+import argparse
+import json
+import os
+import threading
+
+from config import CONFIG
+
+GLOBAL_KEY = "*"
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def prior_keys(topic: str, domain: str) -> List[str]:
+    """
+    Returns table keys from most to least specific: topic and domain, domain, global.
+    """
+    keys = []
+    if topic and domain:
+        keys.append(f"topic:{_normalize(topic)}|domain:{_normalize(domain)}")
+    if domain:
+        keys.append(f"domain:{_normalize(domain)}")
+    keys.append(GLOBAL_KEY)
+    return keys
+
+
+@dataclass
+class CalibrationPrior:
+    key: str
+    bins: Dict[float, Tuple[float, float]]  # bin -> (accuracy, strength)
+    quality_score: Optional[float]
+
+
+class CalibrationPriorTable:
+    """
+    Precomputed population calibration priors, loaded once at startup. Lookups fall back
+    from topic+domain to domain to the global entry and cost a dict access per level.
+    """
+    def __init__(self, entries: Optional[Dict[str, Dict[str, Any]]] = None,
+                 calibration_strength: float = 5.0):
+        self.entries = entries or {}
+        self.calibration_strength = calibration_strength
+        self._cache: Dict[str, CalibrationPrior] = {}
+
+    @classmethod
+    def load(cls, path: str, calibration_strength: float = 5.0) -> "CalibrationPriorTable":
+        if not path or not os.path.exists(path):
+            return cls(calibration_strength=calibration_strength)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(data.get("entries", {}), calibration_strength)
+        except (OSError, ValueError) as e:
+            print(f"Error loading calibration priors from {path}: {e}")
+            return cls(calibration_strength=calibration_strength)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, topic: str, domain: str) -> Optional[CalibrationPrior]:
+        for key in prior_keys(topic, domain):
+            if key in self.entries:
+                return self._prior_for(key)
+        return None
+
+    def _prior_for(self, key: str) -> CalibrationPrior:
+        prior = self._cache.get(key)
+        if prior is None:
+            entry = self.entries[key]
+            bins = {}
+            for bin_key, (count, correct) in entry.get("bins", {}).items():
+                bins[round(float(bin_key), 1)] = (correct / count, min(self.calibration_strength, count))
+            prior = CalibrationPrior(key, bins, entry.get("quality_score"))
+            self._cache[key] = prior
+        return prior
+
+
+def build_prior_table(records: Iterable[Dict[str, Any]], min_bin_samples: int = 20) -> Dict[str, Any]:
+    """
+    Aggregates logged responses into the prior table. Calibration bins pool every
+    session's trailing calibration window per key, and the quality prior is the mean
+    per-session ConfidenceQualityMetrics score of sessions with at least 10 answers.
+    """
+    import numpy as np
+    from batch_analytics import confidence_bin_index, replay_responses
+
+    sessions: List[str] = []
+    correct: List[bool] = []
+    response_time: List[float] = []
+    confidence: List[float] = []
+    session_keys: Dict[str, List[str]] = {}
+    for record in records:
+        session_id = f"{record.get('session', '')}|{record.get('domain', '')}"
+        sessions.append(session_id)
+        correct.append(bool(record["is_correct"]))
+        response_time.append(float(record.get("response_time", 0.0)))
+        confidence.append(float(record["confidence"]))
+        if session_id not in session_keys:
+            session_keys[session_id] = prior_keys(record.get("topic", ""), record.get("domain", ""))
+
+    if not sessions:
+        return {"version": 1, "entries": {}}
+
+    session_array = np.array(sessions)
+    correct_array = np.array(correct)
+    confidence_array = np.array(confidence)
+    result = replay_responses(session_array, correct_array, np.array(response_time), confidence_array)
+
+    # Same grouping and trailing window as replay_responses.
+    groups = np.unique(session_array, return_inverse=True)[1]
+    order = np.argsort(groups, kind="stable")
+    groups = groups[order]
+    starts = np.concatenate(([0], np.cumsum(result.responses)[:-1]))
+    from_end = result.responses[groups] - 1 - (np.arange(len(groups)) - starts[groups])
+    in_window = from_end < CONFIG["confidence"]["history_size"]
+    window_groups = groups[in_window]
+    window_bins = confidence_bin_index(confidence_array[order][in_window])
+    window_correct = correct_array[order][in_window].astype(np.float64)
+    bin_offset = int(window_bins.min())
+    bin_span = int(window_bins.max()) - bin_offset + 1
+
+    key_names = sorted({key for keys in session_keys.values() for key in keys})
+    key_ids = {key: i for i, key in enumerate(key_names)}
+    has_quality = result.responses >= 10
+
+    bin_counts = np.zeros((len(key_names), bin_span))
+    bin_correct = np.zeros((len(key_names), bin_span))
+    session_counts = np.zeros(len(key_names))
+    quality_sums = np.zeros(len(key_names))
+    quality_sessions = np.zeros(len(key_names))
+
+    for level in range(3):
+        session_key = np.array([
+            key_ids[keys[level]] if level < len(keys) else -1
+            for keys in (session_keys[str(s)] for s in result.sessions)
+        ])
+        valid_sessions = session_key >= 0
+        session_counts += np.bincount(session_key[valid_sessions], minlength=len(key_names))
+        quality_mask = valid_sessions & has_quality
+        quality_sums += np.bincount(session_key[quality_mask], weights=result.quality_score[quality_mask],
+                                    minlength=len(key_names))
+        quality_sessions += np.bincount(session_key[quality_mask], minlength=len(key_names))
+
+        row_key = session_key[window_groups]
+        valid_rows = row_key >= 0
+        cells = row_key[valid_rows] * bin_span + (window_bins[valid_rows] - bin_offset)
+        size = len(key_names) * bin_span
+        bin_counts += np.bincount(cells, minlength=size).reshape(bin_counts.shape)
+        bin_correct += np.bincount(cells, weights=window_correct[valid_rows], minlength=size).reshape(bin_counts.shape)
+
+    entries = {}
+    for key, i in key_ids.items():
+        bins = {
+            str((b + bin_offset) / 10): [int(bin_counts[i, b]), int(bin_correct[i, b])]
+            for b in range(bin_span) if bin_counts[i, b] >= min_bin_samples
+        }
+        entries[key] = {
+            "sessions": int(session_counts[i]),
+            "bins": bins,
+            "quality_score": round(float(quality_sums[i] / quality_sessions[i]), 6) if quality_sessions[i] else None,
+            "quality_sessions": int(quality_sessions[i]),
+        }
+    return {"version": 1, "entries": entries}
+
+
+_table: Optional[CalibrationPriorTable] = None
+_table_lock = threading.Lock()
+
+
+def get_prior_table() -> CalibrationPriorTable:
+    """
+    Returns the process-wide prior table, loading it from CALIBRATION_PRIORS_PATH on first use.
+    """
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                priors = CONFIG["confidence"]["priors"]
+                _table = CalibrationPriorTable.load(priors["path"], priors["calibration_strength"])
+    return _table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build population calibration priors from a response log.")
+    parser.add_argument("response_log", help="JSONL response log written with RESPONSE_LOG_PATH")
+    parser.add_argument("-o", "--output", default=CONFIG["confidence"]["priors"]["path"])
+    parser.add_argument("--min-bin-samples", type=int, default=CONFIG["confidence"]["priors"]["min_bin_samples"])
+    args = parser.parse_args()
+
+    with open(args.response_log, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    table = build_prior_table(records, args.min_bin_samples)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(table, f, separators=(",", ":"))
+    print(f"Wrote {len(table['entries'])} prior entries from {len(records)} responses to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,36 @@ import os
 from typing import Dict, Any
 
 OPENAI_API_KEY = "sk-proj-CP7WLP-5Kd5606O61-Y9SS_e9pOHtl4nq9oqgtrbVEu6oeCaXFWSSIx50QLgVI1oouJYl3dCAT3BlbkFJQ01WxieRk-r2Hdal9d64MDDUsQuYrkGP_ViuNqjvrDs4ldAshdLddXm4IS1l2pnVtC5IZ4kFgA"
-OPENAI_MODEL = "gpt-4o"
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+OPENAI_FAST_MODEL = os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini")
 OPENAI_TEMPERATURE = 0.7
 OPENAI_MAX_TOKENS = 2000
+SUMMARY_NARRATIVE_MAX_TOKENS = 800
+OPENAI_MAX_TOKENS_BY_CALL_TYPE = {"domains": 900, "question": 600, "summary": SUMMARY_NARRATIVE_MAX_TOKENS}
+OPENAI_PRICING = {  # USD per million (prompt, completion) tokens
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+OPENAI_CACHED_PROMPT_PRICE_FACTOR = 0.5  # cached prompt tokens cost this share of the prompt price
+OPENAI_STREAM_QUESTIONS = os.getenv("OPENAI_STREAM_QUESTIONS", "true").lower() == "true"
+QUESTION_EXPLANATION_WAIT_SECONDS = 30.0  # grading waits this long for a streamed explanation
+STREAM_TAIL_TIMEOUT_SECONDS = 45.0  # the background read of a streamed question gives up after this
+QUESTION_EXPLANATION_MODE = os.getenv("QUESTION_EXPLANATION_MODE", "inline")  # "inline" or "deferred"
+EXPLANATION_BATCH_SIZE = 3  # deferred explanations for wrong answers are written this many at a time
+EXPLANATION_MAX_TOKENS_PER_QUESTION = 250
+EXPLAIN_INCORRECT_ANSWERS = True  # False: explanations are only written when the learner asks
+ANSWERED_QUESTIONS_KEPT = 50  # answered questions whose explanation can still be requested
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "0"))  # 0 disables the budget
+QUESTION_BANK_MAX_PER_DOMAIN = 200
+
+MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "true").lower() == "true"
+ROUTING_FAST_DIFFICULTY_BELOW = 40  # questions easier than this go to the fast model
+ROUTING_CALL_TYPES = {"domains": "fast", "question": "primary", "summary": "primary"}
+ROUTING_LATENCY_BUDGETS = {"domains": 8.0, "question": 10.0, "summary": 20.0, "default": 15.0}  # seconds
+ROUTING_MAX_ERROR_RATE = 0.5
+ROUTING_EWMA_ALPHA = 0.2
+ROUTING_MIN_SAMPLES = 5
+ROUTING_PROBE_INTERVAL = 20  # every Nth failed-over call still tries the preferred model
 
 DEFAULT_NUM_DOMAINS = 5
 MIN_DOMAINS = 2
@@ -15,18 +42,40 @@ MIN_DIFFICULTY = 1
 MAX_DIFFICULTY = 100
 DIFFICULTY_ADJUSTMENT_RATE = 0.1
 MAX_DIFFICULTY_CHANGE = 15
+DIFFICULTY_BASE_STEP = 5
+DIFFICULTY_ENGINE = os.getenv("DIFFICULTY_ENGINE", "heuristic")  # "heuristic" or "irt"
+
+IRT_DISCRIMINATION = 1.0
+IRT_DIFFICULTY_SCALE = 12.5  # difficulty points per logit
+IRT_PRIOR_SD = 2.0  # logits around the domain's estimated difficulty
+IRT_GRID_POINTS = 81
 
 DOMAIN_COMPLETION_THRESHOLD = 100.0
 MASTERY_THRESHOLD = 85.0
 STRUGGLING_THRESHOLD = 40.0
 MIN_QUESTIONS_FOR_ASSESSMENT = 5
 MAX_QUESTIONS_PER_DOMAIN = 20
+MAX_PROMPT_KNOWLEDGE_GAPS = 5
+
+EARLY_TERMINATION_ENABLED = os.getenv("EARLY_TERMINATION", "false").lower() == "true"
+EARLY_TERMINATION_MAX_STANDARD_ERROR = 0.5  # logits, IRT engine
+EARLY_TERMINATION_MAX_DIFFICULTY_RANGE = 8.0  # points over recent answers, heuristic engine
 
 CONFIDENCE_HISTORY_SIZE = 100
 CONFIDENCE_BINS = 10
 MIN_SAMPLES_PER_BIN = 3
 CALIBRATION_SMOOTHING_FACTOR = 0.1
 
+CALIBRATION_PRIORS_PATH = os.getenv("CALIBRATION_PRIORS_PATH", "calibration_priors.json")
+CALIBRATION_PRIOR_STRENGTH = 5.0  # pseudo-observations per calibration bin
+CALIBRATION_PRIOR_MIN_BIN_SAMPLES = 20
+QUALITY_PRIOR_STRENGTH = 10.0  # answers
+RESPONSE_LOG_PATH = os.getenv("RESPONSE_LOG_PATH", "")  # empty disables the response log
+
+ITEM_STATS_PATH = os.getenv("ITEM_STATS_PATH", "")  # empty keeps item statistics in memory only
+ITEM_STATS_BATCH_SIZE = 32
+ITEM_STATS_MIN_SAMPLES = 30  # answers before empirical difficulty and time replace the generated ones
+
 CORRELATION_HISTORY_SIZE = 50
 BASE_CONFIDENCE_WEIGHT = 1.0
 CALIBRATION_QUALITY_WEIGHT = 0.3
@@ -74,15 +123,67 @@ MAX_RETRIES = 3
 RETRY_DELAY = 1.0  # seconds
 FALLBACK_TO_MOCK = True
 
+SUMMARY_ASYNC_ENRICHMENT = os.getenv("SUMMARY_ASYNC_ENRICHMENT", "true").lower() == "true"
+SUMMARY_CACHE_SESSIONS = 256
+BACKGROUND_WORKERS = 4
+
 DEBUG_MODE = os.getenv("DEBUG", "false").lower() == "true"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+QUESTION_REFILL_ENABLED = os.getenv("QUESTION_REFILL_ENABLED", "false").lower() == "true"
+REFILL_BAND_WIDTH = 20  # difficulty points per demand band
+REFILL_HALF_LIFE_SECONDS = 1800.0  # demand counters halve after this long without traffic
+REFILL_MIN_SCORE = 2.0  # demand a key needs before its pool is refilled
+REFILL_DROP_SCORE = 0.25  # keys below this are forgotten and their pools dropped
+REFILL_TARGET_DEPTH = 5
+REFILL_MAX_KEYS = 20
+REFILL_INTERVAL_SECONDS = 5.0
+REFILL_MAX_CALLS_PER_MINUTE = 30
+REFILL_IDLE_MAX_INFLIGHT = 2  # refill only while at most this many LLM calls are running
+DEADLINES_ENABLED = os.getenv("DEADLINES_ENABLED", "true").lower() == "true"
+ENDPOINT_LATENCY_SLOS = {  # seconds per request, end to end
+    "/start-assessment": 30.0,
+    "/start-domain": 15.0,
+    "/submit-answer": 15.0,
+    "/generate-summary": 10.0,
+    "/explanation": 15.0,
+}
+MIN_LLM_TIMEOUT_SECONDS = 2.0  # an LLM call that does go ahead is never given less than this
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_PREOPEN_CONNECTIONS = os.getenv("WARMUP_PREOPEN_CONNECTIONS", "false").lower() == "true"
+WARMUP_FIRST_QUESTION = os.getenv("WARMUP_FIRST_QUESTION", "true").lower() == "true"
+WARMUP_LATER_DOMAINS = os.getenv("WARMUP_LATER_DOMAINS", "false").lower() == "true"
+WARMUP_QUESTION_WAIT_SECONDS = 30.0  # how long /start-domain waits for a warmed question still in flight
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")  # "" exports nothing; set a path to write JSONL spans
+TRACE_EXPORT_BATCH_SIZE = 64
+
 CONFIG: Dict[str, Any] = {
     "openai": {
         "api_key": OPENAI_API_KEY,
         "model": OPENAI_MODEL,
         "temperature": OPENAI_TEMPERATURE,
         "max_tokens": OPENAI_MAX_TOKENS,
+        "max_tokens_by_call_type": OPENAI_MAX_TOKENS_BY_CALL_TYPE,
+        "pricing": OPENAI_PRICING,
+        "session_token_budget": SESSION_TOKEN_BUDGET,
+        "stream_questions": OPENAI_STREAM_QUESTIONS,
+        "explanation_wait_seconds": QUESTION_EXPLANATION_WAIT_SECONDS,
+        "stream_tail_timeout": STREAM_TAIL_TIMEOUT_SECONDS,
+        "cached_prompt_price_factor": OPENAI_CACHED_PROMPT_PRICE_FACTOR,
+    },
+    "routing": {
+        "enabled": MODEL_ROUTING_ENABLED,
+        "fast_model": OPENAI_FAST_MODEL,
+        "fast_difficulty_below": ROUTING_FAST_DIFFICULTY_BELOW,
+        "call_types": ROUTING_CALL_TYPES,
+        "latency_budgets": ROUTING_LATENCY_BUDGETS,
+        "max_error_rate": ROUTING_MAX_ERROR_RATE,
+        "ewma_alpha": ROUTING_EWMA_ALPHA,
+        "min_samples": ROUTING_MIN_SAMPLES,
+        "probe_interval": ROUTING_PROBE_INTERVAL,
     },
     "assessment": {
         "default_num_domains": DEFAULT_NUM_DOMAINS,
@@ -93,6 +194,12 @@ CONFIG: Dict[str, Any] = {
         "struggling_threshold": STRUGGLING_THRESHOLD,
         "min_questions": MIN_QUESTIONS_FOR_ASSESSMENT,
         "max_questions": MAX_QUESTIONS_PER_DOMAIN,
+        "max_prompt_knowledge_gaps": MAX_PROMPT_KNOWLEDGE_GAPS,
+        "early_termination": {
+            "enabled": EARLY_TERMINATION_ENABLED,
+            "max_standard_error": EARLY_TERMINATION_MAX_STANDARD_ERROR,
+            "max_difficulty_range": EARLY_TERMINATION_MAX_DIFFICULTY_RANGE,
+        },
     },
     "difficulty": {
         "default": DEFAULT_DIFFICULTY,
@@ -100,6 +207,14 @@ CONFIG: Dict[str, Any] = {
         "max": MAX_DIFFICULTY,
         "adjustment_rate": DIFFICULTY_ADJUSTMENT_RATE,
         "max_change": MAX_DIFFICULTY_CHANGE,
+        "base_step": DIFFICULTY_BASE_STEP,
+        "engine": DIFFICULTY_ENGINE,
+        "irt": {
+            "discrimination": IRT_DISCRIMINATION,
+            "difficulty_scale": IRT_DIFFICULTY_SCALE,
+            "prior_sd": IRT_PRIOR_SD,
+            "grid_points": IRT_GRID_POINTS,
+        },
     },
     "confidence": {
         "history_size": CONFIDENCE_HISTORY_SIZE,
@@ -107,6 +222,13 @@ CONFIG: Dict[str, Any] = {
         "min_samples_per_bin": MIN_SAMPLES_PER_BIN,
         "smoothing_factor": CALIBRATION_SMOOTHING_FACTOR,
         "correlation_history_size": CORRELATION_HISTORY_SIZE,
+        "priors": {
+            "path": CALIBRATION_PRIORS_PATH,
+            "calibration_strength": CALIBRATION_PRIOR_STRENGTH,
+            "min_bin_samples": CALIBRATION_PRIOR_MIN_BIN_SAMPLES,
+            "quality_strength": QUALITY_PRIOR_STRENGTH,
+        },
+        "response_log_path": RESPONSE_LOG_PATH,
         "weights": {
             "base": BASE_CONFIDENCE_WEIGHT,
             "calibration_quality": CALIBRATION_QUALITY_WEIGHT,
@@ -115,6 +237,14 @@ CONFIG: Dict[str, Any] = {
             "difficulty_adaptability": DIFFICULTY_ADAPTABILITY_WEIGHT,
         },
     },
+    "question_bank": {
+        "max_per_domain": QUESTION_BANK_MAX_PER_DOMAIN,
+    },
+    "item_stats": {
+        "path": ITEM_STATS_PATH,
+        "batch_size": ITEM_STATS_BATCH_SIZE,
+        "min_samples": ITEM_STATS_MIN_SAMPLES,
+    },
     "timing": {
         "expected_base": EXPECTED_TIME_BASE,
         "difficulty_multiplier": TIME_DIFFICULTY_MULTIPLIER,
@@ -132,6 +262,33 @@ CONFIG: Dict[str, Any] = {
         "confidence_bonus": CONFIDENCE_BONUS_MULTIPLIER,
         "time_bonus_threshold": TIME_BONUS_THRESHOLD,
         "honesty_reward": HONESTY_REWARD,
+        "domain_mastered_score": DOMAIN_MASTERED_SCORE,
+        "domain_completed_score": DOMAIN_COMPLETED_SCORE,
+        "domain_struggling_score": DOMAIN_STRUGGLING_SCORE,
+    },
+    "summary": {
+        "async_enrichment": SUMMARY_ASYNC_ENRICHMENT,
+        "cache_sessions": SUMMARY_CACHE_SESSIONS,
+    },
+    "background": {
+        "workers": BACKGROUND_WORKERS,
+    },
+    "refill": {
+        "enabled": QUESTION_REFILL_ENABLED,
+        "band_width": REFILL_BAND_WIDTH,
+        "half_life_seconds": REFILL_HALF_LIFE_SECONDS,
+        "min_score": REFILL_MIN_SCORE,
+        "drop_score": REFILL_DROP_SCORE,
+        "target_depth": REFILL_TARGET_DEPTH,
+        "max_keys": REFILL_MAX_KEYS,
+        "interval_seconds": REFILL_INTERVAL_SECONDS,
+        "max_calls_per_minute": REFILL_MAX_CALLS_PER_MINUTE,
+        "idle_max_inflight": REFILL_IDLE_MAX_INFLIGHT,
+    },
+    "deadlines": {
+        "enabled": DEADLINES_ENABLED,
+        "endpoints": ENDPOINT_LATENCY_SLOS,
+        "min_llm_timeout": MIN_LLM_TIMEOUT_SECONDS,
     },
     "development": {
         "debug": DEBUG_MODE,
@@ -140,4 +297,24 @@ CONFIG: Dict[str, Any] = {
         "retry_delay": RETRY_DELAY,
         "fallback_to_mock": FALLBACK_TO_MOCK,
     },
+    "explanations": {
+        "mode": QUESTION_EXPLANATION_MODE,
+        "batch_size": EXPLANATION_BATCH_SIZE,
+        "max_tokens_per_question": EXPLANATION_MAX_TOKENS_PER_QUESTION,
+        "explain_incorrect": EXPLAIN_INCORRECT_ANSWERS,
+        "answered_questions_kept": ANSWERED_QUESTIONS_KEPT,
+    },
+    "startup": {
+        "warmup_enabled": WARMUP_ENABLED,
+        "preopen_connections": WARMUP_PREOPEN_CONNECTIONS,
+        "first_question": WARMUP_FIRST_QUESTION,
+        "later_domains": WARMUP_LATER_DOMAINS,
+        "question_wait_seconds": WARMUP_QUESTION_WAIT_SECONDS,
+    },
+    "tracing": {
+        "enabled": TRACING_ENABLED,
+        "sample_rate": TRACE_SAMPLE_RATE,
+        "export_path": TRACE_EXPORT_PATH,
+        "export_batch_size": TRACE_EXPORT_BATCH_SIZE,
+    },
 }
@@ -0,0 +1,47 @@
+from typing import Iterator, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def use_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Gives the work done inside the block a latency budget of seconds from now, or no
+    budget when seconds is None. Stages read it through remaining() and time_left().
+    """
+    token = _deadline.set(time.monotonic() + seconds if seconds else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def clear_deadline():
+    """Drops the budget in the current context, e.g. for background work."""
+    _deadline.set(None)
+
+
+def remaining() -> Optional[float]:
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def time_left(default: float, minimum: float = 0.0, reserve: float = 0.0) -> float:
+    """
+    Timeout for a blocking stage: default, capped by what is left of the budget after
+    reserve seconds are set aside for the stages that follow, but never below minimum.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    return max(minimum, min(default, left - reserve))
+
+
+def can_cover(seconds: float) -> bool:
+    left = remaining()
+    return left is None or left >= seconds
@@ -0,0 +1,68 @@
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future
+import threading
+
+from ai_service import AIService
+from background import submit_background
+from item_stats import item_key
+from models import Question
+
+
+class ExplanationBatcher:
+    """
+    Writes explanations after grading for questions generated without one. Requests
+    queue until batch_size are waiting, the learner asks to see one (urgent) or flush()
+    is called; each batch is a single LLM call on the background pool. The batcher keeps
+    one future per item while it is queued or in flight, so a question is explained at
+    most once even when banked or pooled copies are answered again; the explanation is
+    stored on the question and the future resolves with its text.
+    """
+    def __init__(self, ai_service: AIService, batch_size: int = 3):
+        self.ai_service = ai_service
+        self.batch_size = batch_size
+        self._queue: List[Tuple[str, Question, Optional[int]]] = []
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def request(self, question: Question, answer_index: Optional[int] = None,
+                urgent: bool = False) -> Optional[Future]:
+        if question.explanation:
+            return None
+        key = item_key(question)
+        with self._lock:
+            future = self._futures.get(key)
+            queued = any(entry[0] == key for entry in self._queue)
+            if future is None:
+                future = self._futures[key] = Future()
+                self._queue.append((key, question, answer_index))
+                queued = True
+            batch = None
+            if queued and (urgent or len(self._queue) >= self.batch_size):
+                batch, self._queue = self._queue, []
+        if batch:
+            submit_background(self._explain, batch)
+        return future
+
+    def flush(self):
+        with self._lock:
+            batch, self._queue = self._queue, []
+        if batch:
+            submit_background(self._explain, batch)
+
+    def _explain(self, batch: List[Tuple[str, Question, Optional[int]]]):
+        try:
+            explanations = self.ai_service.generate_explanations([(question, answer) for _, question, answer in batch])
+        except Exception as e:
+            print(f"Error generating explanations: {e}")
+            explanations = []
+        for i, (key, question, _) in enumerate(batch):
+            with self._lock:
+                future = self._futures.pop(key)
+            if i < len(explanations) and explanations[i]:
+                question.explanation = explanations[i]
+                future.set_result(explanations[i])
+            else:
+                future.set_exception(ValueError("No explanation was generated"))
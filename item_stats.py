@@ -0,0 +1,187 @@
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+import atexit
+import hashlib
+import json
+import math
+import os
+import threading
+
+from config import CONFIG
+from models import Question
+
+
+def item_key(question: Question) -> str:
+    """
+    Stable identity for a question: a hash of its normalized text and options, so the
+    same banked or cached item maps to the same statistics across sessions.
+    """
+    text = " ".join(question.question.lower().split())
+    options = "\x1f".join(" ".join(option.lower().split()) for option in question.options)
+    return hashlib.sha1(f"{text}\x1e{options}".encode("utf-8")).hexdigest()[:20]
+
+
+@dataclass
+class ItemStatistics:
+    attempts: int = 0
+    correct: int = 0
+    log_time_sum: float = 0.0
+    ability_sum: float = 0.0  # learner difficulty estimate when the item was answered
+    confidence_sum_correct: float = 0.0
+    confidence_sum_incorrect: float = 0.0
+
+    def add(self, is_correct: bool, response_time: float, ability: float, confidence: float):
+        self.attempts += 1
+        self.log_time_sum += math.log(max(response_time, 1.0))
+        self.ability_sum += ability
+        if is_correct:
+            self.correct += 1
+            self.confidence_sum_correct += confidence
+        else:
+            self.confidence_sum_incorrect += confidence
+
+    def merge(self, other: "ItemStatistics"):
+        self.attempts += other.attempts
+        self.correct += other.correct
+        self.log_time_sum += other.log_time_sum
+        self.ability_sum += other.ability_sum
+        self.confidence_sum_correct += other.confidence_sum_correct
+        self.confidence_sum_incorrect += other.confidence_sum_incorrect
+
+    @property
+    def p_correct(self) -> float:
+        return self.correct / self.attempts if self.attempts else 0.0
+
+    @property
+    def expected_response_time(self) -> float:
+        """Geometric mean response time, robust to the odd answer left open for minutes."""
+        return math.exp(self.log_time_sum / self.attempts) if self.attempts else 0.0
+
+    @property
+    def mean_confidence_correct(self) -> Optional[float]:
+        return self.confidence_sum_correct / self.correct if self.correct else None
+
+    @property
+    def mean_confidence_incorrect(self) -> Optional[float]:
+        incorrect = self.attempts - self.correct
+        return self.confidence_sum_incorrect / incorrect if incorrect else None
+
+    def empirical_difficulty(self, difficulty_scale: float) -> float:
+        """
+        Difficulty on the 1-100 scale implied by the observed p-correct, Rasch style:
+        the mean learner level minus the logit of the (smoothed) success rate.
+        """
+        p = (self.correct + 0.5) / (self.attempts + 1.0)
+        mean_ability = self.ability_sum / self.attempts
+        return max(1.0, min(100.0, mean_ability - difficulty_scale * math.log(p / (1 - p))))
+
+    def to_list(self) -> List[float]:
+        return [self.attempts, self.correct, round(self.log_time_sum, 6), round(self.ability_sum, 6),
+                round(self.confidence_sum_correct, 6), round(self.confidence_sum_incorrect, 6)]
+
+    @classmethod
+    def from_list(cls, values: List[float]) -> "ItemStatistics":
+        attempts, correct, log_time_sum, ability_sum, conf_correct, conf_incorrect = values
+        return cls(int(attempts), int(correct), log_time_sum, ability_sum, conf_correct, conf_incorrect)
+
+
+class ItemStatsStore:
+    """
+    Empirical statistics for every question answered, keyed by item_key. Answers are
+    buffered and merged into the shared counters in batches, so submit_answer only pays
+    for a list append; lookups are plain dict reads. When a path is configured the
+    counters are loaded at startup and written back after each batch and at exit.
+    """
+    def __init__(self, path: str = "", batch_size: int = 32, min_samples: int = 30,
+                 difficulty_scale: float = 12.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.min_samples = min_samples
+        self.difficulty_scale = difficulty_scale
+        self._items: Dict[str, ItemStatistics] = {}
+        self._pending: List[Tuple[str, bool, float, float, float]] = []
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            items = {key: ItemStatistics.from_list(values) for key, values in data.get("items", {}).items()}
+        except (OSError, ValueError) as e:
+            print(f"Error loading item statistics from {self.path}: {e}")
+            return
+        with self._lock:
+            for key, stats in items.items():
+                self._items.setdefault(key, ItemStatistics()).merge(stats)
+
+    def record(self, key: str, is_correct: bool, response_time: float, ability: float, confidence: float):
+        with self._lock:
+            self._pending.append((key, is_correct, response_time, ability, confidence))
+            if len(self._pending) < self.batch_size:
+                return
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            for key, is_correct, response_time, ability, confidence in pending:
+                stats = self._items.get(key)
+                if stats is None:
+                    stats = self._items[key] = ItemStatistics()
+                stats.add(is_correct, response_time, ability, confidence)
+        if pending and self.path:
+            self.save()
+
+    def save(self):
+        temp_path = f"{self.path}.tmp"
+        with self._save_lock:
+            with self._lock:
+                snapshot = {key: stats.to_list() for key, stats in self._items.items()}
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": 1, "items": snapshot}, f, separators=(",", ":"))
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"Error saving item statistics: {e}")
+
+    def get(self, key: str) -> Optional[ItemStatistics]:
+        """
+        Returns the item's statistics once it has at least min_samples answers, else None.
+        """
+        stats = self._items.get(key)
+        if stats is None or stats.attempts < self.min_samples:
+            return None
+        return stats
+
+    def summary(self) -> Dict[str, Any]:
+        calibrated = sum(1 for stats in self._items.values() if stats.attempts >= self.min_samples)
+        return {"items": len(self._items), "calibrated_items": calibrated, "pending": len(self._pending)}
+
+
+_store: Optional[ItemStatsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_item_stats_store() -> ItemStatsStore:
+    """
+    Returns the process-wide item statistics store, loading ITEM_STATS_PATH on first use.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = CONFIG["item_stats"]
+                store = ItemStatsStore(
+                    settings["path"], settings["batch_size"], settings["min_samples"],
+                    CONFIG["difficulty"]["irt"]["difficulty_scale"]
+                )
+                store.load()
+                atexit.register(store.flush)
+                _store = store
+    return _store
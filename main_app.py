@@ -1,8 +1,11 @@
 from typing import Optional, Dict, Any, List, Tuple
 import json
 from datetime import datetime
-from fastapi import FastAPI, HTTPException
+import time
+from warmup import warmup_manager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 
 from models import AssessmentSession, DomainAssessment, DomainStatus
@@ -10,6 +13,17 @@ from assessment_flow import AssessmentFlowManager
 from question_flow import QuestionFlowManager
 from ai_service import AIService
 from config import CONFIG
+from calibration_priors import get_prior_table
+from item_stats import get_item_stats_store
+from background import submit_background
+from prompt_templates import get_prompt_templates
+from question_warmup import QuestionWarmup
+from question_refill import QuestionRefiller, demand_tracker, question_pool, record_demand
+from token_accounting import use_ledger
+from deadline import time_left, use_deadline
+from summary_engine import SummaryEnrichment, build_local_summary, merge_narrative, session_fingerprint, summary_cache
+from metrics import REGISTRY, HTTP_REQUEST_DURATION, ACTIVE_SESSIONS
+from tracing import tracer, parse_traceparent, format_traceparent
 
 class StartAssessmentRequest(BaseModel):
     topic: str
@@ -24,12 +38,15 @@ class SubmitAnswerRequest(BaseModel):
 
 class KnowledgeAssessmentApp:
     def __init__(self):
-        self.assessment_flow = AssessmentFlowManager()
-        self.question_flow = QuestionFlowManager()
         self.ai_service = AIService()
+        self.assessment_flow = AssessmentFlowManager(self.ai_service)
+        self.question_flow = QuestionFlowManager(self.ai_service)
+        self.question_warmup = QuestionWarmup(self.ai_service)
+        self.question_refiller = QuestionRefiller(self.ai_service, demand_tracker, question_pool, CONFIG["refill"])
         self.current_session: Optional[AssessmentSession] = None
         self.current_domain_index: int = 0
         self.current_question = None
+        self.summary_enrichment: Optional[SummaryEnrichment] = None
 
     def start_assessment(self, topic: str, num_domains: int) -> Dict[str, Any]:
         """
@@ -43,6 +60,15 @@ class KnowledgeAssessmentApp:
         
         self.current_session = self.assessment_flow.start_assessment_session(topic.strip(), num_domains)
         self.current_domain_index = 0
+        ACTIVE_SESSIONS.set(1 if self.current_session else 0)
+        
+        if self.current_session:
+            for domain_assessment in self.current_session.domain_assessments:
+                record_demand(self.current_session.main_topic, domain_assessment.domain_name, domain_assessment.current_difficulty)
+        
+        if self.current_session and CONFIG["startup"]["first_question"]:
+            with use_ledger(self.current_session.token_usage):
+                self.question_warmup.warm_session(self.current_session, CONFIG["startup"]["later_domains"])
         
         domains_info = []
         if self.current_session:
@@ -83,9 +109,21 @@ class KnowledgeAssessmentApp:
         domain_assessment = self.current_session.domain_assessments[domain_index]
         print(f"DEBUG: domain_assessment retrieved: {domain_assessment.domain_name}")
         
-        self.question_flow.start_domain_assessment(domain_assessment)
+        self.question_flow.start_domain_assessment(domain_assessment, self.current_session.main_topic)
         print(f"DEBUG: question_flow.start_domain_assessment completed")
-        question = self.question_flow.generate_question()
+        record_demand(self.current_session.main_topic, domain_assessment.domain_name, domain_assessment.current_difficulty)
+        question = self.question_warmup.take(
+            self.current_session.session_id, domain_index, domain_assessment.current_difficulty,
+            time_left(
+                CONFIG["startup"]["question_wait_seconds"],
+                reserve=self.ai_service.expected_latency("question", domain_assessment.current_difficulty)
+            )
+        )
+        if question:
+            self.question_flow.present_question(question)
+        else:
+            with use_ledger(self.current_session.token_usage):
+                question = self.question_flow.generate_question()
         print(f"DEBUG: question generated: {question is not None}")
         self.current_question = question
         
@@ -115,11 +153,16 @@ class KnowledgeAssessmentApp:
         if not self.current_session or not self.current_question:
             raise HTTPException(status_code=400, detail="No active question.")
         
-        result = self.question_flow.submit_answer(answer_index, confidence)
+        if not 0 <= answer_index < len(self.current_question.options):
+            raise HTTPException(status_code=400, detail="Answer index is not one of the question's options.")
         
-        self.current_session.total_questions += 1
-        if result.get("is_correct", False):
-            self.current_session.total_correct += 1
+        with use_ledger(self.current_session.token_usage):
+            result = self.question_flow.submit_answer(answer_index, confidence)
+        
+        if "error" not in result:
+            domain_status = DomainStatus(result["domain_status"]) if result.get("domain_complete") else None
+            self.assessment_flow.record_answer(self.current_domain_index, result["is_correct"], domain_status)
+        self.current_session.questions_saved += result.get("questions_saved", 0)
         
         response_data = {
             "message": "Answer submitted successfully!",
@@ -128,7 +171,10 @@ class KnowledgeAssessmentApp:
             "progress": result.get("progress", 0),
             "domain_complete": result.get("domain_complete", False),
             "confidence_quality": result.get("confidence_quality", 0.0),
-            "current_difficulty": result.get("current_difficulty", 50)
+            "current_difficulty": result.get("current_difficulty", 50),
+            "stopped_early": result.get("stopped_early", False),
+            "question_id": result.get("question_id"),
+            "explanation_status": result.get("explanation_status")
         }
         
         if result.get("next_question"):
@@ -154,11 +200,7 @@ class KnowledgeAssessmentApp:
         
         total_time = (datetime.now() - self.current_session.start_time).total_seconds()
         
-        summary = self.ai_service.generate_assessment_summary(
-            self.current_session.main_topic,
-            self.current_session.domain_assessments,
-            total_time
-        )
+        summary = self.build_summary(total_time)
         
         radar_data = self.generate_radar_chart_data()
         
@@ -170,10 +212,68 @@ class KnowledgeAssessmentApp:
                 "total_questions": self.current_session.total_questions,
                 "total_correct": self.current_session.total_correct,
                 "overall_score": self.current_session.overall_score,
-                "total_time_minutes": round(total_time / 60, 1)
+                "questions_saved": self.current_session.questions_saved,
+                "total_time_minutes": round(total_time / 60, 1),
+                "llm_usage": self.current_session.token_usage.report()
             }
         }
 
+    def build_summary(self, total_time: float) -> Dict[str, Any]:
+        """
+        Returns the session's summary from the summary cache, generating it only when the
+        session state has changed since the last request. Concurrent requests for the same
+        state share one generation.
+        """
+        session = self.current_session
+        self.summary_enrichment = summary_cache.get_or_create(
+            session.session_id,
+            session_fingerprint(session),
+            lambda: self.create_summary(session, total_time)
+        )
+        return self.summary_enrichment.current()
+
+    def create_summary(self, session: AssessmentSession, total_time: float) -> SummaryEnrichment:
+        """
+        Builds the report locally and starts the LLM call for its narrative fields in the
+        background, so the summary never waits on the LLM.
+        """
+        local_summary = build_local_summary(session.main_topic, session.domain_assessments, total_time)
+        
+        with use_ledger(session.token_usage):
+            if not CONFIG["summary"]["async_enrichment"]:
+                return SummaryEnrichment(merge_narrative(
+                    local_summary, self.ai_service.generate_summary_narrative(session.main_topic, local_summary)
+                ))
+            
+            narrative = submit_background(self.ai_service.generate_summary_narrative, session.main_topic, local_summary)
+        return SummaryEnrichment(local_summary, narrative)
+
+    def get_summary_narrative(self) -> Dict[str, Any]:
+        """
+        Returns the latest summary with the LLM narrative merged in once it has arrived.
+        """
+        if not self.summary_enrichment:
+            raise HTTPException(status_code=400, detail="No assessment summary has been generated.")
+        
+        summary = self.summary_enrichment.current()
+        return {
+            "narrative_status": summary["narrative_status"],
+            "summary": summary
+        }
+
+    def get_explanation(self, question_id: str) -> Dict[str, Any]:
+        """
+        Returns the explanation of an answered question, writing it now if it was deferred.
+        """
+        if not self.current_session:
+            raise HTTPException(status_code=400, detail="No assessment session found.")
+        
+        with use_ledger(self.current_session.token_usage):
+            result = self.question_flow.get_explanation(question_id)
+        if result is None:
+            raise HTTPException(status_code=404, detail="No answered question with this id.")
+        return result
+
     def generate_radar_chart_data(self) -> List[Dict[str, Any]]:
         """
         Generates radar chart data for the frontend.
@@ -181,10 +281,11 @@ class KnowledgeAssessmentApp:
         if not self.current_session:
             return []
         
+        aggregates = self.current_session.aggregates
         radar_data = []
-        for assessment in self.current_session.domain_assessments:
-            if assessment.questions_attempted > 0:
-                score = (assessment.questions_correct / assessment.questions_attempted) * 100
+        for i, assessment in enumerate(self.current_session.domain_assessments):
+            score = aggregates.domain_accuracy(i)
+            if score is not None:
                 radar_data.append({
                     "category": assessment.domain_name,
                     "score": round(score, 1)
@@ -199,13 +300,14 @@ class KnowledgeAssessmentApp:
         if not self.current_session:
             return {"completed_domains": 0, "total_domains": 0}
         
-        completed_domains = sum(1 for assessment in self.current_session.domain_assessments 
-                              if assessment.status in [DomainStatus.COMPLETED, DomainStatus.MASTERED])
+        completed_domains = self.current_session.aggregates.count(DomainStatus.COMPLETED, DomainStatus.MASTERED)
         
         return {
             "completed_domains": completed_domains,
             "total_domains": len(self.current_session.domain_assessments),
             "overall_score": self.current_session.overall_score,
+            "questions_saved": self.current_session.questions_saved,
+            "llm_usage": self.current_session.token_usage.report(),
             "session_start": self.current_session.start_time.isoformat()
         }
 
@@ -224,7 +326,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_DURATION.labels(request.method, endpoint, status).observe(time.perf_counter() - start)
+
+@app.middleware("http")
+async def apply_deadline(request: Request, call_next):
+    """Gives each request its endpoint's latency SLO as a deadline for every stage it runs."""
+    slo = CONFIG["deadlines"]["endpoints"].get(request.url.path) if CONFIG["deadlines"]["enabled"] else None
+    with use_deadline(slo):
+        return await call_next(request)
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    incoming = parse_traceparent(request.headers.get("traceparent")) or {}
+    with tracer.start_span(f"HTTP {request.method} {request.url.path}", **incoming) as request_span:
+        response = await call_next(request)
+        request_span.set_attribute("http.status_code", response.status_code)
+        response.headers["traceparent"] = format_traceparent(request_span)
+        return response
+
 assessment_app_instance = KnowledgeAssessmentApp()
+warmup_manager.mark_phase("import")
+
+@app.on_event("startup")
+async def warm_up_worker():
+    """Starts background warm-up and pool refilling; /ready reports when warm-up has finished."""
+    if CONFIG["refill"]["enabled"]:
+        assessment_app_instance.question_refiller.start()
+    if not CONFIG["startup"]["warmup_enabled"]:
+        warmup_manager.mark_ready()
+        return
+    warmup_manager.register("calibration_priors", get_prior_table)
+    warmup_manager.register("item_stats", get_item_stats_store)
+    warmup_manager.register("prompt_templates", get_prompt_templates)
+    warmup_manager.register(
+        "llm_client",
+        lambda: assessment_app_instance.ai_service.warm_up(CONFIG["startup"]["preopen_connections"])
+    )
+    warmup_manager.start()
 
 @app.post("/start-assessment")
 async def start_assessment_endpoint(request: StartAssessmentRequest):
@@ -270,11 +419,42 @@ async def generate_summary_endpoint():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@app.get("/summary-narrative")
+async def summary_narrative_endpoint():
+    """Poll for the summary with its LLM-written narrative merged in."""
+    try:
+        return assessment_app_instance.get_summary_narrative()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.get("/explanation")
+async def explanation_endpoint(question_id: str):
+    """Get the explanation of an answered question, generating it on demand."""
+    try:
+        return assessment_app_instance.get_explanation(question_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "message": "AI-Powered Adaptive Testing System is running"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint; returns 503 until startup warm-up has completed."""
+    status = warmup_manager.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus metrics endpoint."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,284 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+import threading
+import time
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *labelvalues: str):
+        """
+        Returns the child series for the given label values. Children are cached,
+        so call sites on the hot path only pay for a dict lookup.
+        """
+        key = tuple(str(v) for v in labelvalues)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default_child(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for labelvalues, child in sorted(self._children.items()):
+            lines.extend(self._render_child(labelvalues, child))
+        return lines
+
+    def _render_child(self, labelvalues: Tuple[str, ...], child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(child.value)}"]
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default_child().inc(amount)
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default_child().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default_child().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default_child().dec(amount)
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default_child().observe(value)
+
+    def time(self) -> _Timer:
+        return self._default_child().time()
+
+    def _render_child(self, labelvalues: Tuple[str, ...], child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, labelvalues, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Renders every registered metric in the Prometheus text exposition format.
+        """
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by endpoint.", ("method", "endpoint", "status")
+)
+LLM_CALL_DURATION = REGISTRY.histogram(
+    "llm_call_duration_seconds", "LLM call latency by call type.", ("call_type", "model", "outcome")
+)
+LLM_TIME_TO_QUESTION = REGISTRY.histogram(
+    "llm_time_to_question_seconds", "Time from the LLM request until a generated question can be served.", ("mode",)
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "Tokens reported by the LLM provider.", ("call_type", "model", "kind")
+)
+LLM_COST = REGISTRY.counter(
+    "llm_cost_usd_total", "Estimated LLM spend from reported token usage.", ("call_type", "model")
+)
+BUDGET_FALLBACKS = REGISTRY.counter(
+    "llm_budget_fallbacks_total", "LLM calls avoided or overrun because a session's token budget was spent.", ("call_type", "outcome")
+)
+DEADLINE_FALLBACKS = REGISTRY.counter(
+    "request_deadline_fallbacks_total", "Stages that fell back or overran because the request's latency budget could not cover them.", ("stage", "outcome")
+)
+MOCK_FALLBACKS = REGISTRY.counter(
+    "llm_mock_fallbacks_total", "Responses served from mock data instead of the LLM.", ("call_type", "reason")
+)
+ACTIVE_SESSIONS = REGISTRY.gauge(
+    "assessment_active_sessions", "Assessment sessions currently held in memory."
+)
+QUESTIONS_SAVED = REGISTRY.counter(
+    "assessment_questions_saved_total", "Questions skipped because a domain stopped early on a stable estimate."
+)
+MODEL_ROUTING_DECISIONS = REGISTRY.counter(
+    "llm_routing_decisions_total", "Model chosen per LLM call and why (tier, failover or probe).", ("call_type", "model", "reason")
+)
+MODEL_LATENCY_EWMA = REGISTRY.gauge(
+    "llm_model_latency_ewma_seconds", "Exponentially weighted moving average of LLM call latency.", ("model",)
+)
+MODEL_ERROR_EWMA = REGISTRY.gauge(
+    "llm_model_error_rate_ewma", "Exponentially weighted moving average of the LLM call error rate.", ("model",)
+)
+QUESTION_POOL_DEPTH = REGISTRY.gauge(
+    "question_pool_depth", "Pre-generated questions waiting in the demand-driven pools."
+)
+QUESTION_POOL_STARVATION = REGISTRY.counter(
+    "question_pool_starvation_total", "Questions needed for a hot demand key whose pool was empty."
+)
+QUESTION_POOL_REFILLS = REGISTRY.counter(
+    "question_pool_refills_total", "Background refill attempts: generated, or skipped as busy, rate_limited or error.", ("outcome",)
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "cache_lookups_total", "Cache and prefetch lookups; hit ratio is hit / (hit + miss).", ("cache", "result")
+)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
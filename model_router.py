@@ -0,0 +1,104 @@
+from typing import Any, Dict, Optional, Tuple
+import threading
+
+from config import CONFIG
+from metrics import MODEL_ERROR_EWMA, MODEL_LATENCY_EWMA, MODEL_ROUTING_DECISIONS
+
+
+class ModelHealth:
+    """
+    Exponentially weighted moving averages of a model's call latency and error rate.
+    """
+    __slots__ = ("latency", "error_rate", "samples")
+
+    def __init__(self):
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.samples = 0
+
+    def record(self, latency: float, ok: bool, alpha: float):
+        error = 0.0 if ok else 1.0
+        if self.samples == 0:
+            self.latency = latency
+            self.error_rate = error
+        else:
+            self.latency += alpha * (latency - self.latency)
+            self.error_rate += alpha * (error - self.error_rate)
+        self.samples += 1
+
+
+class ModelRouter:
+    """
+    Picks the model for each LLM call from its call type and, for questions, the
+    difficulty band: the fast model for domain lists and easy questions, the primary
+    model for harder questions and summaries. When the preferred model's latency EWMA
+    exceeds the call type's budget, or its error EWMA the error threshold, calls fail
+    over to the fast model; every probe_interval-th such call still goes to the
+    preferred model so its averages can recover.
+    """
+    def __init__(self, settings: Dict[str, Any], primary_model: str):
+        self.settings = settings
+        self.models = {"primary": primary_model, "fast": settings["fast_model"]}
+        self._health: Dict[str, ModelHealth] = {}
+        self._failovers: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def preferred_tier(self, call_type: str, difficulty: Optional[int] = None) -> str:
+        if call_type == "question" and difficulty is not None and difficulty < self.settings["fast_difficulty_below"]:
+            return "fast"
+        return self.settings["call_types"].get(call_type, "primary")
+
+    def choose(self, call_type: str, difficulty: Optional[int] = None) -> str:
+        if not self.settings["enabled"]:
+            return self.models["primary"]
+
+        tier = self.preferred_tier(call_type, difficulty)
+        model = self.models[tier]
+        reason = tier
+        fast_model = self.models["fast"]
+
+        if model != fast_model and self._over_budget(model, call_type):
+            with self._lock:
+                count = self._failovers.get(model, 0) + 1
+                self._failovers[model] = count
+            if count % self.settings["probe_interval"] == 0:
+                reason = "probe"
+            elif not self._over_budget(fast_model, call_type):
+                model = fast_model
+                reason = "failover"
+
+        MODEL_ROUTING_DECISIONS.labels(call_type, model, reason).inc()
+        return model
+
+    def expected_latency(self, call_type: str, difficulty: Optional[int] = None) -> float:
+        """
+        Latency to expect from the call type's preferred model: its latency EWMA once it
+        has enough samples, else the call type's latency budget.
+        """
+        health = self._health.get(self.models[self.preferred_tier(call_type, difficulty)])
+        if health is not None and health.samples >= self.settings["min_samples"]:
+            return health.latency
+        return self.settings["latency_budgets"].get(call_type, self.settings["latency_budgets"]["default"])
+
+    def _over_budget(self, model: str, call_type: str) -> bool:
+        health = self._health.get(model)
+        if health is None or health.samples < self.settings["min_samples"]:
+            return False
+        budget = self.settings["latency_budgets"].get(call_type, self.settings["latency_budgets"]["default"])
+        return health.latency > budget or health.error_rate > self.settings["max_error_rate"]
+
+    def record(self, model: str, latency: float, ok: bool):
+        with self._lock:
+            health = self._health.get(model)
+            if health is None:
+                health = self._health[model] = ModelHealth()
+            health.record(latency, ok, self.settings["ewma_alpha"])
+        MODEL_LATENCY_EWMA.labels(model).set(health.latency)
+        MODEL_ERROR_EWMA.labels(model).set(health.error_rate)
+
+    def health(self) -> Dict[str, Tuple[float, float, int]]:
+        return {model: (h.latency, h.error_rate, h.samples) for model, h in self._health.items()}
+
+
+def create_model_router() -> ModelRouter:
+    return ModelRouter(CONFIG["routing"], CONFIG["openai"]["model"])
@@ -1,9 +1,23 @@
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Deque, Tuple, Iterator, Union
+from array import array
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from bisect import bisect_left, insort
 from datetime import datetime
-import statistics
+from fractions import Fraction
+import heapq
 import math
+import statistics
+import sys
+import time
+import uuid
+from token_accounting import TokenLedger
+from tracing import traced
+
+# dataclass(slots=True) is only available from Python 3.10 onwards.
+_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 class DomainStatus(Enum):
     NOT_STARTED = "not_started"
@@ -18,13 +32,13 @@ class LevelStatus(Enum):
     PASSED = "passed"
     FAILED = "failed"
 
-@dataclass
+@dataclass(**_SLOTS)
 class AssessmentDomain:
     domain_name: str
     description: str
     estimated_difficulty: int  # 1-100
 
-@dataclass
+@dataclass(**_SLOTS)
 class Question:
     question: str
     options: List[str]
@@ -33,8 +47,31 @@ class Question:
     explanation: str
     difficulty_level: int  # 1-100
     estimated_time: int  # seconds
+    pending: Optional[Future] = field(default=None, repr=False, compare=False)  # rest of a streamed question
 
-@dataclass
+    def wait_complete(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for the remainder of a streamed question and fills in its explanation.
+        Returns False if it failed or did not arrive in time; the question stays gradable.
+        The pending future is only dropped once it has finished.
+        """
+        pending = self.pending
+        if pending is None:
+            return True
+        try:
+            self.explanation = str(pending.result(timeout)["explanation"])
+            return True
+        except FutureTimeoutError:
+            print("Error completing streamed question: timed out")
+            return False
+        except Exception as e:
+            print(f"Error completing streamed question: {e}")
+            return False
+        finally:
+            if pending.done():
+                self.pending = None
+
+@dataclass(**_SLOTS)
 class QuestionResponse:
     question_id: str
     user_answer_index: int
@@ -43,20 +80,233 @@ class QuestionResponse:
     confidence_level: float  # 0-1
     timestamp: datetime
 
-@dataclass
+class ResponseHistory:
+    """
+    Columnar per-domain response history backed by typed arrays, with running totals
+    for the aggregates the flow reads on every answer. Indexing and iteration yield
+    QuestionResponse objects built on demand, so callers keep the list-of-responses API.
+    """
+    __slots__ = ("domain_name", "answers", "correct", "response_times", "confidences",
+                 "timestamps", "total_response_time", "total_confidence", "total_correct",
+                 "_question_ids")
+
+    def __init__(self, domain_name: str = ""):
+        self.domain_name = domain_name
+        self.answers = array("h")
+        self.correct = array("b")
+        self.response_times = array("d")
+        self.confidences = array("d")
+        self.timestamps = array("d")
+        self.total_response_time = 0.0
+        self.total_confidence = 0.0
+        self.total_correct = 0
+        self._question_ids: Dict[int, str] = {}
+
+    def record(self, user_answer_index: int, is_correct: bool, response_time: float,
+               confidence_level: float, timestamp: Optional[float] = None):
+        self.answers.append(user_answer_index)
+        self.correct.append(1 if is_correct else 0)
+        self.response_times.append(response_time)
+        self.confidences.append(confidence_level)
+        self.timestamps.append(time.time() if timestamp is None else timestamp)
+        self.total_response_time += response_time
+        self.total_confidence += confidence_level
+        self.total_correct += 1 if is_correct else 0
+
+    def append(self, response: QuestionResponse):
+        index = len(self.answers)
+        if response.question_id != self._default_question_id(index):
+            self._question_ids[index] = response.question_id
+        self.record(response.user_answer_index, response.is_correct, response.response_time,
+                    response.confidence_level, response.timestamp.timestamp())
+
+    def average_response_time(self) -> float:
+        return self.total_response_time / len(self.answers) if self.answers else 0.0
+
+    def average_confidence(self) -> float:
+        return self.total_confidence / len(self.answers) if self.answers else 0.0
+
+    def _default_question_id(self, index: int) -> str:
+        return f"{self.domain_name}_{index}"
+
+    def _response_at(self, index: int) -> QuestionResponse:
+        return QuestionResponse(
+            question_id=self._question_ids.get(index) or self._default_question_id(index),
+            user_answer_index=self.answers[index],
+            is_correct=bool(self.correct[index]),
+            response_time=self.response_times[index],
+            confidence_level=self.confidences[index],
+            timestamp=datetime.fromtimestamp(self.timestamps[index])
+        )
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    def __bool__(self) -> bool:
+        return len(self.answers) > 0
+
+    def __iter__(self) -> Iterator[QuestionResponse]:
+        for index in range(len(self.answers)):
+            yield self._response_at(index)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[QuestionResponse, List[QuestionResponse]]:
+        if isinstance(index, slice):
+            return [self._response_at(i) for i in range(*index.indices(len(self.answers)))]
+        if index < 0:
+            index += len(self.answers)
+        if not 0 <= index < len(self.answers):
+            raise IndexError("response history index out of range")
+        return self._response_at(index)
+
+class KnowledgeTagTracker:
+    """
+    Insertion-ordered per-tag miss/hit counts with recency, giving O(1) membership
+    checks and a bounded, ranked view of the gaps that are still open.
+    """
+    __slots__ = ("_tags", "_sequence")
+
+    def __init__(self):
+        # tag -> [misses, hits, sequence of last miss, sequence of last answer]
+        self._tags: Dict[str, List[int]] = {}
+        self._sequence = 0
+
+    def record(self, tag: str, is_correct: bool) -> bool:
+        """
+        Counts an answer for the tag. Returns True if this is the tag's first miss
+        (for an incorrect answer) or first hit (for a correct one).
+        """
+        self._sequence += 1
+        counts = self._tags.get(tag)
+        if counts is None:
+            counts = self._tags[tag] = [0, 0, 0, 0]
+        counts[3] = self._sequence
+        if is_correct:
+            counts[1] += 1
+            return counts[1] == 1
+        counts[0] += 1
+        counts[2] = self._sequence
+        return counts[0] == 1
+
+    def misses(self, tag: str) -> int:
+        counts = self._tags.get(tag)
+        return counts[0] if counts else 0
+
+    def hits(self, tag: str) -> int:
+        counts = self._tags.get(tag)
+        return counts[1] if counts else 0
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self._tags
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def top_gaps(self, k: int) -> List[str]:
+        """
+        Returns up to k tags that have been missed more often than answered correctly,
+        ranked by net misses and then by how recently they were missed.
+        """
+        if k <= 0:
+            return []
+        open_gaps = ((counts[0] - counts[1], counts[2], tag)
+                     for tag, counts in self._tags.items() if counts[0] > counts[1])
+        return [tag for _, _, tag in heapq.nlargest(k, open_gaps)]
+
+@dataclass(**_SLOTS)
 class DomainAssessment:
     domain_name: str
     status: DomainStatus = DomainStatus.NOT_STARTED
     current_difficulty: int = 50
     questions_attempted: int = 0
     questions_correct: int = 0
-    response_history: List[QuestionResponse] = field(default_factory=list)
+    response_history: ResponseHistory = field(default_factory=ResponseHistory)
     knowledge_gaps: List[str] = field(default_factory=list)
     mastery_areas: List[str] = field(default_factory=list)
     average_response_time: float = 0.0
     confidence_score: float = 0.0
+    tag_tracker: KnowledgeTagTracker = field(default_factory=KnowledgeTagTracker)
+
+    def __post_init__(self):
+        if not self.response_history.domain_name:
+            self.response_history.domain_name = self.domain_name
+
+    def record_knowledge_tag(self, knowledge_tag: str, is_correct: bool):
+        """
+        Counts the answer against its knowledge tag. knowledge_gaps and mastery_areas keep
+        their first-seen order and are appended to only on a tag's first miss or hit.
+        """
+        if self.tag_tracker.record(knowledge_tag, is_correct):
+            if is_correct:
+                self.mastery_areas.append(knowledge_tag)
+            else:
+                self.knowledge_gaps.append(knowledge_tag)
+
+    def current_knowledge_gaps(self, limit: int) -> List[str]:
+        return self.tag_tracker.top_gaps(limit)
+
+_FINISHED_STATUSES = (DomainStatus.COMPLETED, DomainStatus.MASTERED, DomainStatus.STRUGGLING)
+
+class SessionAggregates:
+    """
+    Session-wide totals kept current on every answer and domain status change: the
+    difficulty-weighted score numerator and denominator, per-domain accuracy and the
+    number of domains in each status. Progress, radar and summary views read these
+    instead of rescanning every DomainAssessment.
+    """
+    __slots__ = ("weights", "attempted", "correct", "statuses", "status_counts",
+                 "score_numerator", "score_denominator")
 
-@dataclass
+    def __init__(self, weights: Optional[List[float]] = None):
+        self.weights: List[float] = list(weights or [])
+        self.attempted: List[int] = [0] * len(self.weights)
+        self.correct: List[int] = [0] * len(self.weights)
+        self.statuses: List[DomainStatus] = [DomainStatus.NOT_STARTED] * len(self.weights)
+        self.status_counts: Dict[DomainStatus, int] = {status: 0 for status in DomainStatus}
+        self.status_counts[DomainStatus.NOT_STARTED] = len(self.weights)
+        self.score_numerator = 0.0
+        self.score_denominator = 0.0
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def record_answer(self, domain_index: int, is_correct: bool):
+        weight = self.weights[domain_index]
+        previous_score = self.domain_accuracy(domain_index)
+        if previous_score is None:
+            self.score_denominator += weight
+        else:
+            self.score_numerator -= previous_score * weight
+        self.attempted[domain_index] += 1
+        if is_correct:
+            self.correct[domain_index] += 1
+        self.score_numerator += self.domain_accuracy(domain_index) * weight
+
+    def set_status(self, domain_index: int, status: DomainStatus):
+        self.status_counts[self.statuses[domain_index]] -= 1
+        self.status_counts[status] += 1
+        self.statuses[domain_index] = status
+
+    def domain_accuracy(self, domain_index: int) -> Optional[float]:
+        """Percentage correct in the domain, or None before its first answer."""
+        attempted = self.attempted[domain_index]
+        if not attempted:
+            return None
+        return (self.correct[domain_index] / attempted) * 100
+
+    def count(self, *statuses: DomainStatus) -> int:
+        return sum(self.status_counts[status] for status in statuses)
+
+    @property
+    def finished_domains(self) -> int:
+        return self.count(*_FINISHED_STATUSES)
+
+    @property
+    def overall_score(self) -> float:
+        if self.score_denominator <= 0:
+            return 0.0
+        return self.score_numerator / self.score_denominator
+
+@dataclass(**_SLOTS)
 class AssessmentSession:
     main_topic: str
     domain_list: List[AssessmentDomain] = field(default_factory=list)
@@ -66,37 +316,185 @@ class AssessmentSession:
     start_time: datetime = field(default_factory=datetime.now)
     total_questions: int = 0
     total_correct: int = 0
+    questions_saved: int = 0
+    aggregates: SessionAggregates = field(default_factory=SessionAggregates)
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    token_usage: TokenLedger = field(default_factory=TokenLedger)
+
+class RollingWindowStats:
+    """
+    Fixed-size circular buffer of (x, y) pairs with running sums of x, y, xy, x² and y²,
+    so means, variances and the Pearson correlation over the window cost O(1) per update.
+    The sums are recomputed from the buffer once per full pass of the window to discard
+    accumulated floating-point drift.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self._xs: List[float] = [0.0] * size
+        self._ys: List[float] = [0.0] * size
+        self._start = 0
+        self.count = 0
+        self._updates_since_renormalize = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+        self.sum_x2 = 0.0
+        self.sum_y2 = 0.0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, x: float, y: float = 0.0):
+        if self.size <= 0:
+            return
+        
+        if self.count == self.size:
+            old_x, old_y = self._xs[self._start], self._ys[self._start]
+            self.sum_x -= old_x
+            self.sum_y -= old_y
+            self.sum_xy -= old_x * old_y
+            self.sum_x2 -= old_x * old_x
+            self.sum_y2 -= old_y * old_y
+            self._xs[self._start] = x
+            self._ys[self._start] = y
+            self._start = (self._start + 1) % self.size
+        else:
+            index = (self._start + self.count) % self.size
+            self._xs[index] = x
+            self._ys[index] = y
+            self.count += 1
+        
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xy += x * y
+        self.sum_x2 += x * x
+        self.sum_y2 += y * y
+        
+        self._updates_since_renormalize += 1
+        if self._updates_since_renormalize >= self.size:
+            self.renormalize()
+
+    def renormalize(self):
+        xs, ys = self.xs(), self.ys()
+        self.sum_x = math.fsum(xs)
+        self.sum_y = math.fsum(ys)
+        self.sum_xy = math.fsum(x * y for x, y in zip(xs, ys))
+        self.sum_x2 = math.fsum(x * x for x in xs)
+        self.sum_y2 = math.fsum(y * y for y in ys)
+        self._updates_since_renormalize = 0
+
+    def xs(self) -> List[float]:
+        return [self._xs[(self._start + i) % self.size] for i in range(self.count)]
+
+    def ys(self) -> List[float]:
+        return [self._ys[(self._start + i) % self.size] for i in range(self.count)]
+
+    def mean_x(self) -> float:
+        return self.sum_x / self.count if self.count else 0.0
+
+    def mean_y(self) -> float:
+        return self.sum_y / self.count if self.count else 0.0
+
+    def variance_x(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return max(0.0, (self.sum_x2 - self.sum_x * self.sum_x / self.count) / (self.count - 1))
+
+    def correlation(self) -> float:
+        n = self.count
+        if n < 2:
+            return 0.0
+        
+        numerator = n * self.sum_xy - self.sum_x * self.sum_y
+        var_x = n * self.sum_x2 - self.sum_x * self.sum_x
+        var_y = n * self.sum_y2 - self.sum_y * self.sum_y
+        
+        if var_x <= 0 or var_y <= 0:
+            return 0.0
+        
+        return max(-1.0, min(1.0, numerator / math.sqrt(var_x * var_y)))
 
 class ConfidenceCalibrationEngine:
-    def __init__(self, history_size: int = 100):
-        self.confidence_accuracy_pairs: List[tuple[float, bool]] = []
+    def __init__(self, history_size: int = 100, prior: Optional[Dict[float, Tuple[float, float]]] = None):
+        self.confidence_accuracy_pairs: Deque[Tuple[float, bool]] = deque(maxlen=history_size)
         self.calibration_curve: Dict[float, float] = {}
         self.history_size = history_size
+        # Optional population prior: bin -> (prior accuracy, strength in pseudo-observations).
+        # Binned accuracy is shrunk toward it, so the curve is usable from the first answer.
+        self.prior: Dict[float, Tuple[float, float]] = dict(prior or {})
+        # Running per-bin [count, correct] totals over the window, kept in step with
+        # confidence_accuracy_pairs so an update only touches the added and evicted bins.
+        self._bin_counts: Dict[float, List[int]] = {}
+        self._sorted_bins: List[float] = []
+        self._curve_active = False
+        if self.prior:
+            self.calculate_calibration_curve()
 
     def update_calibration(self, confidence: float, is_correct: bool):
+        touched = {round(confidence, 1)}
+        
+        if len(self.confidence_accuracy_pairs) == self.history_size:
+            evicted_confidence, evicted_correct = self.confidence_accuracy_pairs[0]
+            touched.add(self._remove_from_bin(evicted_confidence, evicted_correct))
+        
         self.confidence_accuracy_pairs.append((confidence, is_correct))
+        self._add_to_bin(confidence, is_correct)
         
-        if len(self.confidence_accuracy_pairs) > self.history_size:
-            self.confidence_accuracy_pairs.pop(0)
+        if len(self.confidence_accuracy_pairs) < 10 and not self.prior:
+            return
         
-        self.calculate_calibration_curve()
+        if not self._curve_active:
+            self.calculate_calibration_curve()
+            return
+        
+        for bin_key in touched:
+            self._refresh_curve_bin(bin_key)
+
+    def _add_to_bin(self, confidence: float, is_correct: bool):
+        counts = self._bin_counts.setdefault(round(confidence, 1), [0, 0])
+        counts[0] += 1
+        counts[1] += int(is_correct)
+
+    def _remove_from_bin(self, confidence: float, is_correct: bool) -> float:
+        bin_key = round(confidence, 1)
+        counts = self._bin_counts[bin_key]
+        counts[0] -= 1
+        counts[1] -= int(is_correct)
+        if counts[0] == 0:
+            del self._bin_counts[bin_key]
+        return bin_key
+
+    def _curve_value(self, bin_key: float) -> Optional[float]:
+        count, correct = self._bin_counts.get(bin_key, (0, 0))
+        prior = self.prior.get(bin_key)
+        if prior is not None:
+            prior_accuracy, strength = prior
+            return (correct + strength * prior_accuracy) / (count + strength)
+        if count >= 3:
+            return correct / count
+        return None
+
+    def _refresh_curve_bin(self, bin_key: float):
+        value = self._curve_value(bin_key)
+        if value is not None:
+            if bin_key not in self.calibration_curve:
+                insort(self._sorted_bins, bin_key)
+            self.calibration_curve[bin_key] = value
+        elif bin_key in self.calibration_curve:
+            del self.calibration_curve[bin_key]
+            self._sorted_bins.remove(bin_key)
 
     def calculate_calibration_curve(self):
-        if len(self.confidence_accuracy_pairs) < 10:
+        if len(self.confidence_accuracy_pairs) < 10 and not self.prior:
             return
         
-        bins = {}
-        for confidence, is_correct in self.confidence_accuracy_pairs:
-            bin_key = round(confidence, 1)
-            if bin_key not in bins:
-                bins[bin_key] = []
-            bins[bin_key].append(is_correct)
-        
         self.calibration_curve = {}
-        for bin_key, results in bins.items():
-            if len(results) >= 3:
-                accuracy = sum(results) / len(results)
-                self.calibration_curve[bin_key] = accuracy
+        for bin_key in list(self._bin_counts) + [b for b in self.prior if b not in self._bin_counts]:
+            value = self._curve_value(bin_key)
+            if value is not None:
+                self.calibration_curve[bin_key] = value
+        self._sorted_bins = sorted(self.calibration_curve)
+        self._curve_active = True
 
     def get_calibrated_confidence(self, raw_confidence: float) -> float:
         bin_key = round(raw_confidence, 1)
@@ -110,7 +508,7 @@ class ConfidenceCalibrationEngine:
         if not self.calibration_curve:
             return confidence
         
-        sorted_bins = sorted(self.calibration_curve.keys())
+        sorted_bins = self._sorted_bins
         
         if confidence <= sorted_bins[0]:
             return self.calibration_curve[sorted_bins[0]]
@@ -118,24 +516,28 @@ class ConfidenceCalibrationEngine:
         if confidence >= sorted_bins[-1]:
             return self.calibration_curve[sorted_bins[-1]]
         
-        for i in range(len(sorted_bins) - 1):
-            if sorted_bins[i] <= confidence <= sorted_bins[i + 1]:
-                x1, y1 = sorted_bins[i], self.calibration_curve[sorted_bins[i]]
-                x2, y2 = sorted_bins[i + 1], self.calibration_curve[sorted_bins[i + 1]]
-                
-                interpolated = y1 + (y2 - y1) * (confidence - x1) / (x2 - x1)
-                return interpolated
+        i = bisect_left(sorted_bins, confidence) - 1
+        x1, y1 = sorted_bins[i], self.calibration_curve[sorted_bins[i]]
+        x2, y2 = sorted_bins[i + 1], self.calibration_curve[sorted_bins[i + 1]]
         
-        return confidence
+        interpolated = y1 + (y2 - y1) * (confidence - x1) / (x2 - x1)
+        return interpolated
 
 class EnhancedConfidenceEngine:
-    def __init__(self, history_size: int = 50):
-        self.calibration_engine = ConfidenceCalibrationEngine()
-        self.confidence_history: List[float] = []
-        self.accuracy_history: List[float] = []
+    def __init__(self, history_size: int = 50, calibration_prior: Optional[Dict[float, Tuple[float, float]]] = None):
+        self.calibration_engine = ConfidenceCalibrationEngine(prior=calibration_prior)
+        self.correlation_window = RollingWindowStats(history_size)
         self.confidence_accuracy_correlation: float = 0.0
         self.history_size = history_size
 
+    @property
+    def confidence_history(self) -> List[float]:
+        return self.correlation_window.xs()
+
+    @property
+    def accuracy_history(self) -> List[float]:
+        return self.correlation_window.ys()
+
     def calculate_confidence_impact(self, confidence: float, is_correct: bool, 
                                   response_time: float, difficulty: int) -> float:
         calibrated_confidence = self.calibration_engine.get_calibrated_confidence(confidence)
@@ -148,17 +550,10 @@ class EnhancedConfidenceEngine:
         )
 
     def update_correlation(self, confidence: float, is_correct: bool):
-        self.confidence_history.append(confidence)
-        self.accuracy_history.append(float(is_correct))
+        self.correlation_window.append(confidence, float(is_correct))
         
-        if len(self.confidence_history) > self.history_size:
-            self.confidence_history.pop(0)
-            self.accuracy_history.pop(0)
-        
-        if len(self.confidence_history) >= 10:
-            self.confidence_accuracy_correlation = self.calculate_correlation(
-                self.confidence_history, self.accuracy_history
-            )
+        if len(self.correlation_window) >= 10:
+            self.confidence_accuracy_correlation = self.correlation_window.correlation()
 
     def calculate_correlation(self, x: List[float], y: List[float]) -> float:
         if len(x) != len(y) or len(x) < 2:
@@ -212,20 +607,118 @@ class EnhancedConfidenceEngine:
         
         return comprehensive_impact
 
+class _ExactVarianceAccumulator:
+    """
+    Running count, sum and sum of squares held as exact rationals. Values can be added
+    and removed without drift, and the variances round exactly like statistics.variance
+    and statistics.pvariance over the same values, including their errors for too few
+    values.
+    """
+    __slots__ = ("count", "total", "total_sq")
+
+    def __init__(self):
+        self.count = 0
+        self.total = Fraction(0)
+        self.total_sq = Fraction(0)
+
+    def add(self, value: float):
+        exact = Fraction(value)
+        self.count += 1
+        self.total += exact
+        self.total_sq += exact * exact
+
+    def remove(self, value: float):
+        exact = Fraction(value)
+        self.count -= 1
+        self.total -= exact
+        self.total_sq -= exact * exact
+
+    def _sum_of_squares(self) -> Fraction:
+        return self.total_sq - self.total * self.total / self.count
+
+    def variance(self) -> float:
+        if self.count < 2:
+            raise statistics.StatisticsError("variance requires at least two data points")
+        return float(self._sum_of_squares() / (self.count - 1))
+
+    def pvariance(self) -> float:
+        if self.count < 1:
+            raise statistics.StatisticsError("pvariance requires at least one data point")
+        return float(self._sum_of_squares() / self.count)
+
+    def stdev(self) -> float:
+        return math.sqrt(self.variance())
+
+    def pstdev(self) -> float:
+        return math.sqrt(self.pvariance())
+
 class ConfidenceQualityMetrics:
-    def __init__(self, history_size: int = 100):
-        self.confidence_accuracy_data: List[tuple[float, bool]] = []
+    def __init__(self, history_size: int = 100, prior_score: Optional[float] = None, prior_strength: float = 10.0):
+        self.confidence_accuracy_data: Deque[Tuple[float, bool]] = deque(maxlen=history_size)
         self.history_size = history_size
+        # Optional population prior: the score returned before 10 answers, and the weight
+        # (in answers) it keeps once the user's own score is available.
+        self.prior_score = prior_score
+        self.prior_strength = prior_strength
+        self._next_sequence = 0
+        # Sequence numbers of the window's points per confidence bin; the first entry
+        # orders bins by first appearance, matching a rescan of the window.
+        self._bin_sequences: Dict[float, Deque[int]] = {}
+        self._bin_correct: Dict[float, int] = {}
+        self._high_confidence_total = 0
+        self._high_confidence_incorrect = 0
+        self._correct_confidences = _ExactVarianceAccumulator()
+        self._incorrect_confidences = _ExactVarianceAccumulator()
+        self._cached_score: Optional[float] = None
 
     def add_data_point(self, confidence: float, is_correct: bool):
+        if len(self.confidence_accuracy_data) == self.history_size:
+            self._remove_point(*self.confidence_accuracy_data[0])
+        
         self.confidence_accuracy_data.append((confidence, is_correct))
         
-        if len(self.confidence_accuracy_data) > self.history_size:
-            self.confidence_accuracy_data.pop(0)
+        bin_key = round(confidence, 1)
+        self._bin_sequences.setdefault(bin_key, deque()).append(self._next_sequence)
+        self._bin_correct[bin_key] = self._bin_correct.get(bin_key, 0) + int(is_correct)
+        self._next_sequence += 1
+        
+        if confidence > 0.7:
+            self._high_confidence_total += 1
+            if not is_correct:
+                self._high_confidence_incorrect += 1
+        
+        if is_correct:
+            self._correct_confidences.add(confidence)
+        else:
+            self._incorrect_confidences.add(confidence)
+        
+        self._cached_score = None
+
+    def _remove_point(self, confidence: float, is_correct: bool):
+        bin_key = round(confidence, 1)
+        sequences = self._bin_sequences[bin_key]
+        sequences.popleft()
+        self._bin_correct[bin_key] -= int(is_correct)
+        if not sequences:
+            del self._bin_sequences[bin_key]
+            del self._bin_correct[bin_key]
+        
+        if confidence > 0.7:
+            self._high_confidence_total -= 1
+            if not is_correct:
+                self._high_confidence_incorrect -= 1
+        
+        if is_correct:
+            self._correct_confidences.remove(confidence)
+        else:
+            self._incorrect_confidences.remove(confidence)
 
     def get_confidence_quality_score(self) -> float:
         if len(self.confidence_accuracy_data) < 10:
-            return 0.5
+            return 0.5 if self.prior_score is None else self.prior_score
+        
+        if self._cached_score is not None:
+            return self._cached_score
         
         calibration_error = self.calculate_calibration_error()
         overconfidence = self.calculate_overconfidence()
@@ -237,50 +730,41 @@ class ConfidenceQualityMetrics:
             0.2 * consistency
         )
         
-        return max(0.0, min(1.0, quality_score))
+        quality_score = max(0.0, min(1.0, quality_score))
+        
+        if self.prior_score is not None:
+            n = len(self.confidence_accuracy_data)
+            quality_score = (n * quality_score + self.prior_strength * self.prior_score) / (n + self.prior_strength)
+        
+        self._cached_score = quality_score
+        return self._cached_score
 
     def calculate_calibration_error(self) -> float:
-        bins = {}
-        for confidence, is_correct in self.confidence_accuracy_data:
-            bin_key = round(confidence, 1)
-            if bin_key not in bins:
-                bins[bin_key] = []
-            bins[bin_key].append(is_correct)
-        
         total_error = 0.0
         total_weight = 0
         
-        for bin_confidence, results in bins.items():
-            if len(results) >= 3:
-                actual_accuracy = sum(results) / len(results)
+        ordered_bins = sorted(self._bin_sequences.items(), key=lambda item: item[1][0])
+        for bin_confidence, sequences in ordered_bins:
+            weight = len(sequences)
+            if weight >= 3:
+                actual_accuracy = self._bin_correct[bin_confidence] / weight
                 error = abs(bin_confidence - actual_accuracy)
-                weight = len(results)
                 total_error += error * weight
                 total_weight += weight
         
         return total_error / total_weight if total_weight > 0 else 0.0
 
     def calculate_overconfidence(self) -> float:
-        high_confidence_incorrect = 0
-        high_confidence_total = 0
-        
-        for confidence, is_correct in self.confidence_accuracy_data:
-            if confidence > 0.7:
-                high_confidence_total += 1
-                if not is_correct:
-                    high_confidence_incorrect += 1
-        
-        return high_confidence_incorrect / high_confidence_total if high_confidence_total > 0 else 0.0
+        if self._high_confidence_total == 0:
+            return 0.0
+        return self._high_confidence_incorrect / self._high_confidence_total
 
     def calculate_consistency(self) -> float:
-        correct_confidences = [conf for conf, correct in self.confidence_accuracy_data if correct]
-        incorrect_confidences = [conf for conf, correct in self.confidence_accuracy_data if not correct]
-        
-        if len(correct_confidences) < 3 or len(incorrect_confidences) < 3:
+        if self._correct_confidences.count < 3 or self._incorrect_confidences.count < 3:
             return 0.5
         
-        correct_variance = statistics.variance(correct_confidences)
-        incorrect_variance = statistics.variance(incorrect_confidences)
+        correct_variance = self._correct_confidences.variance()
+        incorrect_variance = self._incorrect_confidences.variance()
         
         avg_variance = (correct_variance + incorrect_variance) / 2
         consistency = 1 / (1 + avg_variance)
@@ -288,16 +772,41 @@ class ConfidenceQualityMetrics:
         return consistency
 
 class ImprovedAdaptiveDifficultyEngine:
-    def __init__(self, initial_difficulty: int = 50, history_size: int = 10):
+    def __init__(self, initial_difficulty: int = 50, history_size: int = 10,
+                 base_step: float = 5, max_change: float = 15,
+                 calibration_prior: Optional[Dict[float, Tuple[float, float]]] = None):
         self.current_difficulty = float(initial_difficulty)
+        self.base_step = base_step
+        self.max_change = max_change
         self.recent_performance: List[bool] = []
         self.recent_response_times: List[float] = []
         self.consecutive_correct = 0
         self.consecutive_incorrect = 0
         self.history_size = history_size
-        self.confidence_engine = EnhancedConfidenceEngine()
+        self.confidence_engine = EnhancedConfidenceEngine(calibration_prior=calibration_prior)
+        self.difficulty_history: Deque[float] = deque(maxlen=history_size)
+        self.item_expected_time: Optional[float] = None  # empirical time for the current item, if known
 
-    def update_difficulty(self, is_correct: bool, response_time: float, confidence: float):
+    @traced("difficulty.update_difficulty")
+    def update_difficulty(self, is_correct: bool, response_time: float, confidence: float,
+                          item_difficulty: Optional[int] = None):
+        self.record_performance(is_correct, response_time)
+        
+        adjustment = self.calculate_enhanced_adjustment(is_correct, response_time, confidence)
+        
+        self.current_difficulty = max(1, min(100, self.current_difficulty + adjustment))
+        self.difficulty_history.append(self.current_difficulty)
+
+    def is_estimate_stable(self, max_standard_error: float, max_difficulty_range: float) -> bool:
+        """
+        The heuristic engine has no standard error; it counts as stable once the
+        difficulty has stayed within max_difficulty_range over its recent window.
+        """
+        if len(self.difficulty_history) < min(5, self.history_size):
+            return False
+        return max(self.difficulty_history) - min(self.difficulty_history) <= max_difficulty_range
+
+    def record_performance(self, is_correct: bool, response_time: float):
         self.recent_performance.append(is_correct)
         self.recent_response_times.append(response_time)
         
@@ -311,13 +820,9 @@ class ImprovedAdaptiveDifficultyEngine:
         else:
             self.consecutive_incorrect += 1
             self.consecutive_correct = 0
-        
-        adjustment = self.calculate_enhanced_adjustment(is_correct, response_time, confidence)
-        
-        self.current_difficulty = max(1, min(100, self.current_difficulty + adjustment))
 
     def calculate_enhanced_adjustment(self, is_correct: bool, response_time: float, confidence: float) -> float:
-        base_adjustment = 5 if is_correct else -5
+        base_adjustment = self.base_step if is_correct else -self.base_step
         
         if self.consecutive_correct >= 3:
             base_adjustment *= 1.2
@@ -334,10 +839,15 @@ class ImprovedAdaptiveDifficultyEngine:
         
         total_adjustment = (base_adjustment + confidence_impact + time_impact) * stability_factor
         
-        return max(-15, min(15, total_adjustment))
+        return max(-self.max_change, min(self.max_change, total_adjustment))
+
+    def expected_response_time(self) -> float:
+        if self.item_expected_time is not None:
+            return self.item_expected_time
+        return 30.0 + (self.current_difficulty / 100) * 30.0
 
     def calculate_time_impact(self, response_time: float, is_correct: bool) -> float:
-        expected_time = 30 + (self.current_difficulty / 100) * 30
+        expected_time = self.expected_response_time()
         time_ratio = response_time / expected_time
         
         if is_correct:
@@ -385,7 +895,7 @@ class ImprovedAdaptiveDifficultyEngine:
         else:
             base_confidence -= 0.2
         
-        expected_time = 30.0 + (self.current_difficulty / 100) * 30.0
+        expected_time = self.expected_response_time()
         time_ratio = response_time / expected_time
         
         if is_correct and time_ratio < 0.7:
@@ -408,3 +918,97 @@ class ImprovedAdaptiveDifficultyEngine:
                 base_confidence -= 0.1
         
         return max(0.1, min(0.9, base_confidence))
+
+class IRTAbilityEngine(ImprovedAdaptiveDifficultyEngine):
+    """
+    Estimates ability with a two-parameter logistic IRT model and targets the next item
+    at the difficulty of maximum Fisher information. The posterior over ability is kept
+    on a fixed quadrature grid and updated per response (EAP), so current_difficulty
+    tracks the ability estimate instead of moving by fixed steps.
+    Difficulty points map to the logit scale as theta = (difficulty - 50) / difficulty_scale.
+    """
+    def __init__(self, initial_difficulty: int = 50, history_size: int = 10,
+                 discrimination: float = 1.0, difficulty_scale: float = 12.5,
+                 prior_sd: float = 2.0, grid_points: int = 81,
+                 calibration_prior: Optional[Dict[float, Tuple[float, float]]] = None):
+        super().__init__(initial_difficulty, history_size, calibration_prior=calibration_prior)
+        self.discrimination = discrimination
+        self.difficulty_scale = difficulty_scale
+        self.responses_recorded = 0
+        
+        prior_mean = self.difficulty_to_theta(initial_difficulty)
+        low, high = self.difficulty_to_theta(1) - 1.0, self.difficulty_to_theta(100) + 1.0
+        step = (high - low) / (grid_points - 1)
+        self._grid: List[float] = [low + i * step for i in range(grid_points)]
+        self._log_posterior: List[float] = [
+            -((theta - prior_mean) ** 2) / (2 * prior_sd * prior_sd) for theta in self._grid
+        ]
+        self.ability, self.standard_error = self._posterior_moments()
+
+    def difficulty_to_theta(self, difficulty: float) -> float:
+        return (difficulty - 50) / self.difficulty_scale
+
+    def theta_to_difficulty(self, theta: float) -> float:
+        return max(1.0, min(100.0, 50 + theta * self.difficulty_scale))
+
+    def probability_correct(self, theta: float, item_difficulty: float) -> float:
+        z = self.discrimination * (theta - self.difficulty_to_theta(item_difficulty))
+        return 1 / (1 + math.exp(-z))
+
+    def item_information(self, theta: float, item_difficulty: float) -> float:
+        p = self.probability_correct(theta, item_difficulty)
+        return self.discrimination * self.discrimination * p * (1 - p)
+
+    @traced("difficulty.update_ability")
+    def update_difficulty(self, is_correct: bool, response_time: float, confidence: float,
+                          item_difficulty: Optional[int] = None):
+        self.record_performance(is_correct, response_time)
+        # The ability update does not use the confidence impact, but the calibration curve
+        # and correlation are kept current, as in the heuristic engine.
+        self.confidence_engine.calibration_engine.update_calibration(confidence, is_correct)
+        self.confidence_engine.update_correlation(confidence, is_correct)
+        
+        b = self.difficulty_to_theta(self.current_difficulty if item_difficulty is None else item_difficulty)
+        a = self.discrimination
+        log_posterior = self._log_posterior
+        for i, theta in enumerate(self._grid):
+            z = a * (theta - b)
+            # log P(correct) = -log(1 + e^-z), log P(incorrect) = -log(1 + e^z)
+            if is_correct:
+                log_posterior[i] -= math.log1p(math.exp(-z)) if z > -30 else -z
+            else:
+                log_posterior[i] -= math.log1p(math.exp(z)) if z < 30 else z
+        
+        self.responses_recorded += 1
+        self.ability, self.standard_error = self._posterior_moments()
+        self.current_difficulty = self.next_item_difficulty()
+        self.difficulty_history.append(self.current_difficulty)
+
+    def is_estimate_stable(self, max_standard_error: float, max_difficulty_range: float) -> bool:
+        return self.responses_recorded > 0 and self.standard_error <= max_standard_error
+
+    def next_item_difficulty(self, candidate_difficulties: Optional[List[float]] = None) -> float:
+        """
+        Returns the difficulty with maximum Fisher information at the current ability
+        estimate, chosen from candidate_difficulties when given (e.g. banked items).
+        Without candidates that is the difficulty whose logit equals the ability estimate.
+        """
+        if candidate_difficulties:
+            return max(candidate_difficulties, key=lambda d: self.item_information(self.ability, d))
+        return self.theta_to_difficulty(self.ability)
+
+    def _posterior_moments(self) -> Tuple[float, float]:
+        peak = max(self._log_posterior)
+        weights = [math.exp(value - peak) for value in self._log_posterior]
+        total = sum(weights)
+        mean = sum(w * theta for w, theta in zip(weights, self._grid)) / total
+        variance = sum(w * (theta - mean) ** 2 for w, theta in zip(weights, self._grid)) / total
+        return mean, math.sqrt(variance)
+
+def create_difficulty_engine(initial_difficulty: int, engine_type: str = "heuristic",
+                             **kwargs) -> ImprovedAdaptiveDifficultyEngine:
+    if engine_type == "irt":
+        return IRTAbilityEngine(initial_difficulty=initial_difficulty, **kwargs)
+    if engine_type == "heuristic":
+        return ImprovedAdaptiveDifficultyEngine(initial_difficulty=initial_difficulty, **kwargs)
+    raise ValueError(f"Unknown difficulty engine: {engine_type}")
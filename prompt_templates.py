@@ -0,0 +1,76 @@
+from typing import Dict, List, Optional, Tuple
+from string import Formatter
+import threading
+
+SYSTEM_ROLE = "You are an expert educational assessment designer. Generate high-quality, accurate educational content in proper JSON format."
+
+DOMAINS_PREFIX = """Break the subject given below into the requested number of distinct knowledge domains for an adaptive assessment that reveals the learner's true competency.
+Order them as a learning progression, foundational to advanced, each building on the previous ones (prerequisites, then applications, then mastery). Prefer practical, real-world competencies.
+For each domain give a clear English name, a description of the knowledge and skills it assesses, and an estimated difficulty from 1 to 100: foundations 20-40, application and analysis 40-70, synthesis and evaluation 70-90.
+Respond with a pure JSON array only: [{"domain_name": string, "description": string, "estimated_difficulty": integer}]"""
+
+_QUESTION_RULES = """Write one multiple-choice question for the domain and difficulty (1-100 scale) given below.
+Difficulty guide: 1-20 recall of definitions and fundamentals; 21-40 relationships, simple application; 41-60 application, comparison, patterns; 61-80 multi-step problems, synthesis, evaluation; 81-100 expert analysis and advanced synthesis.
+Target the listed knowledge gaps first, if any.
+Use clear, unambiguous English and real-world context where possible; no trick questions. Give exactly 4 options with one correct answer; the distractors should reveal common misconceptions or partial understanding."""
+_QUESTION_SCHEMA = """Respond with a pure JSON object only, echoing the given difficulty as difficulty_level: {"question": string, "options": [4 strings], "correct_answer_index": integer 0-3, "knowledge_tag": string, "difficulty_level": integer, "estimated_time": integer"""
+
+QUESTION_PREFIX = f"""{_QUESTION_RULES} The explanation should teach why the answer is right and the others are wrong. Estimate a realistic answer time in seconds.
+{_QUESTION_SCHEMA}, "explanation": string}}"""
+
+QUESTION_BRIEF_PREFIX = f"""{_QUESTION_RULES} Do not write an explanation. Estimate a realistic answer time in seconds.
+{_QUESTION_SCHEMA}}}"""
+
+EXPLANATION_PREFIX = """Explain each of the answered multiple-choice questions given below to the learner: in 2-4 sentences, teach why the correct answer is right and why the learner's answer, if different, is wrong, with a tip for remembering it.
+Respond with a pure JSON object only, one explanation per question in the given order: {"explanations": [string]}"""
+
+SUMMARY_PREFIX = """A learner finished a knowledge assessment on the subject given below, and its scores are already computed.
+Write only the narrative parts of the report: a short paragraph on the main weaknesses and learning gaps, 3-5 specific, actionable recommendations with learning resources (weakest domains first), and a one-sentence learning strategy for every domain in "domains".
+Respond with a pure JSON object only: {"weakness_summary": string, "recommendations": [string], "learning_strategy": {domain name: string}}"""
+
+TEMPLATE_SOURCES: Dict[str, Tuple[str, str]] = {
+    "domains": (DOMAINS_PREFIX, 'Subject: "{main_topic}"\nNumber of domains: {num_domains}'),
+    "question": (QUESTION_PREFIX, 'Domain: "{domain}"\nDifficulty: {difficulty}\nKnowledge gaps: {knowledge_gaps}'),
+    "question_brief": (QUESTION_BRIEF_PREFIX, 'Domain: "{domain}"\nDifficulty: {difficulty}\nKnowledge gaps: {knowledge_gaps}'),
+    "explanation": (EXPLANATION_PREFIX, "Questions: {questions}"),
+    "summary": (SUMMARY_PREFIX, "Subject: {main_topic}\nScores: {report}"),
+}
+
+
+class PromptTemplate:
+    """
+    A prompt split into a static prefix, built once and sent unchanged on every call as
+    the system message, and a small suffix holding the per-call values.
+    """
+    def __init__(self, name: str, prefix: str, suffix: str):
+        self.name = name
+        self.fields = frozenset(field for _, field, _, _ in Formatter().parse(suffix) if field)
+        self.suffix = suffix
+        self.prefix_message = {"role": "system", "content": f"{SYSTEM_ROLE}\n\n{prefix}"}
+
+    def render(self, **values) -> List[Dict[str, str]]:
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Prompt template {self.name} is missing {sorted(missing)}")
+        return [self.prefix_message, {"role": "user", "content": self.suffix.format(**values)}]
+
+
+def compile_prompt_templates() -> Dict[str, PromptTemplate]:
+    return {name: PromptTemplate(name, prefix, suffix) for name, (prefix, suffix) in TEMPLATE_SOURCES.items()}
+
+
+_templates: Optional[Dict[str, PromptTemplate]] = None
+_templates_lock = threading.Lock()
+
+
+def get_prompt_templates() -> Dict[str, PromptTemplate]:
+    global _templates
+    if _templates is None:
+        with _templates_lock:
+            if _templates is None:
+                _templates = compile_prompt_templates()
+    return _templates
+
+
+def get_prompt_template(name: str) -> PromptTemplate:
+    return get_prompt_templates()[name]
@@ -0,0 +1,73 @@
+from typing import Deque, Dict, Optional, Set
+from collections import deque
+import threading
+
+from config import CONFIG
+from item_stats import get_item_stats_store, item_key
+from models import Question
+
+
+def _domain_key(domain: str) -> str:
+    return " ".join(domain.lower().split())
+
+
+class QuestionBank:
+    """
+    Questions generated so far, per domain, so a session can be served without an LLM
+    call (e.g. once its token budget is spent). Selection targets the empirical item
+    difficulty where the item statistics store has enough answers, else the generated
+    difficulty. Each domain keeps at most max_per_domain questions, dropping the oldest.
+    """
+    def __init__(self, max_per_domain: int = 200):
+        self.max_per_domain = max_per_domain
+        self._domains: Dict[str, Deque[str]] = {}
+        self._questions: Dict[str, Question] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def add(self, domain: str, question: Question) -> str:
+        key = item_key(question)
+        with self._lock:
+            if key in self._questions:
+                return key
+            keys = self._domains.setdefault(_domain_key(domain), deque())
+            if len(keys) >= self.max_per_domain:
+                del self._questions[keys.popleft()]
+            keys.append(key)
+            self._questions[key] = question
+        return key
+
+    def select(self, domain: str, difficulty: int, exclude: Set[str]) -> Optional[Question]:
+        """
+        Returns the banked question for the domain closest to the target difficulty that
+        is not in exclude, or None.
+        """
+        store = get_item_stats_store()
+        with self._lock:
+            best_key = None
+            best_gap = float("inf")
+            for key in self._domains.get(_domain_key(domain), ()):
+                if key in exclude:
+                    continue
+                stats = store.get(key)
+                item_difficulty = (stats.empirical_difficulty(store.difficulty_scale) if stats
+                                   else self._questions[key].difficulty_level)
+                gap = abs(item_difficulty - difficulty)
+                if gap < best_gap:
+                    best_key, best_gap = key, gap
+            return self._questions[best_key] if best_key else None
+
+
+_bank: Optional[QuestionBank] = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> QuestionBank:
+    global _bank
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None:
+                _bank = QuestionBank(CONFIG["question_bank"]["max_per_domain"])
+    return _bank
@@ -1,39 +1,81 @@
-from typing import List, Optional, Dict, Any, Tuple
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Set, Tuple
+from collections import OrderedDict
+import math
 import time
+import uuid
 from models import (
-    DomainAssessment, Question, QuestionResponse, DomainStatus,
-    ImprovedAdaptiveDifficultyEngine, ConfidenceQualityMetrics
+    DomainAssessment, Question, DomainStatus,
+    ImprovedAdaptiveDifficultyEngine, ConfidenceQualityMetrics, create_difficulty_engine
 )
 from ai_service import AIService
 from config import CONFIG
+from deadline import can_cover, time_left
+from explanations import ExplanationBatcher
+from calibration_priors import get_prior_table
+from item_stats import get_item_stats_store, item_key
+from metrics import BUDGET_FALLBACKS, DEADLINE_FALLBACKS, QUESTIONS_SAVED
+from question_bank import get_question_bank
+from question_refill import take_pooled_question
+from token_accounting import current_ledger
+from response_log import get_response_log
+from tracing import traced
+
+def difficulty_engine_options(engine_type: str) -> Dict[str, Any]:
+    """
+    Returns the constructor options for the configured difficulty engine.
+    """
+    if engine_type == "irt":
+        return dict(CONFIG["difficulty"]["irt"])
+    return {
+        "base_step": CONFIG["difficulty"]["base_step"],
+        "max_change": CONFIG["difficulty"]["max_change"],
+    }
 
 class QuestionFlowManager:
-    def __init__(self):
-        self.ai_service = AIService()
+    def __init__(self, ai_service: Optional[AIService] = None):
+        self.ai_service = ai_service or AIService()
         self.current_domain_assessment: Optional[DomainAssessment] = None
         self.difficulty_engine: Optional[ImprovedAdaptiveDifficultyEngine] = None
         self.confidence_metrics: Optional[ConfidenceQualityMetrics] = None
         self.current_question: Optional[Question] = None
+        self.current_item_key: str = ""
+        self.asked_items: Set[str] = set()
+        self.current_item_difficulty: int = CONFIG["difficulty"]["default"]
         self.question_start_time: Optional[float] = None
         self.domain_progress: float = 0.0
+        self.current_topic: str = ""
+        self.domain_run_id: str = ""
+        self.explanations = ExplanationBatcher(self.ai_service, CONFIG["explanations"]["batch_size"])
+        self.answered_questions: "OrderedDict[str, Tuple[Question, int]]" = OrderedDict()
 
-    def start_domain_assessment(self, domain_assessment: DomainAssessment) -> bool:
+    def start_domain_assessment(self, domain_assessment: DomainAssessment, topic: str = "") -> bool:
         """
         Initializes an in-domain question session and sets the initial difficulty of the difficulty engine.
+        When a population prior exists for the topic/domain, the calibration and quality engines start from it.
         """
         try:
             self.current_domain_assessment = domain_assessment
+            self.current_topic = topic
+            self.domain_run_id = uuid.uuid4().hex
+            
+            prior = get_prior_table().lookup(topic, domain_assessment.domain_name)
             
-            self.difficulty_engine = ImprovedAdaptiveDifficultyEngine(
-                initial_difficulty=domain_assessment.current_difficulty
+            engine_type = CONFIG["difficulty"]["engine"]
+            self.difficulty_engine = create_difficulty_engine(
+                domain_assessment.current_difficulty,
+                engine_type,
+                calibration_prior=prior.bins if prior else None,
+                **difficulty_engine_options(engine_type)
             )
             
             self.confidence_metrics = ConfidenceQualityMetrics(
-                history_size=CONFIG["confidence"]["history_size"]
+                history_size=CONFIG["confidence"]["history_size"],
+                prior_score=prior.quality_score if prior else None,
+                prior_strength=CONFIG["confidence"]["priors"]["quality_strength"]
             )
             
             self.domain_progress = 0.0
+            self.asked_items = set()
             
             domain_assessment.status = DomainStatus.IN_PROGRESS
             
@@ -42,6 +84,7 @@ class QuestionFlowManager:
             print(f"Error starting domain assessment: {e}")
             return False
 
+    @traced("question_flow.generate_question")
     def generate_question(self) -> Optional[Question]:
         """
         Calls the AI service to generate a question that matches the current difficulty and knowledge gaps.
@@ -51,21 +94,79 @@ class QuestionFlowManager:
         
         try:
             current_difficulty = int(self.difficulty_engine.current_difficulty)
+            domain = self.current_domain_assessment.domain_name
             
-            question = self.ai_service.generate_assessment_question(
-                domain=self.current_domain_assessment.domain_name,
-                difficulty=current_difficulty,
-                knowledge_gaps=self.current_domain_assessment.knowledge_gaps
-            )
+            question = take_pooled_question(self.current_topic, domain, current_difficulty, self.asked_items)
+            if question is None:
+                question = self.banked_question_if_constrained(domain, current_difficulty)
+            if question is None:
+                question = self.ai_service.generate_assessment_question(
+                    domain=domain,
+                    difficulty=current_difficulty,
+                    knowledge_gaps=self.current_domain_assessment.current_knowledge_gaps(
+                        CONFIG["assessment"]["max_prompt_knowledge_gaps"]
+                    )
+                )
             
-            self.current_question = question
-            self.question_start_time = time.time()
+            self.present_question(question)
             
             return question
         except Exception as e:
             print(f"Error generating question: {e}")
             return None
 
+    def banked_question_if_constrained(self, domain: str, difficulty: int) -> Optional[Question]:
+        """
+        Once the session's token budget is spent, or when what is left of the request's
+        deadline cannot cover the expected generation latency, serves the closest banked
+        question not yet asked in this domain instead of calling the LLM. Without one,
+        generation goes ahead (with the leftover time as its timeout) and the overrun is
+        counted.
+        """
+        ledger = current_ledger()
+        over_budget = ledger is not None and ledger.exhausted()
+        out_of_time = not can_cover(self.ai_service.expected_latency("question", difficulty))
+        if not over_budget and not out_of_time:
+            return None
+        
+        question = get_question_bank().select(domain, difficulty, self.asked_items)
+        outcome = "bank" if question else "overrun"
+        if over_budget:
+            BUDGET_FALLBACKS.labels("question", outcome).inc()
+            if question:
+                ledger.record_fallback()
+        else:
+            DEADLINE_FALLBACKS.labels("question", outcome).inc()
+        return question
+
+    def present_question(self, question: Question):
+        """
+        Makes the question current and starts its response timer, for generated questions
+        as well as ones prepared ahead of time, and banks it for reuse.
+        """
+        self.current_question = question
+        self.set_item_expectations(question)
+        self.asked_items.add(self.current_item_key)
+        get_question_bank().add(self.current_domain_assessment.domain_name, question)
+        self.question_start_time = time.time()
+
+    def set_item_expectations(self, question: Question):
+        """
+        Looks up the item's empirical statistics. Once enough learners have answered it, its
+        observed difficulty and response time replace the generated difficulty_level and the
+        difficulty-based time expectation used by the difficulty engine.
+        """
+        store = get_item_stats_store()
+        self.current_item_key = item_key(question)
+        stats = store.get(self.current_item_key)
+        if stats is None:
+            self.current_item_difficulty = question.difficulty_level
+            self.difficulty_engine.item_expected_time = None
+        else:
+            self.current_item_difficulty = int(round(stats.empirical_difficulty(store.difficulty_scale)))
+            self.difficulty_engine.item_expected_time = stats.expected_response_time
+
+    @traced("question_flow.submit_answer")
     def submit_answer(self, answer_index: int, confidence: float) -> Dict[str, Any]:
         """
         Handles answer submission with all required functionality:
@@ -75,24 +176,21 @@ class QuestionFlowManager:
         4. Calls calculate_enhanced_progress_increment to calculate the progress increment
         5. If the answer is incorrect, records the knowledge tag to the weakness list
         6. Generates answer feedback including confidence quality feedback
-        7. Checks domain progress; if 100%, completes the domain assessment; otherwise, generates the next question
+        7. Checks domain progress; if 100% (or the early stopping rule fires), completes the domain assessment; otherwise, generates the next question
         """
         if not self.current_question or not self.current_domain_assessment or not self.difficulty_engine or not self.confidence_metrics:
             return {"error": "No active question or assessment"}
         
+        if not 0 <= answer_index < len(self.current_question.options):
+            return {"error": "Answer index is not one of the question's options"}
+        
         response_time = time.time() - self.question_start_time if self.question_start_time else 30.0
+        self.current_question.wait_complete(time_left(CONFIG["openai"]["explanation_wait_seconds"]))
         is_correct = answer_index == self.current_question.correct_answer_index
         
-        question_response = QuestionResponse(
-            question_id=f"{self.current_domain_assessment.domain_name}_{len(self.current_domain_assessment.response_history)}",
-            user_answer_index=answer_index,
-            is_correct=is_correct,
-            response_time=response_time,
-            confidence_level=confidence,
-            timestamp=datetime.now()
+        self.current_domain_assessment.response_history.record(
+            answer_index, is_correct, response_time, confidence
         )
-        
-        self.current_domain_assessment.response_history.append(question_response)
         self.current_domain_assessment.questions_attempted += 1
         
         if is_correct:
@@ -103,31 +201,49 @@ class QuestionFlowManager:
         
         self.confidence_metrics.add_data_point(system_confidence, is_correct)
         
-        self.difficulty_engine.update_difficulty(is_correct, response_time, system_confidence)
+        get_item_stats_store().record(
+            self.current_item_key, is_correct, response_time,
+            self.difficulty_engine.current_difficulty, system_confidence
+        )
+        
+        response_log = get_response_log()
+        if response_log is not None:
+            response_log.record(
+                topic=self.current_topic,
+                domain=self.current_domain_assessment.domain_name,
+                session=self.domain_run_id,
+                is_correct=is_correct,
+                response_time=response_time,
+                confidence=system_confidence,
+                user_confidence=confidence,
+                difficulty=self.current_item_difficulty,
+                item=self.current_item_key,
+                knowledge_tag=self.current_question.knowledge_tag,
+                timestamp=time.time()
+            )
+        
+        self.difficulty_engine.update_difficulty(
+            is_correct, response_time, system_confidence,
+            item_difficulty=self.current_item_difficulty
+        )
         
         self.current_domain_assessment.current_difficulty = int(self.difficulty_engine.current_difficulty)
         
         progress_increment = self.calculate_enhanced_progress_increment(
-            is_correct, system_confidence, self.current_question.difficulty_level, response_time
+            is_correct, system_confidence, self.current_item_difficulty, response_time
         )
         
         self.domain_progress += progress_increment
         self.domain_progress = min(100.0, self.domain_progress)  # Cap at 100%
         
-        if not is_correct:
-            knowledge_tag = self.current_question.knowledge_tag
-            if knowledge_tag not in self.current_domain_assessment.knowledge_gaps:
-                self.current_domain_assessment.knowledge_gaps.append(knowledge_tag)
-        else:
-            knowledge_tag = self.current_question.knowledge_tag
-            if knowledge_tag not in self.current_domain_assessment.mastery_areas:
-                self.current_domain_assessment.mastery_areas.append(knowledge_tag)
+        self.current_domain_assessment.record_knowledge_tag(self.current_question.knowledge_tag, is_correct)
         
-        total_time = sum(r.response_time for r in self.current_domain_assessment.response_history)
-        self.current_domain_assessment.average_response_time = total_time / len(self.current_domain_assessment.response_history)
+        self.current_domain_assessment.average_response_time = self.current_domain_assessment.response_history.average_response_time()
         
         self.current_domain_assessment.confidence_score = self.confidence_metrics.get_confidence_quality_score()
         
+        explanation_status = self.defer_explanation(is_correct, answer_index)
+        
         feedback = self.generate_enhanced_answer_feedback(
             is_correct, self.current_question.explanation, system_confidence
         )
@@ -136,6 +252,8 @@ class QuestionFlowManager:
             "is_correct": is_correct,
             "correct_answer": self.current_question.options[self.current_question.correct_answer_index],
             "explanation": self.current_question.explanation,
+            "explanation_status": explanation_status,
+            "question_id": self.current_item_key,
             "feedback": feedback,
             "progress": self.domain_progress,
             "confidence_quality": self.confidence_metrics.get_confidence_quality_score(),
@@ -146,7 +264,16 @@ class QuestionFlowManager:
             "knowledge_tag": self.current_question.knowledge_tag
         }
         
+        if self.domain_progress < 100.0 and self.should_stop_early():
+            questions_saved = self.estimate_remaining_questions()
+            self.domain_progress = 100.0
+            result["progress"] = self.domain_progress
+            result["stopped_early"] = True
+            result["questions_saved"] = questions_saved
+            QUESTIONS_SAVED.inc(questions_saved)
+        
         if self.domain_progress >= 100.0:
+            self.explanations.flush()
             completion_result = self.complete_domain_assessment()
             result["domain_complete"] = True
             result["domain_status"] = completion_result["status"]
@@ -157,6 +284,85 @@ class QuestionFlowManager:
         
         return result
 
+    def defer_explanation(self, is_correct: bool, answer_index: int) -> str:
+        """
+        Keeps the answered question so its explanation can be requested later. A question
+        generated without an explanation is queued for one when the answer was wrong;
+        for a right answer it is only written if the learner asks (get_explanation).
+        """
+        self.answered_questions[self.current_item_key] = (self.current_question, answer_index)
+        self.answered_questions.move_to_end(self.current_item_key)
+        while len(self.answered_questions) > CONFIG["explanations"]["answered_questions_kept"]:
+            self.answered_questions.popitem(last=False)
+        
+        if self.current_question.explanation:
+            return "ready"
+        if self.current_question.pending is not None:
+            return "pending"
+        if not is_correct and CONFIG["explanations"]["explain_incorrect"]:
+            self.explanations.request(self.current_question, answer_index)
+            return "pending"
+        return "on_request"
+
+    def get_explanation(self, question_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the explanation of an answered question, generating it now if it has not
+        been written yet. None if the question is unknown or was never answered.
+        """
+        entry = self.answered_questions.get(question_id)
+        if entry is None:
+            return None
+        question, answer_index = entry
+        wait_seconds = CONFIG["openai"]["explanation_wait_seconds"]
+        if not question.explanation and question.pending is not None:
+            question.wait_complete(time_left(wait_seconds))
+        if not question.explanation and question.pending is None:
+            future = self.explanations.request(question, answer_index, urgent=True)
+            if future is not None:
+                try:
+                    future.result(time_left(wait_seconds))
+                except Exception as e:
+                    print(f"Error waiting for explanation: {e}")
+        return {
+            "question_id": question_id,
+            "explanation": question.explanation,
+            "explanation_status": "ready" if question.explanation else "unavailable",
+        }
+
+    def should_stop_early(self) -> bool:
+        """
+        Optional stopping rule: ends the domain once the difficulty engine's estimate is
+        stable (standard error for the IRT engine, difficulty spread for the heuristic one),
+        after at least the minimum number of questions.
+        """
+        rule = CONFIG["assessment"]["early_termination"]
+        if not rule["enabled"] or not self.difficulty_engine or not self.current_domain_assessment:
+            return False
+        
+        if self.current_domain_assessment.questions_attempted < CONFIG["assessment"]["min_questions"]:
+            return False
+        
+        return self.difficulty_engine.is_estimate_stable(
+            rule["max_standard_error"], rule["max_difficulty_range"]
+        )
+
+    def estimate_remaining_questions(self) -> int:
+        """
+        Estimates how many more questions the progress formula would have needed,
+        extrapolating the average progress per question so far. max_questions only scales
+        the progress increment and does not end a domain, so it does not bound the estimate.
+        """
+        if not self.current_domain_assessment:
+            return 0
+        
+        attempted = self.current_domain_assessment.questions_attempted
+        remaining_progress = 100.0 - self.domain_progress
+        average_increment = self.domain_progress / attempted if attempted else 0.0
+        
+        if average_increment > 0:
+            return max(0, math.ceil(remaining_progress / average_increment))
+        return max(0, CONFIG["assessment"]["max_questions"] - attempted)
+
     def calculate_enhanced_progress_increment(self, is_correct: bool, confidence: float, 
                                             difficulty: int, response_time: float) -> float:
         """
@@ -254,7 +460,7 @@ class QuestionFlowManager:
         
         self.current_domain_assessment.status = status
         
-        avg_confidence = sum(r.confidence_level for r in self.current_domain_assessment.response_history) / len(self.current_domain_assessment.response_history)
+        avg_confidence = self.current_domain_assessment.response_history.average_confidence()
         avg_difficulty = 0.5
         if self.difficulty_engine and self.difficulty_engine.recent_performance:
             avg_difficulty = sum(self.difficulty_engine.recent_performance) / len(self.difficulty_engine.recent_performance)
@@ -298,5 +504,6 @@ class QuestionFlowManager:
         self.difficulty_engine = None
         self.confidence_metrics = None
         self.current_question = None
+        self.current_item_key = ""
         self.question_start_time = None
         self.domain_progress = 0.0
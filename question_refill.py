@@ -0,0 +1,226 @@
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from collections import deque
+import threading
+import time
+
+from ai_service import AIService
+from config import CONFIG
+from item_stats import item_key
+from metrics import QUESTION_POOL_DEPTH, QUESTION_POOL_REFILLS, QUESTION_POOL_STARVATION, record_cache_lookup
+from models import Question
+
+PoolKey = Tuple[str, str, int]  # normalized topic, normalized domain, difficulty band
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class DemandTracker:
+    """
+    Decaying LFU counters of question demand per (topic, domain, difficulty band). Each
+    hit adds its weight and scores halve every half_life seconds, so a key drops out of
+    the ranking once traffic for it stops.
+    """
+    def __init__(self, half_life: float = 1800.0, band_width: int = 20):
+        self.half_life = half_life
+        self.band_width = band_width
+        self._scores: Dict[PoolKey, Tuple[float, float]] = {}
+        self._names: Dict[PoolKey, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def key(self, topic: str, domain: str, difficulty: int) -> PoolKey:
+        return (_normalize(topic), _normalize(domain), int(difficulty) // self.band_width)
+
+    def band_difficulty(self, key: PoolKey) -> int:
+        """Difficulty at the middle of the key's band, used to generate its questions."""
+        return min(CONFIG["difficulty"]["max"], key[2] * self.band_width + self.band_width // 2)
+
+    def names(self, key: PoolKey) -> Tuple[str, str]:
+        return self._names[key]
+
+    def record(self, topic: str, domain: str, difficulty: int, weight: float = 1.0) -> PoolKey:
+        key = self.key(topic, domain, difficulty)
+        now = time.monotonic()
+        with self._lock:
+            self._scores[key] = (self._decayed(key, now) + weight, now)
+            self._names[key] = (topic, domain)
+        return key
+
+    def score(self, key: PoolKey) -> float:
+        with self._lock:
+            return self._decayed(key, time.monotonic())
+
+    def _decayed(self, key: PoolKey, now: float) -> float:
+        entry = self._scores.get(key)
+        if entry is None:
+            return 0.0
+        return entry[0] * 0.5 ** ((now - entry[1]) / self.half_life)
+
+    def hottest(self, limit: int, min_score: float) -> List[Tuple[PoolKey, float]]:
+        now = time.monotonic()
+        with self._lock:
+            scored = [(key, self._decayed(key, now)) for key in self._scores]
+        scored = [entry for entry in scored if entry[1] >= min_score]
+        scored.sort(key=lambda entry: entry[1], reverse=True)
+        return scored[:limit]
+
+    def forget_below(self, min_score: float) -> List[PoolKey]:
+        now = time.monotonic()
+        with self._lock:
+            cold = [key for key in self._scores if self._decayed(key, now) < min_score]
+            for key in cold:
+                del self._scores[key]
+                del self._names[key]
+        return cold
+
+
+class QuestionPool:
+    """
+    Generated questions not yet served to anyone, per demand key. Unlike the question
+    bank, taking a question removes it from the pool.
+    """
+    def __init__(self):
+        self._pools: Dict[PoolKey, Deque[Question]] = {}
+        self._depth = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._depth
+
+    def depth(self, key: PoolKey) -> int:
+        return len(self._pools.get(key, ()))
+
+    def add(self, key: PoolKey, question: Question):
+        with self._lock:
+            self._pools.setdefault(key, deque()).append(question)
+            self._depth += 1
+            QUESTION_POOL_DEPTH.set(self._depth)
+
+    def take(self, key: PoolKey, exclude: Set[str]) -> Optional[Question]:
+        with self._lock:
+            pool = self._pools.get(key)
+            if not pool:
+                return None
+            for question in pool:
+                if item_key(question) not in exclude:
+                    pool.remove(question)
+                    self._depth -= 1
+                    QUESTION_POOL_DEPTH.set(self._depth)
+                    return question
+        return None
+
+    def drop(self, key: PoolKey):
+        with self._lock:
+            pool = self._pools.pop(key, None)
+            if pool:
+                self._depth -= len(pool)
+                QUESTION_POOL_DEPTH.set(self._depth)
+
+
+class QuestionRefiller:
+    """
+    Keeps the pools of the most requested keys topped up to target_depth. A daemon thread
+    wakes every interval_seconds and, while no more than idle_max_inflight LLM calls are
+    running and the refill rate limit allows, generates questions for the hot keys that
+    are furthest below target. Keys whose demand has decayed below drop_score are
+    forgotten and their pools dropped, so refilling stops when demand fades.
+    """
+    def __init__(self, ai_service: AIService, tracker: DemandTracker, pool: QuestionPool,
+                 settings: Dict[str, float]):
+        self.ai_service = ai_service
+        self.tracker = tracker
+        self.pool = pool
+        self.settings = settings
+        self._calls: Deque[float] = deque()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None or self.ai_service.use_mock:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="question-refill", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.settings["interval_seconds"]):
+            try:
+                self.refill_once()
+            except Exception as e:
+                print(f"Error refilling question pools: {e}")
+
+    def refill_once(self) -> int:
+        for key in self.tracker.forget_below(self.settings["drop_score"]):
+            self.pool.drop(key)
+
+        generated = 0
+        target = self.settings["target_depth"]
+        while not self._stop.is_set():
+            candidates = [
+                (key, score) for key, score in self.tracker.hottest(self.settings["max_keys"], self.settings["min_score"])
+                if self.pool.depth(key) < target
+            ]
+            if not candidates:
+                break
+            if self.ai_service.inflight_calls() > self.settings["idle_max_inflight"]:
+                QUESTION_POOL_REFILLS.labels("busy").inc()
+                break
+            if not self._acquire_call():
+                QUESTION_POOL_REFILLS.labels("rate_limited").inc()
+                break
+
+            key = min(candidates, key=lambda entry: (self.pool.depth(entry[0]), -entry[1]))[0]
+            topic, domain = self.tracker.names(key)
+            try:
+                question = self.ai_service.generate_assessment_question(
+                    domain, self.tracker.band_difficulty(key), [], allow_mock=False
+                )
+            except Exception as e:
+                QUESTION_POOL_REFILLS.labels("error").inc()
+                print(f"Error generating pool question for {topic} / {domain}: {e}")
+                break
+            self.pool.add(key, question)
+            QUESTION_POOL_REFILLS.labels("generated").inc()
+            generated += 1
+        return generated
+
+    def _acquire_call(self) -> bool:
+        now = time.monotonic()
+        while self._calls and now - self._calls[0] > 60.0:
+            self._calls.popleft()
+        if len(self._calls) >= self.settings["max_calls_per_minute"]:
+            return False
+        self._calls.append(now)
+        return True
+
+
+demand_tracker = DemandTracker(CONFIG["refill"]["half_life_seconds"], CONFIG["refill"]["band_width"])
+question_pool = QuestionPool()
+
+
+def record_demand(topic: str, domain: str, difficulty: int):
+    if CONFIG["refill"]["enabled"]:
+        demand_tracker.record(topic, domain, difficulty)
+
+
+def take_pooled_question(topic: str, domain: str, difficulty: int, exclude: Set[str]) -> Optional[Question]:
+    """
+    Serves a ready question for the demand key, if its pool has one not in exclude. An
+    empty pool for a key hot enough to be refilled counts as starvation.
+    """
+    if not CONFIG["refill"]["enabled"]:
+        return None
+    key = demand_tracker.key(topic, domain, difficulty)
+    question = question_pool.take(key, exclude)
+    record_cache_lookup("question_pool", question is not None)
+    if question is None and demand_tracker.score(key) >= CONFIG["refill"]["min_score"]:
+        QUESTION_POOL_STARVATION.inc()
+    return question
@@ -0,0 +1,69 @@
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future
+import threading
+
+from ai_service import AIService
+from background import submit_background
+from metrics import record_cache_lookup
+from models import AssessmentSession, Question
+
+
+class QuestionWarmup:
+    """
+    Generates the opening question of a session's domains in the background as soon as
+    the domains are known, so /start-domain can usually return without an LLM call.
+    Domain 0 is scheduled immediately; later domains, when enabled, are scheduled one at
+    a time after the previous one finishes so they never compete with it.
+    """
+    def __init__(self, ai_service: AIService):
+        self.ai_service = ai_service
+        self._slots: Dict[Tuple[str, int], Tuple[int, Future]] = {}
+        self._active_session = ""
+        self._lock = threading.Lock()
+
+    def warm_session(self, session: AssessmentSession, later_domains: bool = False):
+        self._active_session = session.session_id
+        self.discard_other_sessions(session.session_id)
+        count = len(session.domain_assessments) if later_domains else 1
+        self._schedule(session, list(range(min(count, len(session.domain_assessments)))))
+
+    def _schedule(self, session: AssessmentSession, indexes: List[int]):
+        if not indexes or session.session_id != self._active_session:
+            return
+        index, remaining = indexes[0], indexes[1:]
+        domain_assessment = session.domain_assessments[index]
+        difficulty = domain_assessment.current_difficulty
+        future = submit_background(
+            self.ai_service.generate_assessment_question, domain_assessment.domain_name, difficulty, []
+        )
+        with self._lock:
+            self._slots[(session.session_id, index)] = (difficulty, future)
+        if remaining:
+            future.add_done_callback(lambda _: self._schedule(session, remaining))
+
+    def take(self, session_id: str, domain_index: int, difficulty: int,
+             timeout: Optional[float] = None) -> Optional[Question]:
+        """
+        Returns the warmed opening question for the domain if it was generated for the
+        requested difficulty, waiting up to timeout for one still in flight. The slot is
+        consumed either way.
+        """
+        with self._lock:
+            slot = self._slots.pop((session_id, domain_index), None)
+        if slot is None or slot[0] != difficulty:
+            record_cache_lookup("first_question", False)
+            return None
+        record_cache_lookup("first_question", slot[1].done())
+        try:
+            return slot[1].result(timeout)
+        except Exception as e:
+            print(f"Error waiting for warmed question: {e}")
+            return None
+
+    def discard_other_sessions(self, session_id: str):
+        with self._lock:
+            for key in [key for key in self._slots if key[0] != session_id]:
+                del self._slots[key]
+
+    def __len__(self) -> int:
+        return len(self._slots)
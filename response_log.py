@@ -0,0 +1,57 @@
+from typing import Any, List, Optional
+import atexit
+import json
+import threading
+from config import CONFIG
+
+
+class ResponseLog:
+    """
+    Appends answered-question records to a local JSONL file in batches. It is the input
+    for offline jobs such as calibration_priors.py.
+    """
+    def __init__(self, path: str, batch_size: int = 64):
+        self.path = path
+        self.batch_size = batch_size
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, **fields: Any):
+        line = json.dumps(fields, default=str) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) < self.batch_size:
+                return
+            batch, self._buffer = self._buffer, []
+        self._write(batch)
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        self._write(batch)
+
+    def _write(self, batch: List[str]):
+        if not batch:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(batch))
+        except OSError as e:
+            print(f"Error writing response log: {e}")
+
+
+_response_log: Optional[ResponseLog] = None
+
+
+def get_response_log() -> Optional[ResponseLog]:
+    """
+    Returns the process-wide response log, or None when RESPONSE_LOG_PATH is unset.
+    """
+    global _response_log
+    path = CONFIG["confidence"]["response_log_path"]
+    if not path:
+        return None
+    if _response_log is None:
+        _response_log = ResponseLog(path)
+        atexit.register(_response_log.flush)
+    return _response_log
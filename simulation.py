@@ -0,0 +1,270 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import argparse
+import copy
+import itertools
+import json
+import math
+import os
+import random
+import time
+
+from config import CONFIG
+from models import ConfidenceQualityMetrics, DomainAssessment, create_difficulty_engine
+from question_flow import QuestionFlowManager, difficulty_engine_options
+
+MAX_SIMULATED_QUESTIONS = 200
+
+_BASELINE_CONFIG = copy.deepcopy(CONFIG)
+
+
+@dataclass
+class LearnerModel:
+    """
+    Synthetic learner: answers correctly with a logistic probability of the gap between
+    true ability and item difficulty (plus a guessing floor), and takes a log-normally
+    distributed time around the expected time for the item.
+    """
+    ability_mean: float = 50.0
+    ability_sd: float = 20.0
+    logit_scale: float = 12.5  # difficulty points per logit
+    guessing: float = 0.25
+    time_noise: float = 0.35
+    start_difficulty: int = 50
+
+    def sample_ability(self, rng: random.Random) -> float:
+        return max(1.0, min(100.0, rng.gauss(self.ability_mean, self.ability_sd)))
+
+    def answer(self, rng: random.Random, ability: float, difficulty: float) -> Tuple[bool, float]:
+        gap = (ability - difficulty) / self.logit_scale
+        p_correct = self.guessing + (1 - self.guessing) / (1 + math.exp(-gap))
+        is_correct = rng.random() < p_correct
+
+        expected_time = CONFIG["timing"]["expected_base"] + (difficulty / 100) * 30
+        # Items far below the learner's level are answered faster.
+        speed = math.exp(-0.25 * max(-2.0, min(2.0, gap)))
+        response_time = expected_time * speed * math.exp(rng.gauss(0.0, self.time_noise))
+        return is_correct, response_time
+
+
+def apply_overrides(overrides: Dict[str, Any]):
+    """
+    Resets CONFIG to its baseline and applies dotted-path overrides such as
+    {"difficulty.max_change": 10, "scoring.base_points": 8}.
+    """
+    for key, value in copy.deepcopy(_BASELINE_CONFIG).items():
+        CONFIG[key] = value
+    for path, value in overrides.items():
+        section = CONFIG
+        *parents, leaf = path.split(".")
+        for name in parents:
+            section = section[name]
+        if leaf not in section:
+            raise KeyError(f"Unknown config key: {path}")
+        section[leaf] = value
+
+
+def simulate_session(flow: QuestionFlowManager, learner: LearnerModel, rng: random.Random) -> Dict[str, Any]:
+    """
+    Runs one domain for one synthetic learner through the same engine updates, progress
+    formula, stopping rule and completion logic as QuestionFlowManager.submit_answer.
+    """
+    ability = learner.sample_ability(rng)
+    engine_type = CONFIG["difficulty"]["engine"]
+    domain_assessment = DomainAssessment("simulated", current_difficulty=learner.start_difficulty)
+
+    flow.current_domain_assessment = domain_assessment
+    flow.difficulty_engine = create_difficulty_engine(
+        learner.start_difficulty, engine_type, **difficulty_engine_options(engine_type)
+    )
+    flow.confidence_metrics = ConfidenceQualityMetrics(history_size=CONFIG["confidence"]["history_size"])
+    flow.domain_progress = 0.0
+
+    engine = flow.difficulty_engine
+    stopped_early = False
+
+    while flow.domain_progress < 100.0 and domain_assessment.questions_attempted < MAX_SIMULATED_QUESTIONS:
+        item_difficulty = int(engine.current_difficulty)
+        is_correct, response_time = learner.answer(rng, ability, item_difficulty)
+
+        domain_assessment.response_history.record(0, is_correct, response_time, 0.5, 0.0)
+        domain_assessment.questions_attempted += 1
+        if is_correct:
+            domain_assessment.questions_correct += 1
+
+        system_confidence = engine.calculate_system_confidence(is_correct, response_time)
+        flow.confidence_metrics.add_data_point(system_confidence, is_correct)
+        engine.update_difficulty(is_correct, response_time, system_confidence, item_difficulty=item_difficulty)
+
+        flow.domain_progress = min(100.0, flow.domain_progress + flow.calculate_enhanced_progress_increment(
+            is_correct, system_confidence, item_difficulty, response_time
+        ))
+
+        if flow.domain_progress < 100.0 and flow.should_stop_early():
+            stopped_early = True
+            break
+
+    finished = flow.domain_progress >= 100.0 or stopped_early
+    status = flow.complete_domain_assessment()["status"] if finished else "unfinished"
+
+    return {
+        "questions": domain_assessment.questions_attempted,
+        "estimate_error": abs(engine.current_difficulty - ability),
+        "status": status,
+        "stopped_early": stopped_early,
+    }
+
+
+def _run_batch(task: Tuple[int, Dict[str, Any], Dict[str, Any], int, int]) -> Dict[str, Any]:
+    config_index, overrides, learner_options, sessions, seed = task
+    apply_overrides(overrides)
+
+    from tracing import tracer
+    tracer.enabled = False
+
+    rng = random.Random(seed)
+    learner = LearnerModel(**learner_options)
+    flow = QuestionFlowManager()
+
+    question_counts: Counter = Counter()
+    statuses: Counter = Counter()
+    error_total = 0.0
+    early_stops = 0
+    for _ in range(sessions):
+        outcome = simulate_session(flow, learner, rng)
+        question_counts[outcome["questions"]] += 1
+        statuses[outcome["status"]] += 1
+        error_total += outcome["estimate_error"]
+        early_stops += outcome["stopped_early"]
+
+    return {
+        "config_index": config_index,
+        "sessions": sessions,
+        "question_counts": dict(question_counts),
+        "statuses": dict(statuses),
+        "error_total": error_total,
+        "early_stops": early_stops,
+    }
+
+
+def _percentile(counts: Dict[int, int], total: int, fraction: float) -> int:
+    threshold = fraction * total
+    running = 0
+    for value in sorted(counts):
+        running += counts[value]
+        if running >= threshold:
+            return value
+    return 0
+
+
+def summarize(overrides: Dict[str, Any], batches: List[Dict[str, Any]]) -> Dict[str, Any]:
+    question_counts: Counter = Counter()
+    statuses: Counter = Counter()
+    sessions = 0
+    error_total = 0.0
+    early_stops = 0
+    for batch in batches:
+        question_counts.update({int(k): v for k, v in batch["question_counts"].items()})
+        statuses.update(batch["statuses"])
+        sessions += batch["sessions"]
+        error_total += batch["error_total"]
+        early_stops += batch["early_stops"]
+
+    total_questions = sum(q * n for q, n in question_counts.items())
+    return {
+        "overrides": overrides,
+        "sessions": sessions,
+        "mean_questions": round(total_questions / sessions, 3) if sessions else 0.0,
+        "p50_questions": _percentile(question_counts, sessions, 0.5),
+        "p90_questions": _percentile(question_counts, sessions, 0.9),
+        "mean_estimate_error": round(error_total / sessions, 3) if sessions else 0.0,
+        "early_stop_rate": round(early_stops / sessions, 4) if sessions else 0.0,
+        "status_distribution": {k: round(v / sessions, 4) for k, v in sorted(statuses.items())},
+    }
+
+
+def run_simulation(configs: List[Dict[str, Any]], sessions_per_config: int,
+                   learner_options: Optional[Dict[str, Any]] = None, workers: Optional[int] = None,
+                   batch_size: int = 2000, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Simulates sessions_per_config learners for every config override set on a process
+    pool and returns per-config summaries sorted by mean questions per session.
+    """
+    learner_options = learner_options or {}
+    tasks = []
+    for config_index, overrides in enumerate(configs):
+        remaining = sessions_per_config
+        batch_index = 0
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            tasks.append((config_index, overrides, learner_options, size,
+                          seed * 1_000_003 + config_index * 10_007 + batch_index))
+            remaining -= size
+            batch_index += 1
+
+    results: Dict[int, List[Dict[str, Any]]] = {i: [] for i in range(len(configs))}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for batch in executor.map(_run_batch, tasks):
+            results[batch["config_index"]].append(batch)
+
+    summaries = [summarize(configs[i], results[i]) for i in range(len(configs))]
+    return sorted(summaries, key=lambda summary: summary["mean_questions"])
+
+
+def _parse_value(raw: str) -> Any:
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        return raw
+
+
+def build_config_grid(settings: List[str]) -> List[Dict[str, Any]]:
+    """
+    Expands --set arguments like "difficulty.max_change=10,15,20" into the cartesian
+    product of override dicts.
+    """
+    axes = []
+    for setting in settings:
+        path, _, values = setting.partition("=")
+        axes.append([(path, _parse_value(value)) for value in values.split(",")])
+    return [dict(combination) for combination in itertools.product(*axes)] or [{}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of adaptive domain assessments.")
+    parser.add_argument("--sessions", type=int, default=10000, help="simulated sessions per config")
+    parser.add_argument("--set", dest="settings", action="append", default=[],
+                        help="dotted CONFIG path and comma-separated values, e.g. difficulty.max_change=10,15")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ability-mean", type=float, default=50.0)
+    parser.add_argument("--ability-sd", type=float, default=20.0)
+    parser.add_argument("--time-noise", type=float, default=0.35)
+    parser.add_argument("--json", dest="json_path", default=None, help="write summaries to this file")
+    args = parser.parse_args()
+
+    configs = build_config_grid(args.settings)
+    learner_options = {
+        "ability_mean": args.ability_mean,
+        "ability_sd": args.ability_sd,
+        "time_noise": args.time_noise,
+    }
+
+    start = time.perf_counter()
+    summaries = run_simulation(configs, args.sessions, learner_options, args.workers, args.batch_size, args.seed)
+    elapsed = time.perf_counter() - start
+
+    for summary in summaries:
+        print(json.dumps(summary))
+    print(f"Simulated {args.sessions * len(configs)} sessions in {elapsed:.1f}s")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,7 @@ export default function AssessmentInProgress() {
   const [isLoading, setIsLoading] = useState(false)
   const [feedback, setFeedback] = useState<string>('')
   const [showFeedback, setShowFeedback] = useState(false)
+  const [explanationQuestionId, setExplanationQuestionId] = useState<string | null>(null)
 
   useEffect(() => {
     const assessmentData = location.state?.assessmentData
@@ -72,6 +73,26 @@ export default function AssessmentInProgress() {
     }
   }
 
+  const handleShowExplanation = async () => {
+    if (!explanationQuestionId) return
+
+    const questionId = explanationQuestionId
+    setExplanationQuestionId(null)
+    try {
+      const response = await fetch(
+        `${import.meta.env.VITE_API_URL}/explanation?question_id=${encodeURIComponent(questionId)}`
+      )
+      if (response.ok) {
+        const data = await response.json()
+        if (data.explanation) {
+          setFeedback((current) => `${current}\n\n${data.explanation}`)
+        }
+      }
+    } catch (error) {
+      console.error('Error fetching explanation:', error)
+    }
+  }
+
   const handleSubmitAnswer = async () => {
     if (!selectedAnswer || selectedDomain === null) return
 
@@ -95,6 +116,7 @@ export default function AssessmentInProgress() {
         if (data.feedback) {
           setFeedback(data.feedback)
           setShowFeedback(true)
+          setExplanationQuestionId(data.explanation_status === 'ready' ? null : data.question_id ?? null)
           
           setTimeout(() => {
             setShowFeedback(false)
@@ -227,6 +249,11 @@ export default function AssessmentInProgress() {
                   <div className="text-sm text-blue-800 whitespace-pre-line">
                     {feedback}
                   </div>
+                  {explanationQuestionId && (
+                    <Button variant="link" className="px-0 text-blue-700" onClick={handleShowExplanation}>
+                      Show explanation
+                    </Button>
+                  )}
                 </div>
               )}
               
@@ -16,20 +16,47 @@ interface AssessmentSummary {
   strengths: string[]
   areas_for_improvement: string[]
   recommendations: string[]
+  weakness_summary?: string
+  narrative_status?: string
   detailed_breakdown: Record<string, {
     score: number
     status: string
     key_strengths: string[]
     improvement_areas: string[]
+    learning_strategy?: string
   }>
 }
 
+const NARRATIVE_POLL_INTERVAL_MS = 2000
+const NARRATIVE_MAX_POLLS = 30
+
 export default function AssessmentSummary() {
   const navigate = useNavigate()
   const [summary, setSummary] = useState<AssessmentSummary | null>(null)
   const [isLoading, setIsLoading] = useState(true)
 
   useEffect(() => {
+    let cancelled = false
+
+    // The report is computed locally; the LLM-written narrative arrives later and is merged in.
+    const pollNarrative = async () => {
+      for (let attempt = 0; attempt < NARRATIVE_MAX_POLLS && !cancelled; attempt++) {
+        await new Promise((resolve) => setTimeout(resolve, NARRATIVE_POLL_INTERVAL_MS))
+        try {
+          const response = await fetch(`${import.meta.env.VITE_API_URL}/summary-narrative`)
+          if (!response.ok) return
+          const data = await response.json()
+          if (data.narrative_status !== 'pending') {
+            if (!cancelled) setSummary(data.summary)
+            return
+          }
+        } catch (error) {
+          console.error('Error fetching summary narrative:', error)
+          return
+        }
+      }
+    }
+
     const fetchSummary = async () => {
       try {
         const response = await fetch(`${import.meta.env.VITE_API_URL}/generate-summary`, {
@@ -41,7 +68,11 @@ export default function AssessmentSummary() {
 
         if (response.ok) {
           const data = await response.json()
-          setSummary(data)
+          const report: AssessmentSummary = data.summary ?? data
+          setSummary(report)
+          if (report.narrative_status === 'pending') {
+            pollNarrative()
+          }
         }
       } catch (error) {
         console.error('Error fetching summary:', error)
@@ -51,6 +82,9 @@ export default function AssessmentSummary() {
     }
 
     fetchSummary()
+    return () => {
+      cancelled = true
+    }
   }, [])
 
   const getScoreColor = (score: number) => {
@@ -215,6 +249,9 @@ export default function AssessmentSummary() {
               <CardTitle className="text-orange-600">Areas for Improvement</CardTitle>
             </CardHeader>
             <CardContent>
+              {summary.weakness_summary && (
+                <p className="text-sm text-gray-700 mb-4">{summary.weakness_summary}</p>
+              )}
               <ul className="space-y-2">
                 {summary.areas_for_improvement.map((area, index) => (
                   <li key={index} className="flex items-start gap-2">
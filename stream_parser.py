@@ -0,0 +1,59 @@
+from typing import Any, Dict, Iterable
+import json
+
+
+class IncrementalJSONObject:
+    """
+    Parses a streamed JSON object one chunk at a time and exposes each top-level member
+    as soon as its value is complete, so callers can act on the leading fields before
+    the rest of the object has arrived. Text before the opening brace (e.g. a markdown
+    fence) is skipped.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+        self.closed = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = -1
+
+    def feed(self, text: str):
+        self.buffer += text
+        buffer = self.buffer
+        for i in range(self._pos, len(buffer)):
+            if self.closed:
+                break
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = self._depth > 0
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = i + 1
+            elif char in "}]":
+                if self._depth == 1:
+                    self._close_member(i)
+                    self.closed = True
+                self._depth -= 1
+            elif char == "," and self._depth == 1:
+                self._close_member(i)
+                self._member_start = i + 1
+        self._pos = len(buffer)
+
+    def _close_member(self, end: int):
+        member = self.buffer[self._member_start:end]
+        if member.strip():
+            self.fields.update(json.loads("{" + member + "}"))
+
+    def has(self, names: Iterable[str]) -> bool:
+        return all(name in self.fields for name in names)
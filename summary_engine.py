@@ -0,0 +1,248 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future
+import hashlib
+import json
+import threading
+
+from config import CONFIG
+from metrics import record_cache_lookup
+from models import AssessmentSession, DomainAssessment, DomainStatus
+
+KNOWLEDGE_LEVELS = (
+    (40.0, "Beginner"),
+    (70.0, "Intermediate"),
+    (85.0, "Advanced"),
+    (100.0, "Expert"),
+)
+
+_STATUS_STRATEGIES = {
+    DomainStatus.MASTERED: "Move on to advanced applications and teach the material to consolidate it.",
+    DomainStatus.COMPLETED: "Practise harder problems on the listed gaps until they feel routine.",
+    DomainStatus.STRUGGLING: "Rebuild the fundamentals first, then retest with short, focused question sets.",
+    DomainStatus.IN_PROGRESS: "Finish the domain assessment to get a reliable picture.",
+    DomainStatus.NOT_STARTED: "Not assessed yet.",
+}
+
+
+def knowledge_level(score: float) -> str:
+    """Maps an overall accuracy percentage to the report's knowledge level band."""
+    for upper, level in KNOWLEDGE_LEVELS:
+        if score <= upper:
+            return level
+    return KNOWLEDGE_LEVELS[-1][1]
+
+
+def _domain_score(domain_assessment: DomainAssessment) -> float:
+    if not domain_assessment.questions_attempted:
+        return 0.0
+    return round(domain_assessment.questions_correct / domain_assessment.questions_attempted * 100, 1)
+
+
+def _strong_tags(domain_assessment: DomainAssessment, limit: int) -> List[str]:
+    tracker = domain_assessment.tag_tracker
+    return [tag for tag in domain_assessment.mastery_areas if tracker.hits(tag) > tracker.misses(tag)][:limit]
+
+
+def build_local_summary(main_topic: str, domain_assessments: List[DomainAssessment],
+                        total_time: float) -> Dict[str, Any]:
+    """
+    Builds the complete assessment report from the recorded domain data: scores, knowledge
+    level, strengths, improvement areas and the per-domain breakdown. The narrative fields
+    are filled with deterministic text until the LLM enrichment is merged in.
+    """
+    gap_limit = CONFIG["assessment"]["max_prompt_knowledge_gaps"]
+    passing_score = CONFIG["scoring"]["domain_completed_score"]
+
+    total_attempted = sum(da.questions_attempted for da in domain_assessments)
+    total_correct = sum(da.questions_correct for da in domain_assessments)
+    overall_score = round(total_correct / total_attempted * 100, 1) if total_attempted else 0.0
+
+    assessed = [da for da in domain_assessments if da.questions_attempted > 0]
+    ranked = sorted(assessed, key=_domain_score, reverse=True)
+
+    strengths = [f"{da.domain_name} ({_domain_score(da)}%)" for da in ranked if _domain_score(da) >= passing_score]
+    if not strengths and ranked:
+        strengths.append(f"{ranked[0].domain_name} was your strongest domain ({_domain_score(ranked[0])}%)")
+    for da in ranked:
+        strengths.extend(_strong_tags(da, 2))
+
+    areas_for_improvement = []
+    for da in reversed(ranked):
+        gaps = da.current_knowledge_gaps(gap_limit)
+        if _domain_score(da) < passing_score:
+            detail = f": {', '.join(gaps)}" if gaps else ""
+            areas_for_improvement.append(f"{da.domain_name} ({_domain_score(da)}%){detail}")
+        elif gaps:
+            areas_for_improvement.append(f"{da.domain_name}: {', '.join(gaps)}")
+
+    detailed_breakdown = {
+        da.domain_name: {
+            "score": _domain_score(da),
+            "status": da.status.value,
+            "key_strengths": _strong_tags(da, 3),
+            "improvement_areas": da.current_knowledge_gaps(3),
+            "learning_strategy": _STATUS_STRATEGIES[da.status],
+        } for da in domain_assessments
+    }
+
+    summary = {
+        "title": f"Knowledge Assessment Report: {main_topic}",
+        "overall_score": overall_score,
+        "total_time_minutes": round(total_time / 60, 1),
+        "domains_assessed": len(domain_assessments),
+        "knowledge_level": knowledge_level(overall_score),
+        "strengths": strengths,
+        "areas_for_improvement": areas_for_improvement,
+        "detailed_breakdown": detailed_breakdown,
+        "narrative_status": "local",
+    }
+    summary.update(_local_narrative(ranked, gap_limit))
+    return summary
+
+
+def _local_narrative(ranked: List[DomainAssessment], gap_limit: int) -> Dict[str, Any]:
+    weakest_first = list(reversed(ranked))
+    gaps = [(da.domain_name, gap) for da in weakest_first for gap in da.current_knowledge_gaps(gap_limit)]
+
+    if gaps:
+        weakness_summary = "Most missed topics: " + "; ".join(f"{gap} ({domain})" for domain, gap in gaps[:gap_limit]) + "."
+    else:
+        weakness_summary = "No recurring knowledge gaps were detected."
+
+    recommendations = [f"Review {gap} in {domain}." for domain, gap in gaps[:3]]
+    if weakest_first:
+        recommendations.append(f"Spend most of your practice time on {weakest_first[0].domain_name}.")
+    recommendations.append("Retake the assessment after practising to measure your progress.")
+
+    return {"weakness_summary": weakness_summary, "recommendations": recommendations}
+
+
+def merge_narrative(summary: Dict[str, Any], narrative: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns a copy of the local summary with the LLM's narrative fields merged in. Fields
+    with an unexpected shape are ignored so the locally computed values stay in place.
+    """
+    merged = dict(summary)
+    if not isinstance(narrative, dict):
+        return merged
+    merged_any = False
+    if isinstance(narrative.get("weakness_summary"), str) and narrative["weakness_summary"].strip():
+        merged["weakness_summary"] = narrative["weakness_summary"]
+        merged_any = True
+    recommendations = narrative.get("recommendations")
+    if isinstance(recommendations, list) and recommendations:
+        merged["recommendations"] = [str(item) for item in recommendations]
+        merged_any = True
+    strategies = narrative.get("learning_strategy")
+    if isinstance(strategies, dict) and strategies:
+        merged["detailed_breakdown"] = {
+            name: dict(entry, learning_strategy=str(strategies[name])) if strategies.get(name) else entry
+            for name, entry in summary["detailed_breakdown"].items()
+        }
+        merged_any = True
+    merged["narrative_status"] = "ready" if merged_any else "local"
+    return merged
+
+
+class SummaryEnrichment:
+    """
+    A local summary plus the in-flight LLM call for its narrative fields. The report is
+    usable immediately; current() merges the narrative once it has arrived.
+    """
+    def __init__(self, local_summary: Dict[str, Any], narrative: Optional[Future] = None):
+        self.local_summary = local_summary
+        self.narrative = narrative
+        self._merged: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        if narrative is not None:
+            local_summary["narrative_status"] = "pending"
+
+    @property
+    def status(self) -> str:
+        if self.narrative is None:
+            return "local"
+        if not self.narrative.done():
+            return "pending"
+        return "failed" if self.narrative.exception() is not None else "ready"
+
+    def current(self) -> Dict[str, Any]:
+        status = self.status
+        if status == "ready":
+            with self._lock:
+                if self._merged is None:
+                    self._merged = merge_narrative(self.local_summary, self.narrative.result())
+            return self._merged
+        if status == "failed":
+            return dict(self.local_summary, narrative_status="failed")
+        return self.local_summary
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        if self.narrative is not None:
+            try:
+                self.narrative.result(timeout)
+            except Exception:
+                pass
+        return self.current()
+
+
+def session_fingerprint(session: AssessmentSession) -> str:
+    """
+    Hash of the session state the summary is built from. It changes whenever an answer is
+    recorded or a domain changes status, and at no other time.
+    """
+    state = [session.main_topic] + [
+        [da.domain_name, da.status.value, da.questions_attempted, da.questions_correct]
+        for da in session.domain_assessments
+    ]
+    return hashlib.sha1(json.dumps(state).encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    One summary per session, keyed by the session's state fingerprint. Concurrent requests
+    for the same fingerprint share a single generation; a new fingerprint replaces the
+    session's entry, so cached summaries are dropped only when new answers arrive. The
+    least recently used sessions are evicted beyond max_sessions.
+    """
+    def __init__(self, max_sessions: int = 256):
+        self.max_sessions = max_sessions
+        self._entries: "OrderedDict[str, Tuple[str, Future]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_create(self, session_id: str, fingerprint: str,
+                      factory: Callable[[], SummaryEnrichment]) -> SummaryEnrichment:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(session_id)
+                owner = False
+                future = entry[1]
+            else:
+                owner = True
+                future = Future()
+                self._entries[session_id] = (fingerprint, future)
+                self._entries.move_to_end(session_id)
+                while len(self._entries) > self.max_sessions:
+                    self._entries.popitem(last=False)
+        record_cache_lookup("summary", not owner)
+
+        if owner:
+            try:
+                future.set_result(factory())
+            except BaseException as e:
+                future.set_exception(e)
+                with self._lock:
+                    if self._entries.get(session_id, (None, None))[1] is future:
+                        del self._entries[session_id]
+        return future.result()
+
+    def invalidate(self, session_id: str):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+summary_cache = SummaryCache(CONFIG["summary"]["cache_sessions"])
@@ -0,0 +1,36 @@
+import pytest
+
+from ai_service import AIService
+from assessment_flow import AssessmentFlowManager
+from question_flow import QuestionFlowManager
+
+# Per domain: (knowledge tag, is_correct) answers in the order they were given.
+ANSWERS = [
+    [("variables", True)] * 6 + [("types", True)] * 4,
+    [("comprehensions", False), ("comprehensions", True)] + [("loops", True)] * 5
+    + [("comprehensions", False), ("comprehensions", True), ("comprehensions", False)],
+    [("decorators", False), ("generators", True), ("decorators", False), ("generators", False),
+     ("decorators", False)],
+]
+
+
+@pytest.fixture
+def finished_session():
+    ai_service = AIService()
+    ai_service.use_mock = True
+    assessment = AssessmentFlowManager(ai_service)
+    session = assessment.start_assessment_session("Python", len(ANSWERS))
+    flow = QuestionFlowManager(ai_service)
+
+    for domain_index, answers in enumerate(ANSWERS):
+        assert assessment.start_domain_assessment(domain_index)
+        domain_assessment = session.domain_assessments[domain_index]
+        for i, (tag, is_correct) in enumerate(answers):
+            domain_assessment.response_history.record(i % 4, is_correct, 20.0, 0.5)
+            domain_assessment.questions_attempted += 1
+            domain_assessment.questions_correct += int(is_correct)
+            domain_assessment.record_knowledge_tag(tag, is_correct)
+        flow.current_domain_assessment = domain_assessment
+        flow.complete_domain_assessment()
+        assessment.set_domain_status(domain_index, domain_assessment.status)
+    return session
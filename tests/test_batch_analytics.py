@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from batch_analytics import replay_responses
+from models import ConfidenceCalibrationEngine, ConfidenceQualityMetrics, EnhancedConfidenceEngine
+
+QUALITY_WINDOW = 40
+CORRELATION_WINDOW = 15
+
+
+def _random_records(rng: random.Random, sessions: int):
+    """Interleaved (session, correct, response_time, confidence, difficulty) records."""
+    queues = []
+    for s in range(sessions):
+        skill = rng.random()
+        answers = []
+        for _ in range(rng.randrange(0, 120)):
+            if rng.random() < 0.2:
+                confidence = rng.choice([0.05, 0.15, 0.25, 0.5, 0.75, 0.85, 1.0])
+            else:
+                confidence = rng.random()
+            answers.append((f"s{s:02d}", rng.random() < skill, rng.uniform(3.0, 90.0),
+                            confidence, rng.randrange(1, 101)))
+        queues.append(answers)
+
+    records = []
+    while any(queues):
+        queue = rng.choice([q for q in queues if q])
+        records.append(queue.pop(0))
+    return records
+
+
+def _scalar_replay(records):
+    engines = {}
+    for session, is_correct, _, confidence, _ in records:
+        if session not in engines:
+            engines[session] = (
+                ConfidenceQualityMetrics(history_size=QUALITY_WINDOW),
+                EnhancedConfidenceEngine(history_size=CORRELATION_WINDOW),
+                ConfidenceCalibrationEngine(history_size=QUALITY_WINDOW),
+            )
+        quality, enhanced, calibration = engines[session]
+        quality.add_data_point(confidence, is_correct)
+        enhanced.update_correlation(confidence, is_correct)
+        calibration.update_calibration(confidence, is_correct)
+    return engines
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_scalar_engines(seed):
+    rng = random.Random(seed)
+    records = _random_records(rng, rng.randrange(1, 12))
+    columns = list(zip(*records)) if records else [[]] * 5
+
+    result = replay_responses(
+        np.array(columns[0]), np.array(columns[1], dtype=bool), np.array(columns[2]),
+        np.array(columns[3]), np.array(columns[4]),
+        quality_history_size=QUALITY_WINDOW, correlation_history_size=CORRELATION_WINDOW,
+    )
+    engines = _scalar_replay(records)
+
+    assert result.sessions.tolist() == sorted(engines)
+    bins = result.calibration_bins
+    for index, session in enumerate(result.sessions.tolist()):
+        quality, enhanced, calibration = engines[session]
+        assert result.quality_score[index] == pytest.approx(quality.get_confidence_quality_score(), abs=1e-9)
+        assert result.correlation[index] == pytest.approx(enhanced.confidence_accuracy_correlation, abs=1e-9)
+
+        mine = bins.session_index == index
+        curve = dict(zip(bins.bin_confidence[mine].tolist(), bins.accuracy[mine].tolist()))
+        assert curve.keys() == calibration.calibration_curve.keys()
+        for bin_key, accuracy in calibration.calibration_curve.items():
+            assert curve[bin_key] == pytest.approx(accuracy, abs=1e-12)
+
+        if len(quality.confidence_accuracy_data) >= 10:
+            assert result.calibration_error[index] == pytest.approx(quality.calculate_calibration_error(), abs=1e-9)
+            assert result.overconfidence[index] == pytest.approx(quality.calculate_overconfidence(), abs=1e-12)
+            assert result.consistency[index] == pytest.approx(quality.calculate_consistency(), abs=1e-9)
@@ -0,0 +1,77 @@
+from typing import Dict, List, Tuple
+import random
+
+import pytest
+
+from models import ConfidenceCalibrationEngine
+
+
+class _ListCalibrationEngine:
+    """The list-based engine the incremental one replaced: rebins the window on every update."""
+    def __init__(self, history_size: int = 100):
+        self.confidence_accuracy_pairs: List[Tuple[float, bool]] = []
+        self.calibration_curve: Dict[float, float] = {}
+        self.history_size = history_size
+
+    def update_calibration(self, confidence: float, is_correct: bool):
+        self.confidence_accuracy_pairs.append((confidence, is_correct))
+        if len(self.confidence_accuracy_pairs) > self.history_size:
+            self.confidence_accuracy_pairs.pop(0)
+        self.calculate_calibration_curve()
+
+    def calculate_calibration_curve(self):
+        if len(self.confidence_accuracy_pairs) < 10:
+            return
+        bins = {}
+        for confidence, is_correct in self.confidence_accuracy_pairs:
+            bins.setdefault(round(confidence, 1), []).append(is_correct)
+        self.calibration_curve = {}
+        for bin_key, results in bins.items():
+            if len(results) >= 3:
+                self.calibration_curve[bin_key] = sum(results) / len(results)
+
+    def get_calibrated_confidence(self, raw_confidence: float) -> float:
+        bin_key = round(raw_confidence, 1)
+        if bin_key in self.calibration_curve:
+            return self.calibration_curve[bin_key]
+        return self.interpolate_confidence(raw_confidence)
+
+    def interpolate_confidence(self, confidence: float) -> float:
+        if not self.calibration_curve:
+            return confidence
+        sorted_bins = sorted(self.calibration_curve.keys())
+        if confidence <= sorted_bins[0]:
+            return self.calibration_curve[sorted_bins[0]]
+        if confidence >= sorted_bins[-1]:
+            return self.calibration_curve[sorted_bins[-1]]
+        for i in range(len(sorted_bins) - 1):
+            if sorted_bins[i] <= confidence <= sorted_bins[i + 1]:
+                x1, y1 = sorted_bins[i], self.calibration_curve[sorted_bins[i]]
+                x2, y2 = sorted_bins[i + 1], self.calibration_curve[sorted_bins[i + 1]]
+                return y1 + (y2 - y1) * (confidence - x1) / (x2 - x1)
+        return confidence
+
+
+def _random_confidence(rng: random.Random) -> float:
+    if rng.random() < 0.3:
+        return rng.choice([0.0, 0.1, 0.25, 0.35, 0.5, 0.65, 0.75, 0.95, 1.0])
+    return rng.random()
+
+
+@pytest.mark.parametrize("history_size", [10, 100])
+@pytest.mark.parametrize("seed", range(25))
+def test_matches_list_based_engine(history_size, seed):
+    rng = random.Random(seed)
+    reference = _ListCalibrationEngine(history_size)
+    engine = ConfidenceCalibrationEngine(history_size)
+    probes = [i / 40 for i in range(41)] + [-0.2, 1.3]
+
+    for _ in range(rng.randrange(50, 400)):
+        confidence = _random_confidence(rng)
+        is_correct = rng.random() < confidence
+        reference.update_calibration(confidence, is_correct)
+        engine.update_calibration(confidence, is_correct)
+
+        assert engine.calibration_curve == reference.calibration_curve
+        for raw in probes + [confidence, rng.random()]:
+            assert engine.get_calibrated_confidence(raw) == reference.get_calibrated_confidence(raw)
@@ -0,0 +1,16 @@
+import pytest
+
+from deadline import time_left, use_deadline
+
+
+def test_time_left_without_budget():
+    assert time_left(8.0, reserve=3.0) == 8.0
+
+
+def test_time_left_keeps_reserve_for_later_stages():
+    with use_deadline(5.0):
+        assert time_left(8.0) == pytest.approx(5.0, abs=0.05)
+        assert time_left(8.0, reserve=3.5) == pytest.approx(1.5, abs=0.05)
+        assert time_left(1.0, reserve=3.5) == 1.0
+        assert time_left(8.0, reserve=9.0) == 0.0
+        assert time_left(8.0, minimum=2.0, reserve=9.0) == 2.0
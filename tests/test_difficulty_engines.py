@@ -0,0 +1,24 @@
+import random
+
+import pytest
+
+from models import create_difficulty_engine
+
+
+@pytest.mark.parametrize("engine_type", ["heuristic", "irt"])
+def test_confidence_engine_is_updated(engine_type):
+    rng = random.Random(11)
+    prior = {0.5: (0.9, 10.0)}
+    engine = create_difficulty_engine(50, engine_type, calibration_prior=prior)
+    calibration = engine.confidence_engine.calibration_engine
+    assert calibration.get_calibrated_confidence(0.5) == pytest.approx(0.9)
+
+    answers = [(rng.choice([0.45, 0.5, 0.55]), False) for _ in range(10)]
+    answers += [(rng.random(), rng.random() < 0.5) for _ in range(20)]
+    for confidence, is_correct in answers:
+        engine.update_difficulty(is_correct, 20.0, confidence, item_difficulty=50)
+
+    assert len(calibration.confidence_accuracy_pairs) == len(answers)
+    assert calibration.get_calibrated_confidence(0.5) < 0.9
+    assert len(engine.confidence_engine.correlation_window) == len(answers)
+    assert engine.confidence_engine.confidence_accuracy_correlation != 0.0
@@ -0,0 +1,30 @@
+import pytest
+
+from ai_service import AIService
+from models import DomainAssessment
+from question_flow import QuestionFlowManager
+
+
+@pytest.fixture
+def flow():
+    ai_service = AIService()
+    ai_service.use_mock = True
+    flow = QuestionFlowManager(ai_service)
+    flow.start_domain_assessment(DomainAssessment("Algebra"), "Maths")
+    if flow.current_question is None:
+        flow.generate_question()
+    return flow
+
+
+@pytest.mark.parametrize("answer_index", [-1, 4, 70000, 2 ** 40])
+def test_submit_answer_rejects_index_outside_options(flow, answer_index):
+    result = flow.submit_answer(answer_index, 0.5)
+    assert "error" in result
+    assert flow.current_domain_assessment.questions_attempted == 0
+    assert len(flow.current_domain_assessment.response_history) == 0
+
+
+def test_submit_answer_records_valid_index(flow):
+    result = flow.submit_answer(3, 0.5)
+    assert "error" not in result
+    assert flow.current_domain_assessment.response_history[0].user_answer_index == 3
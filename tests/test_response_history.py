@@ -0,0 +1,87 @@
+from datetime import datetime
+import random
+
+import pytest
+
+from models import QuestionResponse, ResponseHistory
+
+
+def _random_responses(rng: random.Random, count: int, domain_name: str):
+    start = 1_700_000_000
+    return [
+        QuestionResponse(
+            question_id=f"{domain_name}_{i}",
+            user_answer_index=rng.randrange(4),
+            is_correct=rng.random() < 0.6,
+            response_time=rng.uniform(2.0, 120.0),
+            confidence_level=rng.random(),
+            timestamp=datetime.fromtimestamp(start + i * 7),
+        )
+        for i in range(count)
+    ]
+
+
+def _accuracy(responses) -> float:
+    return sum(1 for r in responses if r.is_correct) / len(responses)
+
+
+def _streaks(responses):
+    """Longest run of correct answers and the current run of correct or incorrect ones."""
+    longest = run = 0
+    trailing_correct = trailing_incorrect = 0
+    for r in responses:
+        run = run + 1 if r.is_correct else 0
+        longest = max(longest, run)
+        if r.is_correct:
+            trailing_correct, trailing_incorrect = trailing_correct + 1, 0
+        else:
+            trailing_correct, trailing_incorrect = 0, trailing_incorrect + 1
+    return longest, trailing_correct, trailing_incorrect
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_list_of_responses(seed):
+    rng = random.Random(seed)
+    reference = _random_responses(rng, rng.randrange(1, 200), "Algebra")
+
+    recorded = ResponseHistory("Algebra")
+    appended = ResponseHistory("Algebra")
+    for r in reference:
+        recorded.record(r.user_answer_index, r.is_correct, r.response_time, r.confidence_level,
+                        r.timestamp.timestamp())
+        appended.append(r)
+
+    for history in (recorded, appended):
+        assert len(history) == len(reference)
+        assert list(history) == reference
+        assert history[-1] == reference[-1]
+        assert history[3:10] == reference[3:10]
+        assert history.total_correct / len(history) == _accuracy(reference)
+        assert history.average_response_time() == pytest.approx(
+            sum(r.response_time for r in reference) / len(reference), rel=1e-12)
+        assert history.average_confidence() == pytest.approx(
+            sum(r.confidence_level for r in reference) / len(reference), rel=1e-12)
+        assert _streaks(history) == _streaks(reference)
+
+
+def test_empty_history():
+    history = ResponseHistory("Algebra")
+    assert not history
+    assert list(history) == []
+    assert history[:5] == []
+    assert history.average_response_time() == 0.0
+    assert history.average_confidence() == 0.0
+    with pytest.raises(IndexError):
+        history[0]
+
+
+def test_appended_question_ids_are_kept():
+    rng = random.Random(7)
+    reference = _random_responses(rng, 3, "Algebra")
+    reference[1].question_id = "bank:quadratics"
+
+    history = ResponseHistory("Algebra")
+    for r in reference:
+        history.append(r)
+
+    assert [r.question_id for r in history] == ["Algebra_0", "bank:quadratics", "Algebra_2"]
@@ -0,0 +1,84 @@
+import threading
+
+from summary_engine import SummaryCache, SummaryEnrichment, build_local_summary, session_fingerprint
+
+
+def test_summary_cache_single_flight(finished_session):
+    cache = SummaryCache()
+    fingerprint = session_fingerprint(finished_session)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        started.set()
+        assert release.wait(5)
+        return SummaryEnrichment(build_local_summary("Python", finished_session.domain_assessments, 600.0))
+
+    results = [None, None]
+
+    def caller(slot):
+        results[slot] = cache.get_or_create(finished_session.session_id, fingerprint, factory)
+
+    first = threading.Thread(target=caller, args=(0,))
+    first.start()
+    assert started.wait(5)
+    second = threading.Thread(target=caller, args=(1,))
+    second.start()
+    second.join(0.1)
+    assert second.is_alive()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert len(calls) == 1
+    assert results[0] is not None and results[0] is results[1]
+    assert cache.get_or_create(finished_session.session_id, fingerprint, factory) is results[0]
+    assert len(calls) == 1
+
+
+def test_summary_cache_regenerates_on_new_fingerprint(finished_session):
+    cache = SummaryCache()
+    before = session_fingerprint(finished_session)
+    first = cache.get_or_create(finished_session.session_id, before, lambda: SummaryEnrichment({}))
+
+    finished_session.domain_assessments[0].questions_attempted += 1
+    after = session_fingerprint(finished_session)
+    assert after != before
+    second = cache.get_or_create(finished_session.session_id, after, lambda: SummaryEnrichment({}))
+    assert second is not first
+    assert len(cache) == 1
+
+
+def test_summary_cache_failure_is_shared_and_not_cached():
+    cache = SummaryCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def failing_factory():
+        calls.append(1)
+        started.set()
+        assert release.wait(5)
+        raise RuntimeError("summary failed")
+
+    errors = []
+
+    def caller():
+        try:
+            cache.get_or_create("session", "fingerprint", failing_factory)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller)]
+    threads[0].start()
+    assert started.wait(5)
+    threads.append(threading.Thread(target=caller))
+    threads[1].start()
+    threads[1].join(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(errors) == 2 and errors[0] is errors[1]
+    assert len(cache) == 0
@@ -0,0 +1,56 @@
+from concurrent.futures import Future
+
+from summary_engine import SummaryEnrichment, build_local_summary
+
+
+def test_local_summary_of_finished_session(finished_session):
+    names = [da.domain_name for da in finished_session.domain_assessments]
+    summary = build_local_summary("Python", finished_session.domain_assessments, 600.0)
+
+    assert summary["title"] == "Knowledge Assessment Report: Python"
+    assert summary["overall_score"] == 72.0
+    assert summary["total_time_minutes"] == 10.0
+    assert summary["domains_assessed"] == 3
+    assert summary["knowledge_level"] == "Advanced"
+    assert summary["narrative_status"] == "local"
+    assert summary["strengths"] == [
+        f"{names[0]} (100.0%)", f"{names[1]} (70.0%)", "variables", "types", "loops",
+    ]
+    assert summary["areas_for_improvement"] == [
+        f"{names[2]} (20.0%): decorators", f"{names[1]}: comprehensions",
+    ]
+
+    breakdown = summary["detailed_breakdown"]
+    assert list(breakdown) == names
+    assert [breakdown[name]["status"] for name in names] == ["mastered", "completed", "struggling"]
+    assert [breakdown[name]["score"] for name in names] == [100.0, 70.0, 20.0]
+    assert breakdown[names[0]]["key_strengths"] == ["variables", "types"]
+    assert breakdown[names[1]]["improvement_areas"] == ["comprehensions"]
+    assert breakdown[names[2]]["key_strengths"] == []
+    assert all(entry["learning_strategy"] for entry in breakdown.values())
+
+    assert summary["weakness_summary"] == (
+        f"Most missed topics: decorators ({names[2]}); comprehensions ({names[1]})."
+    )
+    assert summary["recommendations"] == [
+        f"Review decorators in {names[2]}.",
+        f"Review comprehensions in {names[1]}.",
+        f"Spend most of your practice time on {names[2]}.",
+        "Retake the assessment after practising to measure your progress.",
+    ]
+
+
+def test_enrichment_merges_narrative(finished_session):
+    summary = build_local_summary("Python", finished_session.domain_assessments, 600.0)
+    narrative = Future()
+    enrichment = SummaryEnrichment(summary, narrative)
+    assert enrichment.status == "pending"
+    assert enrichment.current()["narrative_status"] == "pending"
+
+    narrative.set_result({"weakness_summary": "Decorators need work.", "recommendations": ["Practise."]})
+    merged = enrichment.current()
+    assert enrichment.status == "ready"
+    assert merged["narrative_status"] == "ready"
+    assert merged["weakness_summary"] == "Decorators need work."
+    assert merged["recommendations"] == ["Practise."]
+    assert merged["detailed_breakdown"] == summary["detailed_breakdown"]
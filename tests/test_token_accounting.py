@@ -0,0 +1,45 @@
+import threading
+from types import SimpleNamespace
+
+from ai_service import AIService
+from token_accounting import TokenLedger, use_ledger
+
+
+def test_report_prefix_cache_hit_ratio():
+    ledger = TokenLedger()
+    ledger.record("question", "gpt-4o-mini", 1200, 200, 1.0, cached_prompt_tokens=1024)
+    ledger.record("question", "gpt-4o-mini", 1200, 200, 1.0, cached_prompt_tokens=0)
+    ledger.record("summary", "gpt-4o-mini", 600, 300, 2.0)
+
+    report = ledger.report()
+    assert report["by_call_type"]["question"]["cached_prompt_tokens"] == 1024
+    assert report["by_call_type"]["question"]["prefix_cache_hit_ratio"] == round(1024 / 2400, 3)
+    assert report["by_call_type"]["summary"]["prefix_cache_hit_ratio"] == 0.0
+    assert report["prefix_cache_hit_ratio"] == round(1024 / 3000, 3)
+    assert TokenLedger().report()["prefix_cache_hit_ratio"] == 0.0
+
+
+def test_cached_tokens_are_read_from_usage_details():
+    usage = SimpleNamespace(prompt_tokens=1500, completion_tokens=100,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=1280))
+    ledger = TokenLedger()
+    with use_ledger(ledger):
+        AIService()._record_usage("question", "gpt-4o-mini", usage, 0.5)
+        AIService()._record_usage("question", "gpt-4o-mini", SimpleNamespace(prompt_tokens=500, completion_tokens=10), 0.5)
+
+    assert ledger.report()["by_call_type"]["question"]["prefix_cache_hit_ratio"] == round(1280 / 2000, 3)
+
+
+def test_record_fallback_from_many_threads():
+    ledger = TokenLedger(budget=10)
+
+    def record():
+        for _ in range(1000):
+            ledger.record_fallback()
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert ledger.report()["budget_fallbacks"] == 8000
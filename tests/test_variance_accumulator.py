@@ -0,0 +1,86 @@
+from collections import deque
+import math
+import random
+import statistics
+
+import pytest
+
+from models import ConfidenceQualityMetrics, _ExactVarianceAccumulator
+
+
+def _accumulate(values):
+    accumulator = _ExactVarianceAccumulator()
+    for value in values:
+        accumulator.add(value)
+    return accumulator
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_statistics(seed):
+    rng = random.Random(seed)
+    values = [rng.random() for _ in range(rng.randrange(1, 300))]
+    accumulator = _accumulate(values)
+
+    assert accumulator.pvariance() == statistics.pvariance(values)
+    assert accumulator.pstdev() == math.sqrt(statistics.pvariance(values))
+    assert accumulator.pstdev() == pytest.approx(statistics.pstdev(values), rel=1e-15)
+    if len(values) > 1:
+        assert accumulator.variance() == statistics.variance(values)
+        assert accumulator.stdev() == pytest.approx(statistics.stdev(values), rel=1e-15)
+
+
+def test_single_value():
+    accumulator = _accumulate([0.7])
+    assert accumulator.pvariance() == statistics.pvariance([0.7]) == 0.0
+    assert accumulator.pstdev() == 0.0
+    with pytest.raises(statistics.StatisticsError):
+        accumulator.variance()
+    with pytest.raises(statistics.StatisticsError):
+        statistics.variance([0.7])
+
+
+def test_no_values():
+    accumulator = _ExactVarianceAccumulator()
+    with pytest.raises(statistics.StatisticsError):
+        accumulator.pvariance()
+    with pytest.raises(statistics.StatisticsError):
+        accumulator.pstdev()
+    with pytest.raises(statistics.StatisticsError):
+        accumulator.variance()
+    with pytest.raises(statistics.StatisticsError):
+        statistics.pvariance([])
+
+
+def test_sliding_window_does_not_drift():
+    rng = random.Random(42)
+    window = deque()
+    accumulator = _ExactVarianceAccumulator()
+    for _ in range(2000):
+        value = rng.choice([0.05, 0.1, 0.3, 1e-9, 0.9, 1.0, rng.random()])
+        window.append(value)
+        accumulator.add(value)
+        if len(window) > 25:
+            accumulator.remove(window.popleft())
+        assert accumulator.pvariance() == statistics.pvariance(window)
+        if len(window) > 1:
+            assert accumulator.variance() == statistics.variance(window)
+
+    while window:
+        accumulator.remove(window.popleft())
+    assert accumulator.count == 0
+    with pytest.raises(statistics.StatisticsError):
+        accumulator.pvariance()
+
+
+def test_quality_consistency_matches_recomputed_variance():
+    rng = random.Random(3)
+    metrics = ConfidenceQualityMetrics(history_size=40)
+    for _ in range(300):
+        metrics.add_data_point(rng.random(), rng.random() < 0.5)
+        correct = [c for c, ok in metrics.confidence_accuracy_data if ok]
+        incorrect = [c for c, ok in metrics.confidence_accuracy_data if not ok]
+        if len(correct) < 3 or len(incorrect) < 3:
+            expected = 0.5
+        else:
+            expected = 1 / (1 + (statistics.variance(correct) + statistics.variance(incorrect)) / 2)
+        assert metrics.calculate_consistency() == expected
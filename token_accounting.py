@@ -0,0 +1,128 @@
+from typing import Any, Dict, Iterator, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import threading
+
+from config import CONFIG
+from metrics import LLM_COST
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_prompt_tokens: int = 0) -> float:
+    """
+    USD cost of a call from the configured per-million-token prices; unknown models cost 0.
+    Prompt tokens served from the provider's prefix cache are billed at the cached rate.
+    """
+    prices = CONFIG["openai"]["pricing"].get(model)
+    if not prices:
+        return 0.0
+    prompt_cost = (prompt_tokens - cached_prompt_tokens * (1 - CONFIG["openai"]["cached_prompt_price_factor"])) * prices[0]
+    return (prompt_cost + completion_tokens * prices[1]) / 1_000_000
+
+
+@dataclass
+class CallTypeUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    cost: float = 0.0
+    latency: float = 0.0
+
+
+class TokenLedger:
+    """
+    Token, cost and latency accounting for one assessment session, with an optional
+    token budget. LLM calls made while the ledger is active (see use_ledger) are charged
+    to it, including calls scheduled on the background pool from that context.
+    """
+    def __init__(self, budget: int = 0):
+        self.budget = budget
+        self.usage: Dict[str, CallTypeUsage] = {}
+        self.budget_fallbacks = 0
+        self._lock = threading.Lock()
+
+    def record(self, call_type: str, model: str, prompt_tokens: int, completion_tokens: int, latency: float,
+               cached_prompt_tokens: int = 0):
+        cost = estimate_cost(model, prompt_tokens, completion_tokens, cached_prompt_tokens)
+        with self._lock:
+            usage = self.usage.get(call_type)
+            if usage is None:
+                usage = self.usage[call_type] = CallTypeUsage()
+            usage.calls += 1
+            usage.prompt_tokens += prompt_tokens
+            usage.completion_tokens += completion_tokens
+            usage.cached_prompt_tokens += cached_prompt_tokens
+            usage.cost += cost
+            usage.latency += latency
+        LLM_COST.labels(call_type, model).inc(cost)
+
+    def record_fallback(self):
+        """Counts an LLM call skipped or overrun because the budget was spent."""
+        with self._lock:
+            self.budget_fallbacks += 1
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(u.prompt_tokens + u.completion_tokens for u in self.usage.values())
+
+    def remaining(self) -> Optional[int]:
+        if self.budget <= 0:
+            return None
+        return max(0, self.budget - self.total_tokens)
+
+    def exhausted(self) -> bool:
+        return self.budget > 0 and self.total_tokens >= self.budget
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            by_call_type = {
+                call_type: {
+                    "calls": u.calls,
+                    "prompt_tokens": u.prompt_tokens,
+                    "completion_tokens": u.completion_tokens,
+                    "cached_prompt_tokens": u.cached_prompt_tokens,
+                    "prefix_cache_hit_ratio": round(u.cached_prompt_tokens / u.prompt_tokens, 3) if u.prompt_tokens else 0.0,
+                    "cost_usd": round(u.cost, 6),
+                    "latency_seconds": round(u.latency, 3),
+                } for call_type, u in self.usage.items()
+            }
+        return {
+            "total_tokens": sum(u["prompt_tokens"] + u["completion_tokens"] for u in by_call_type.values()),
+            "prefix_cache_hit_ratio": _hit_ratio(by_call_type.values()),
+            "total_cost_usd": round(sum(u["cost_usd"] for u in by_call_type.values()), 6),
+            "total_llm_latency_seconds": round(sum(u["latency_seconds"] for u in by_call_type.values()), 3),
+            "token_budget": self.budget or None,
+            "budget_exhausted": self.exhausted(),
+            "budget_fallbacks": self.budget_fallbacks,
+            "by_call_type": by_call_type,
+        }
+
+
+def _hit_ratio(usages) -> float:
+    """Share of prompt tokens the provider reported as served from its prefix cache."""
+    usages = list(usages)
+    prompt_tokens = sum(u["prompt_tokens"] for u in usages)
+    if not prompt_tokens:
+        return 0.0
+    return round(sum(u["cached_prompt_tokens"] for u in usages) / prompt_tokens, 3)
+
+
+_current_ledger: ContextVar[Optional[TokenLedger]] = ContextVar("token_ledger", default=None)
+
+
+def current_ledger() -> Optional[TokenLedger]:
+    return _current_ledger.get()
+
+
+@contextmanager
+def use_ledger(ledger: Optional[TokenLedger]) -> Iterator[Optional[TokenLedger]]:
+    token = _current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current_ledger.reset(token)
+
+
+def new_session_ledger() -> TokenLedger:
+    return TokenLedger(CONFIG["openai"]["session_token_budget"])
@@ -0,0 +1,178 @@
+from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from config import CONFIG
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "sampled",
+                 "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = {}
+        self.status = "OK"
+
+    def set_attribute(self, key: str, value: Any):
+        if self.sampled:
+            self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class JsonlSpanExporter:
+    """
+    Appends finished spans to a local JSONL file, one OTLP-style span per line.
+    Spans are buffered and written in batches to keep file I/O off the request path.
+    """
+    def __init__(self, path: str, batch_size: int = 64):
+        self.path = path
+        self.batch_size = batch_size
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self._buffer.append(span.to_dict())
+            if len(self._buffer) < self.batch_size:
+                return
+            batch, self._buffer = self._buffer, []
+        self._write(batch)
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(item, default=str) + "\n" for item in batch))
+        except OSError as e:
+            print(f"Error exporting trace spans: {e}")
+
+
+class Tracer:
+    def __init__(self, enabled: bool, sample_rate: float, exporter: Optional[JsonlSpanExporter]):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    @contextmanager
+    def start_span(self, name: str, trace_id: Optional[str] = None,
+                   parent_id: Optional[str] = None, sampled: Optional[bool] = None, **attributes):
+        """
+        Opens a span as a child of the current span. A new trace is started when
+        there is no current span; the sampling decision is taken once at the root
+        and inherited by all children, so unsampled traces cost a single
+        context-variable lookup per span.
+        """
+        parent = _current_span.get()
+        if parent is not None and trace_id is None:
+            if not parent.sampled:
+                yield parent
+                return
+            span = Span(parent.trace_id, parent.span_id, name, True)
+        else:
+            if sampled is None:
+                sampled = self.enabled and random.random() < self.sample_rate
+            span = Span(trace_id or os.urandom(16).hex(), parent_id, name, sampled)
+
+        if span.sampled:
+            span.attributes.update(attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "ERROR"
+            span.set_attribute("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            if span.sampled and self.exporter is not None:
+                span.end_ns = time.time_ns()
+                self.exporter.export(span)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+_exporter = JsonlSpanExporter(
+    CONFIG["tracing"]["export_path"], CONFIG["tracing"]["export_batch_size"]
+) if CONFIG["tracing"]["enabled"] and CONFIG["tracing"]["export_path"] else None
+
+tracer = Tracer(CONFIG["tracing"]["enabled"], CONFIG["tracing"]["sample_rate"], _exporter)
+
+if _exporter is not None:
+    atexit.register(_exporter.flush)
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Parses a W3C `traceparent` header into trace id, parent span id and sampled flag.
+    """
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    return {"trace_id": parts[1], "parent_id": parts[2], "sampled": bool(flags & 0x01)}
+
+
+def format_traceparent(span: Span) -> str:
+    return f"00-{span.trace_id}-{span.span_id}-{'01' if span.sampled else '00'}"
+
+
+def span(name: str, **attributes):
+    return tracer.start_span(name, **attributes)
+
+
+def traced(name: str):
+    """
+    Decorator that wraps a function call in a span with the given name.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.start_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
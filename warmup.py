@@ -0,0 +1,69 @@
+from typing import Callable, Dict, Any, List, Optional
+import threading
+import time
+from metrics import REGISTRY
+
+_PROCESS_IMPORT_START = time.perf_counter()
+
+COLD_START_SECONDS = REGISTRY.gauge(
+    "worker_cold_start_seconds", "Seconds from module import to each startup phase.", ("phase",)
+)
+
+
+class WarmupManager:
+    """
+    Runs registered warm-up tasks (client construction, connection pre-opening,
+    bank and cache pre-loading) on a background thread after startup and tracks
+    worker readiness separately from liveness.
+    """
+    def __init__(self):
+        self._tasks: List[tuple] = []
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.phase_timings: Dict[str, float] = {}
+        self.errors: List[str] = []
+
+    def register(self, name: str, task: Callable[[], None]):
+        self._tasks.append((name, task))
+
+    def mark_phase(self, phase: str):
+        elapsed = time.perf_counter() - _PROCESS_IMPORT_START
+        self.phase_timings[phase] = round(elapsed, 4)
+        COLD_START_SECONDS.labels(phase).set(elapsed)
+
+    def start(self, background: bool = True):
+        self.mark_phase("startup")
+        if not background:
+            self._run()
+            return
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def mark_ready(self):
+        self.mark_phase("ready")
+        self._ready.set()
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.is_ready(),
+            "cold_start_seconds": dict(self.phase_timings),
+            "warmup_errors": list(self.errors),
+        }
+
+    def _run(self):
+        for name, task in self._tasks:
+            try:
+                task()
+            except Exception as e:
+                self.errors.append(f"{name}: {e}")
+                print(f"Error during warm-up task {name}: {e}")
+        self.mark_ready()
+
+
+warmup_manager = WarmupManager()